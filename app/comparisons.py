@@ -1,6 +1,24 @@
+from app.fetcher import fetch_prices
+from app.templates import TEMPLATES, TWITTER
+
+TEMPLATES.register('comparison', "{emoji} {intro} the price has {direction} by ${price} ({percent}%).\n")
+TEMPLATES.register('coin_update', "The ${code} price is at ${price} right now.\n{comparisons}\n{hashtags}")
+
+
 class ComparisonsGenerator:
-    def __init__(self):
-        self.last_tweet_price = None
+    """Compares each coin's price with its last tweeted price and its price 24 hours ago."""
+
+    def __init__(self, default_coin='XRP'):
+        self.default_coin = default_coin
+        self.last_tweet_prices = {}  # coin code -> price in its last tweet
+
+    @property
+    def last_tweet_price(self):
+        return self.last_tweet_prices.get(self.default_coin)
+
+    @last_tweet_price.setter
+    def last_tweet_price(self, price):
+        self.set_last_tweet_price(price)
 
     @staticmethod
     def add_comparison(comparisons_list, comparison):
@@ -13,14 +31,15 @@ class ComparisonsGenerator:
         percent_change = (price_change / previous_price) * 100 if previous_price != 0 else 0
         return {'price': price_change, 'percent': percent_change}
 
-    def get_comparisons(self, current_price, last_day_price):
+    def get_comparisons(self, current_price, last_day_price, coin=None):
         comparisons = []
 
         # Comparison with the last tweet
-        if self.last_tweet_price is not None:
+        last_tweet_price = self.last_tweet_prices.get(coin or self.default_coin)
+        if last_tweet_price is not None:
             comparison = {
                 'intro': 'Compared to the last tweet,',
-                'change': self.get_change(current_price, self.last_tweet_price)
+                'change': self.get_change(current_price, last_tweet_price)
             }
             self.add_comparison(comparisons, comparison)
 
@@ -33,8 +52,8 @@ class ComparisonsGenerator:
 
         return comparisons
 
-    def set_last_tweet_price(self, price):
-        self.last_tweet_price = price
+    def set_last_tweet_price(self, price, coin=None):
+        self.last_tweet_prices[coin or self.default_coin] = price
 
 class MessageGenerator:
     def __init__(self, coin_name, coin_code, decimals_amount=2, has_hashtags=True):
@@ -42,17 +61,21 @@ class MessageGenerator:
         self.coin_code = coin_code
         self.decimals_amount = decimals_amount
         self.has_hashtags = has_hashtags
+        self.comparison_template = TEMPLATES.get('comparison')
 
     def format(self, number, is_percentage=False):
-        absolute_number = abs(number)
-        formatted_number = f"{absolute_number:.{self.decimals_amount}f}"
-        return formatted_number
+        return f"{abs(number):.{self.decimals_amount}f}"
 
     def create_comparison_message(self, comparison):
         change = comparison['change']
-        formatted_price = self.format(change['price'])
-        formatted_percent = self.format(change['percent'], is_percentage=True)
-        return f"{'🟢' if change['price'] > 0 else '🔴'} {comparison['intro']} the price has {'increased' if change['price'] > 0 else 'dropped'} by ${formatted_price} ({formatted_percent}%).\n"
+        increased = change['price'] > 0
+        return self.comparison_template.render({
+            'emoji': '🟢' if increased else '🔴',
+            'intro': comparison['intro'],
+            'direction': 'increased' if increased else 'dropped',
+            'price': self.format(change['price']),
+            'percent': self.format(change['percent'], is_percentage=True),
+        })
 
     def get_hashtags(self):
         hashtags = ''
@@ -63,16 +86,41 @@ class MessageGenerator:
         return hashtags
 
     def get_comparisons_messages(self, comparisons):
-        message = ''
-        for comparison in comparisons:
-            message += self.create_comparison_message(comparison)
-        return message
+        return ''.join(map(self.create_comparison_message, comparisons))
 
     def create_message(self, price, comparisons):
-        formatted_price = self.format(price)
+        return TEMPLATES.render('coin_update', {
+            'code': self.coin_code,
+            'price': self.format(price),
+            'comparisons': self.get_comparisons_messages(comparisons),
+            'hashtags': self.get_hashtags(),
+        }, TWITTER)
+
+
+def create_basket_messages(generators, comparisons_generator, fetch=fetch_prices):
+    """
+    Build one update message per coin from a single batched ticker fetch.
+
+    Call comparisons_generator.set_last_tweet_price(price, coin_code) once a
+    message has been posted.
 
-        message = f"The ${self.coin_code} price is at ${formatted_price} right now.\n"
-        message += self.get_comparisons_messages(comparisons)
-        message += f"\n{self.get_hashtags()}"
+    Args:
+        generators (iterable of MessageGenerator): One per coin in the basket.
+        comparisons_generator (ComparisonsGenerator): Holds each coin's last tweeted price.
+        fetch (callable, optional): Returns tickers keyed by symbol, like app.fetcher.fetch_prices.
 
-        return message
+    Returns:
+        dict: (message, price) keyed by coin code; coins whose ticker could not be fetched are left out.
+    """
+    generators = list(generators)
+    tickers = fetch([generator.coin_code for generator in generators])
+    messages = {}
+    for generator in generators:
+        ticker = tickers.get(generator.coin_code)
+        if ticker is None:
+            continue
+        price = float(ticker['last'])
+        last_day_price = float(ticker.get('open_24') or ticker.get('open') or price)
+        comparisons = comparisons_generator.get_comparisons(price, last_day_price, generator.coin_code)
+        messages[generator.coin_code] = (generator.create_message(price, comparisons), price)
+    return messages
@@ -1,24 +1,111 @@
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
-def fetch_xrp_price():
-    """Fetch the current XRP price from Bitstamp API"""
-    url = "https://www.bitstamp.net/api/v2/ticker/xrpusd/"
+from metrics import Timer
+
+TICKER_URL = "https://www.bitstamp.net/api/v2/ticker/{pair}/"
+# Every pair's ticker in one response, each with a "pair" key such as "XRP/USD"
+ALL_TICKERS_URL = "https://www.bitstamp.net/api/v2/ticker/"
+
+# Concurrent requests when the all-tickers endpoint is unavailable
+MAX_TICKER_WORKERS = 8
+
+
+def currency_pair(symbol, quote='usd'):
+    """The Bitstamp pair name of a symbol, e.g. 'XRP' -> 'xrpusd'."""
+    return f"{symbol}{quote}".lower()
+
+
+def _valid_ticker(data):
+    try:
+        float(data['last'])
+        return True
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+@Timer('bitstamp_ticker', failed=lambda result: result is None)
+def fetch_ticker(pair):
+    """
+    Fetch one pair's ticker from the Bitstamp API.
+
+    Args:
+        pair (str): The Bitstamp pair, e.g. 'xrpusd'.
+
+    Returns:
+        dict or None: The ticker JSON, or None if the request failed or the price is invalid.
+    """
+    url = TICKER_URL.format(pair=pair)
     try:
         response = requests.get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
-        if 'last' not in data:
-            logging.error("Key 'last' not found in response data.")
-            return None
-        return data
     except requests.Timeout:
-        logging.error("Request timed out while fetching XRP price.")
+        logging.error(f"Request timed out while fetching the {pair} ticker.")
+        return None
     except requests.RequestException as e:
-        logging.error(f"RequestException while fetching XRP price: {e}")
+        logging.error(f"RequestException while fetching the {pair} ticker: {e}")
+        return None
     except ValueError as e:
         logging.error(f"JSON decoding failed: {e}")
-    if not isinstance(data.get('last'), str) or not data['last'].replace('.', '', 1).isdigit():
-        logging.error("Invalid 'last' price format in response data.")
+        return None
+    if not _valid_ticker(data):
+        logging.error(f"Missing or invalid 'last' price in the {pair} ticker.")
         return None
     return data
+
+
+def fetch_xrp_price():
+    """Fetch the current XRP price from Bitstamp API"""
+    return fetch_ticker('xrpusd')
+
+
+@Timer('bitstamp_all_tickers', failed=lambda result: result is None)
+def fetch_all_tickers():
+    """
+    Fetch the tickers of every Bitstamp pair in one request.
+
+    Returns:
+        dict or None: Tickers keyed by pair (e.g., 'xrpusd'), or None if the request failed.
+    """
+    try:
+        response = requests.get(ALL_TICKERS_URL, timeout=10)
+        response.raise_for_status()
+        return {ticker['pair'].replace('/', '').lower(): ticker for ticker in response.json()}
+    except requests.RequestException as e:
+        logging.warning(f"All-tickers request failed: {e}")
+    except (ValueError, TypeError, KeyError) as e:
+        logging.warning(f"Unexpected all-tickers response: {type(e).__name__} - {e}")
+    return None
+
+
+def fetch_prices(symbols, quote='usd', max_workers=MAX_TICKER_WORKERS):
+    """
+    Fetch the tickers of many symbols in one pass.
+
+    Uses the all-tickers endpoint; pairs it does not return (or all of them, if
+    it fails) are fetched with concurrent per-pair requests.
+
+    Args:
+        symbols (iterable of str): The symbols, e.g. ['XRP', 'BTC'].
+        quote (str): The quote currency.
+        max_workers (int): Maximum concurrent per-pair requests.
+
+    Returns:
+        dict: Ticker JSON keyed by symbol; symbols that could not be fetched are left out.
+    """
+    pairs = {symbol: currency_pair(symbol, quote) for symbol in symbols}
+    all_tickers = fetch_all_tickers() or {}
+    tickers = {
+        symbol: all_tickers[pair] for symbol, pair in pairs.items()
+        if pair in all_tickers and _valid_ticker(all_tickers[pair])
+    }
+
+    missing = [symbol for symbol in pairs if symbol not in tickers]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+            for symbol, data in zip(missing, executor.map(fetch_ticker, [pairs[s] for s in missing])):
+                if data is not None:
+                    tickers[symbol] = data
+    return tickers
@@ -0,0 +1,240 @@
+import re
+import string
+from datetime import datetime
+
+# Locale used when a template or time format has no entry for the requested one
+DEFAULT_LOCALE = 'en'
+
+# strftime format of the `now` field, per locale
+TIME_FORMATS = {
+    'en': '%Y-%m-%d %H:%M:%S',
+}
+
+# Tweets are limited to 280 weighted characters (see twitter_length)
+TWITTER_MAX_LENGTH = 280
+
+# Characters that start an entity in Telegram's (legacy) Markdown parse mode
+_MARKDOWN_ESCAPES = str.maketrans({char: '\\' + char for char in '_*`['})
+
+# Characters Twitter counts twice: all but Latin, punctuation and a few other ranges (so emoji, CJK, ...)
+_TWITTER_HEAVY = re.compile('[^\u0000-\u10ff\u2000-\u200d\u2010-\u201f\u2032-\u2037]')
+
+
+def escape_markdown(text):
+    """Escape text for a Telegram message sent with parse_mode='Markdown'."""
+    return text.translate(_MARKDOWN_ESCAPES)
+
+
+def twitter_length(text):
+    """The length of text as Twitter counts it against TWITTER_MAX_LENGTH."""
+    if text.isascii():
+        return len(text)
+    return len(text) + len(_TWITTER_HEAVY.findall(text))
+
+
+def fit_to_length(text, max_length, length=len):
+    """
+    Shorten text to max_length, keeping its first and last lines.
+
+    Lines before the last one (e.g., the hashtags) are dropped from the end
+    until the text fits; if the first and last lines alone are too long, the
+    text is cut and ends with an ellipsis.
+
+    Args:
+        text (str): The rendered message.
+        max_length (int): The maximum length.
+        length (callable): Measures a string. Defaults to len.
+
+    Returns:
+        str: text, or a shortened version of it.
+    """
+    if length(text) <= max_length:
+        return text
+    lines = text.split('\n')
+    while len(lines) > 2:
+        del lines[-2]
+        text = '\n'.join(lines)
+        if length(text) <= max_length:
+            return text
+    text = text[:max_length - 1]  # Both measures count a character as at least one
+    while length(text) > max_length - 1:
+        text = text[:-1]
+    return text + '…'
+
+
+class TimestampFormatter:
+    """strftime with the last result cached, since the messages of one cycle share their time."""
+
+    __slots__ = ('time_format', '_last')
+
+    def __init__(self, time_format):
+        self.time_format = time_format
+        self._last = (None, None)
+
+    def __call__(self, moment):
+        moment = moment.replace(microsecond=0) if moment.microsecond else moment
+        last_moment, last_text = self._last
+        if moment == last_moment:
+            return last_text
+        text = moment.strftime(self.time_format)
+        self._last = (moment, text)
+        return text
+
+
+class Channel:
+    """
+    Where a message goes: how string fields are escaped and how long the message may be.
+
+    length must never exceed a message's UTF-8 size (len and twitter_length
+    don't), so messages under max_length bytes skip measuring.
+    """
+
+    __slots__ = ('name', 'escape', 'max_length', 'length')
+
+    def __init__(self, name, escape=None, max_length=None, length=len):
+        self.name = name
+        self.escape = escape
+        self.max_length = max_length
+        self.length = length
+
+    def __repr__(self):
+        return f"Channel({self.name!r})"
+
+
+PLAIN = Channel('plain')
+TWITTER = Channel('twitter', max_length=TWITTER_MAX_LENGTH, length=twitter_length)
+TELEGRAM = Channel('telegram', escape=escape_markdown, max_length=4096)
+
+
+class MessageTemplate:
+    """
+    A str.format-style layout compiled once into a function.
+
+    The layout is parsed when the template is created and turned into a
+    single f-string over the context, so rendering costs the same as the
+    hand-written f-strings it replaces. Fields must be plain names, with an
+    optional conversion and format spec (e.g., "{price:.5f}", "{intro!s}").
+    """
+
+    __slots__ = ('name', 'layout', 'fields', '_render')
+
+    def __init__(self, layout, name=None):
+        """
+        Compile a layout.
+
+        Args:
+            layout (str): The message layout, e.g. "Price: ${price:.2f}\\nTime: {now}".
+            name (str, optional): The template name, used in error messages.
+
+        Raises:
+            ValueError: If the layout uses a field this compiler does not support.
+        """
+        self.name = name
+        self.layout = layout
+        literals = []
+        parts = []
+        fields = []
+        for literal, field, spec, conversion in string.Formatter().parse(layout):
+            if literal:
+                parts.append(f"{{_l[{len(literals)}]}}")
+                literals.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Template {name!r}: unsupported field {{{field}}}")
+            if any(char in spec for char in '{}"\\'):
+                raise ValueError(f"Template {name!r}: unsupported format spec in {{{field}:{spec}}}")
+            fields.append(field)
+            parts.append(
+                f"{{_c[{field!r}]"
+                f"{'!' + conversion if conversion else ''}"
+                f"{':' + spec if spec else ''}}}"
+            )
+        self.fields = tuple(dict.fromkeys(fields))
+        body = ''.join(parts)
+        source = f'lambda _c, _l={tuple(literals)!r}: f"{body}"'
+        self._render = eval(compile(source, f"<template {name or layout[:20]!r}>", 'eval'), {})
+
+    def render(self, context):
+        """
+        Render the template.
+
+        Args:
+            context (dict): A value for every field; extra keys are ignored.
+
+        Returns:
+            str: The message.
+
+        Raises:
+            KeyError: If a field is missing from the context.
+        """
+        return self._render(context)
+
+
+class TemplateRegistry:
+    """
+    Named message templates per locale, rendered for a channel.
+
+    Templates are compiled when registered. A locale without its own version
+    of a template falls back to DEFAULT_LOCALE. A `now` datetime in the context
+    is shown in the locale's TIME_FORMATS format, through a cached formatter.
+    """
+
+    def __init__(self):
+        self.templates = {}
+        self.formatters = {}
+
+    def register(self, name, layout, locale=DEFAULT_LOCALE):
+        """Compile and register a layout under a name; returns the template."""
+        template = MessageTemplate(layout, name)
+        self.templates[(name, locale)] = template
+        return template
+
+    def get(self, name, locale=DEFAULT_LOCALE):
+        """
+        Return the template for a locale, falling back to DEFAULT_LOCALE.
+
+        Raises:
+            KeyError: If the template is not registered.
+        """
+        template = self.templates.get((name, locale))
+        if template is None:
+            template = self.templates[(name, DEFAULT_LOCALE)]
+        return template
+
+    def format_time(self, moment, locale=DEFAULT_LOCALE):
+        """Format a datetime in a locale's time format."""
+        formatter = self.formatters.get(locale)
+        if formatter is None:
+            formatter = self.formatters[locale] = TimestampFormatter(
+                TIME_FORMATS.get(locale, TIME_FORMATS[DEFAULT_LOCALE])
+            )
+        return formatter(moment)
+
+    def render(self, name, context, channel=PLAIN, locale=DEFAULT_LOCALE):
+        """
+        Render a registered template.
+
+        Args:
+            name (str): The template name.
+            context (dict): The field values. The dict is not modified.
+            channel (Channel): PLAIN, TWITTER or TELEGRAM.
+            locale (str): The locale, e.g. 'en'.
+
+        Returns:
+            str: The message, escaped and shortened for the channel.
+        """
+        template = self.get(name, locale)
+        now = context.get('now')
+        if isinstance(now, datetime):
+            context = dict(context, now=self.format_time(now, locale))
+        if channel.escape is not None:
+            escape = channel.escape
+            context = {key: escape(value) if isinstance(value, str) else value for key, value in context.items()}
+        message = template.render(context)
+        if channel.max_length is not None and len(message.encode('utf-8')) > channel.max_length:
+            message = fit_to_length(message, channel.max_length, channel.length)
+        return message
+
+
+TEMPLATES = TemplateRegistry()
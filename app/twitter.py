@@ -3,6 +3,8 @@ import tweepy.errors
 import logging
 import time
 
+from metrics import Timer
+
 def get_twitter_client(api_key, api_secret, access_token, access_token_secret):
     """Get Twitter client"""
     client = tweepy.Client(
@@ -19,6 +21,7 @@ def get_twitter_api(api_key, api_secret, access_token, access_token_secret):
     api = tweepy.API(auth)
     return api
 
+@Timer('twitter_media_upload', failed=lambda result: result is None)
 def upload_media(api, filename):
     """Upload media to Twitter and return media_id"""
     try:
@@ -31,6 +34,7 @@ def upload_media(api, filename):
         logging.error(f"Unexpected error during media upload: {e}")
         return None
 
+@Timer('twitter_post', failed=lambda result: result is None)
 def post_tweet(client, tweet_text, media_id=None):
     """Post the tweet using Twitter API v2"""
     try:
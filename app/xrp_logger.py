@@ -1,17 +1,13 @@
 import logging
 
-logging.basicConfig(
-    filename='xrp_bot.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Handlers are configured once per process by the entry point (see logging_setup.py)
+logger = logging.getLogger('xrp_bot')
 
 def log_info(message):
-    logging.info(message)
+    logger.info(message)
 
 def log_warning(message):
-    logging.warning(message)
+    logger.warning(message)
 
 def log_error(message):
-    logging.error(message)
+    logger.error(message)
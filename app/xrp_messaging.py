@@ -8,15 +8,55 @@ from io import BytesIO
 
 from PIL import Image  # Ensure Pillow is installed
 import requests
-import pandas as pd
-import mplfinance as mpf
-import matplotlib.pyplot as plt
 
+from app.templates import TEMPLATES, TWITTER
 from app.xrp_logger import log_info
+from chart_service import CHART_SERVICE
 
 # Constants
 ALL_TIME_HIGH_PRICE = 3.65  # Update this value as per your requirements
 
+TEMPLATES.register('xrp_all_time_high', (
+    "🚀🔥 $XRP just smashed through its all-time high, now trading at an unbelievable ${price:.2f}! 🚀🔥\n"
+    "Can you feel the excitement? 📈\n"
+    "Time: {now}\n"
+    "#Ripple #XRP #XRPATH #ToTheMoon"
+))
+TEMPLATES.register('xrp_volatility', (
+    "⚡️ $XRP is experiencing volatility! It's {direction} by {percent:.2f}% to ${price:.2f} {emoji}\n"
+    "Time: {now}\n"
+    "#Ripple #XRP #XRPVolatility"
+))
+TEMPLATES.register('xrp_unchanged', (
+    "🔔❗️ $XRP has retained a value of ${price:.2f} over the last hour.\n"
+    "Time: {now}\n"
+    "#Ripple #XRP #XRPPriceAlerts"
+))
+TEMPLATES.register('xrp_up', (
+    "🔔📈 $XRP is UP {percent:.2f}% over the last hour to ${price:.2f}!\n"
+    "Time: {now}\n"
+    "#Ripple #XRP #XRPPriceAlerts"
+))
+TEMPLATES.register('xrp_down', (
+    "🔔📉 $XRP is DOWN -{percent:.2f}% over the last hour to ${price:.2f}!\n"
+    "Time: {now}\n"
+    "#Ripple #XRP #XRPPriceAlerts"
+))
+TEMPLATES.register('xrp_daily_summary', (
+    "📊 Daily Recap: Today's $XRP traded between a low of ${low:.5f} and a high of ${high:.5f}.\n"
+    "What's next for XRP? Stay tuned! 📈💥\n"
+    "Time: {now}\n"
+    "#Ripple #XRP #XRPPriceAlerts"
+))
+TEMPLATES.register('xrp_3_hour_summary', (
+    "🔔🕒 3-Hour XRP Update: Price has changed by {percent:+.2f}%.\n"
+    "Support level at: ${support:.5f}\n"
+    "Resistance level at: ${resistance:.5f}\n"
+    "Current Price: ${price:.5f}\n"
+    "Time: {now}\n"
+    "#Ripple #XRP #XRPPriceAlerts"
+))
+
 
 def get_percent_change(old_price, new_price):
     """Calculate the percentage change between two prices."""
@@ -26,7 +66,7 @@ def get_percent_change(old_price, new_price):
         return 0
 
 
-def generate_message(last_price, current_price, is_volatility_alert=False):
+def generate_message(last_price, current_price, is_volatility_alert=False, now=None):
     """
     Generate a tweet message based on price movements.
 
@@ -34,205 +74,75 @@ def generate_message(last_price, current_price, is_volatility_alert=False):
         last_price (float): The previous price.
         current_price (float): The current price.
         is_volatility_alert (bool): Flag to indicate if this is a volatility alert.
+        now (datetime, optional): The time shown in the message. Defaults to the current time.
 
     Returns:
         str: The generated tweet message.
     """
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    now = now or datetime.now()
     percent_change = get_percent_change(last_price, current_price)
 
     log_info(f"Generating message: last_price={last_price}, current_price={current_price}, percent_change={percent_change:.2f}%")
 
+    context = {'price': current_price, 'percent': abs(percent_change), 'now': now}
     if current_price > ALL_TIME_HIGH_PRICE:
-        return (
-            f"🚀🔥 $XRP just smashed through its all-time high, now trading at an unbelievable ${current_price:.2f}! 🚀🔥\n"
-            f"Can you feel the excitement? 📈\n"
-            f"Time: {timestamp}\n"
-            f"#Ripple #XRP #XRPATH #ToTheMoon"
-        )
+        name = 'xrp_all_time_high'
     elif is_volatility_alert:
-        direction = "UP" if current_price > last_price else "DOWN"
-        emoji = "📈" if direction == "UP" else "📉"
-        return f"⚡️ $XRP is experiencing volatility! It's {direction} by {abs(percent_change):.2f}% to ${current_price:.2f} {emoji}\nTime: {timestamp}\n#Ripple #XRP #XRPVolatility"
+        name = 'xrp_volatility'
+        context['direction'] = "UP" if current_price > last_price else "DOWN"
+        context['emoji'] = "📈" if current_price > last_price else "📉"
     elif current_price == last_price:
-        return f"🔔❗️ $XRP has retained a value of ${current_price:.2f} over the last hour.\nTime: {timestamp}\n#Ripple #XRP #XRPPriceAlerts"
+        name = 'xrp_unchanged'
     elif current_price > last_price:
-        return f"🔔📈 $XRP is UP {percent_change:.2f}% over the last hour to ${current_price:.2f}!\nTime: {timestamp}\n#Ripple #XRP #XRPPriceAlerts"
+        name = 'xrp_up'
     else:
-        return f"🔔📉 $XRP is DOWN -{abs(percent_change):.2f}% over the last hour to ${current_price:.2f}!\nTime: {timestamp}\n#Ripple #XRP #XRPPriceAlerts"
+        name = 'xrp_down'
+    return TEMPLATES.render(name, context, TWITTER)
 
 
-def generate_daily_summary_message(daily_high, daily_low):
+def generate_daily_summary_message(daily_high, daily_low, now=None):
     """
     Generate a daily summary tweet message.
 
     Args:
         daily_high (float): The highest price of the day.
         daily_low (float): The lowest price of the day.
+        now (datetime, optional): The time shown in the message. Defaults to the current time.
 
     Returns:
         str or None: The generated daily summary message or None if data is insufficient.
     """
     if daily_high is not None and daily_low is not None:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        return (
-            f"📊 Daily Recap: Today's $XRP traded between a low of ${daily_low:.5f} and a high of ${daily_high:.5f}.\n"
-            f"What's next for XRP? Stay tuned! 📈💥\n"
-            f"Time: {timestamp}\n"
-            f"#Ripple #XRP #XRPPriceAlerts"
-        )
+        context = {'low': daily_low, 'high': daily_high, 'now': now or datetime.now()}
+        return TEMPLATES.render('xrp_daily_summary', context, TWITTER)
     return None
 
 
-def generate_xrp_chart(rapidapi_key=None, db_handler=None):
+def generate_xrp_chart(rapidapi_key=None, db_handler=None, now=None):
     """
-    Generate and save the XRP candlestick chart using data from the database.
+    Generate and save the XRP 3-hour candlestick chart using data from the database.
+
+    Rendered through the shared chart service, so repeated calls within one
+    15-minute bar reuse the cached image.
 
     Args:
         rapidapi_key (str): Not used anymore, kept for backward compatibility.
         db_handler (DatabaseHandler): The database handler instance.
+        now (datetime, optional): The end of the chart window. Defaults to the current time.
 
     Returns:
         str or None: The filename of the saved chart or None if failed.
     """
-    try:
-        if db_handler is None:
-            logging.error("Database handler is required for chart generation.")
-            return None
-
-        # Calculate the time 3 hours ago
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=3)
-
-        # Query the database for XRP price data in the last 3 hours
-        query = """
-            SELECT timestamp, last_price, volume
-            FROM crypto_prices
-            WHERE symbol = 'XRP' AND timestamp >= %(start_time)s
-            ORDER BY timestamp ASC;
-        """
-        params = {'start_time': start_time}
-        data = db_handler.fetch_all(query, params)
-
-        if not data:
-            logging.warning("No XRP data available for the last 3 hours.")
-            return None
-
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df.set_index('timestamp', inplace=True)
-
-        # Use last_price for OHLC resampling
-        df['price'] = pd.to_numeric(df['last_price'], errors='coerce')
-        df['volume'] = pd.to_numeric(df['volume'], errors='coerce')
-
-        # 🎯 Proper OHLC construction (based on real price action)
-        ohlc = df['price'].resample('15min').ohlc()
-        ohlc['volume'] = df['volume'].resample('15min').sum()
-        ohlc.dropna(inplace=True)
-
-        # 📈 Calculate Moving Averages
-        ohlc['SMA_5'] = ohlc['close'].rolling(window=5).mean()
-        ohlc['EMA_21'] = ohlc['close'].ewm(span=21, adjust=False).mean()
-
-        # 🟠 Overlay EMA as a custom addplot
-        ema_21_plot = mpf.make_addplot(
-            ohlc['EMA_21'],
-            color='orange',
-            width=1.2,
-            linestyle='--'
-        )
-
-        # Create and save chart
-        chart_filename = f"xrp_candlestick_chart_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-
-        # 🎨 Custom dark style
-        custom_style = mpf.make_mpf_style(
-            base_mpf_style='nightclouds',
-            rc={
-                "axes.labelcolor": "white",
-                "xtick.color": "white",
-                "ytick.color": "white",
-            },
-            marketcolors=mpf.make_marketcolors(
-                up='green',
-                down='red',
-                edge='inherit',
-                wick='inherit',
-                volume='inherit',
-                ohlc='inherit',
-            )
-        )
-
-        # 🔹 Manually create both overlays for full control
-        sma_5_plot = mpf.make_addplot(
-            ohlc['SMA_5'],
-            color='cyan',
-            width=1.2,
-            linestyle='-'
-        )
-
-        ema_21_plot = mpf.make_addplot(
-            ohlc['EMA_21'],
-            color='orange',
-            width=1.2,
-            linestyle='--'
-        )
-
-        # 🧠 Plot with full matplotlib access
-        fig, axlist = mpf.plot(
-            ohlc,
-            type='candle',
-            style=custom_style,
-            title='XRP/USDT 3-Hour Price Movement',
-            ylabel='Price (USDT)',
-            volume=False,
-            addplot=[sma_5_plot, ema_21_plot],  # Both overlays added manually
-            returnfig=True
-        )
-
-        # 🎯 Get the plot handles for legend
-        price_ax = axlist[0]
-        sma_line = price_ax.lines[-2]  # Second last added line (SMA-5)
-        ema_line = price_ax.lines[-1]  # Last added line (EMA-21)
-
-        # 🏷️ Add accurate legend with correct colour + style
-        price_ax.legend(
-            [sma_line, ema_line],
-            ['SMA-5 (cyan)', 'EMA-21 (orange dashed)'],
-            loc='upper left',
-            fontsize=8,
-            facecolor='#111111',
-            labelcolor='white',
-            edgecolor='white'
-        )
-
-        # 💧 Add watermark
-        price_ax.text(
-            1.0, -0.12,
-            '@xrppricealerts',
-            transform=price_ax.transAxes,
-            ha='right',
-            va='top',
-            fontsize=8,
-            color='gray',
-            alpha=0.7
-        )
-
-        # 💾 Save chart
-        fig.savefig(chart_filename, bbox_inches='tight')
-        plt.close(fig)
+    if db_handler is None:
+        logging.error("Database handler is required for chart generation.")
+        return None
 
+    chart_filename = CHART_SERVICE.save(db_handler, 'XRP', '3h', now)
+    if chart_filename:
         logging.info(f"Chart saved as '{chart_filename}'.")
-        return chart_filename
-
-    except Exception as e:
-        logging.error(f"An error occurred while generating the chart: {type(e).__name__} - {e}")
-
-    return None
+    return chart_filename
 
-def generate_3_hour_summary(db_handler, current_price, rapidapi_key=None):
+def generate_3_hour_summary(db_handler, current_price, rapidapi_key=None, now=None, render_chart=True):
     """
     Generate a 3-hour summary based on the price data stored in the database and save the chart.
 
@@ -240,13 +150,15 @@ def generate_3_hour_summary(db_handler, current_price, rapidapi_key=None):
         db_handler (DatabaseHandler): The database handler instance.
         current_price (float): The current price of XRP.
         rapidapi_key (str): Not used anymore, kept for backward compatibility.
+        now (datetime, optional): The end of the summary window. Defaults to the current time.
+        render_chart (bool): Whether to render the chart; if False the chart filename is None.
 
     Returns:
         tuple or (None, None): The summary text and chart filename or (None, None) if failed.
     """
     try:
         # Calculate the time 3 hours ago
-        end_time = datetime.now()
+        end_time = now or datetime.now()
         start_time = end_time - timedelta(hours=3)
 
         # Query the database for XRP price data in the last 3 hours
@@ -274,16 +186,13 @@ def generate_3_hour_summary(db_handler, current_price, rapidapi_key=None):
         percent_change = get_percent_change(three_hours_ago_price, current_price)
 
         # Generate the summary text
-        summary_text = (
-            f"🔔🕒 3-Hour XRP Update: Price has changed by {percent_change:+.2f}%.\n"
-            f"Support level at: ${support:.5f}\n"
-            f"Resistance level at: ${resistance:.5f}\n"
-            f"Current Price: ${current_price:.5f}\nTime: {end_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"#Ripple #XRP #XRPPriceAlerts"
-        )
+        summary_text = TEMPLATES.render('xrp_3_hour_summary', {
+            'percent': percent_change, 'support': support, 'resistance': resistance,
+            'price': current_price, 'now': end_time,
+        }, TWITTER)
 
         # Generate the chart using data from the database
-        chart_filename = generate_xrp_chart(rapidapi_key, db_handler)
+        chart_filename = generate_xrp_chart(rapidapi_key, db_handler, now) if render_chart else None
 
         return summary_text, chart_filename
 
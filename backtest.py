@@ -0,0 +1,313 @@
+# backtest.py
+
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD  # Import DB credentials
+from backtest_results import BacktestResult
+from indicators import rolling_vwap, traded_volumes
+from records import TickBatch, Trade
+from strategy import LOSS_COOLDOWN, SELL, VwapStrategy
+
+
+def price_volatility(prices):
+    """Sample standard deviation of tick-to-tick price changes, or NaN for fewer than three prices."""
+    prices = np.asarray(prices, dtype=np.float64)
+    price_change = prices[1:] / prices[:-1] - 1
+    price_change = price_change[~np.isnan(price_change)]
+    return price_change.std(ddof=1) if len(price_change) > 1 else np.nan
+
+
+def fill_prices(columns, fill_at_quotes=True, slippage_bps=0.0, latency=0.0):
+    """
+    Compute the price a buy and a sell would fill at on every tick, as array operations.
+
+    Args:
+        columns (dict): TickBatch.to_numpy() columns.
+        fill_at_quotes (bool): Buy at the ask and sell at the bid; ticks without a
+            quote fall back to the last price. Otherwise both fill at the last price.
+        slippage_bps (float): Adverse slippage in basis points, added to buys and taken off sells.
+        latency (float): Seconds between the signal and the order reaching the book; the
+            fill uses the first tick at or after signal time + latency (the last tick at the end).
+
+    Returns:
+        tuple of ndarray: (buy prices, sell prices), one per tick.
+    """
+    last_price = columns['last_price']
+    if fill_at_quotes:
+        buy = np.where(np.isnan(columns['ask']), last_price, columns['ask'])
+        sell = np.where(np.isnan(columns['bid']), last_price, columns['bid'])
+    else:
+        buy = sell = last_price
+
+    if latency > 0 and len(last_price):
+        timestamps = columns['timestamps']
+        filled = np.searchsorted(timestamps, timestamps + latency, side='left')
+        np.minimum(filled, len(timestamps) - 1, out=filled)
+        buy, sell = buy[filled], sell[filled]
+
+    slippage = slippage_bps / 10000
+    return buy * (1 + slippage), sell * (1 - slippage)
+
+
+def local_vwap(columns, window):
+    """
+    The VWAP the live bot computes itself for `window`.
+
+    Ticks are weighted by the volume traded since the previous tick, derived from
+    the stored 24h volumes by traded_volumes().
+
+    Args:
+        columns (dict): TickBatch.to_numpy() columns.
+        window (str or float): A VWAP_WINDOWS name, SESSION, or a length in seconds.
+
+    Returns:
+        ndarray: The VWAP per tick; ticks before any volume keep the stored ticker VWAP, as the bot does.
+    """
+    vwap = rolling_vwap(columns['timestamps'], columns['last_price'], traded_volumes(columns['volume']), window)
+    return np.where(np.isnan(vwap), columns['vwap'], vwap)
+
+
+class FeeSchedule:
+    """
+    Volume-tiered trading fees: the fee percentage falls as the trailing traded volume grows.
+
+    Tiers are (minimum trailing volume in USD, fee percentage) pairs, e.g.
+    [(0, 0.40), (10000, 0.30), (100000, 0.20)]. Volume counts both sides of
+    each trade over the last window_days.
+    """
+
+    def __init__(self, tiers, window_days=30):
+        self.tiers = sorted(tiers)
+        self.thresholds = [threshold for threshold, _ in self.tiers]
+        self.window = window_days * 24 * 60 * 60
+        self._fills = deque()
+        self.volume = 0.0
+
+    def record(self, time, value):
+        """Add a fill of the given USD value at time (epoch seconds)."""
+        self._fills.append((time, value))
+        self.volume += value
+
+    def fee_percentage(self, time):
+        """Return the fee tier for the volume traded in the window ending at time."""
+        while self._fills and self._fills[0][0] <= time - self.window:
+            self.volume -= self._fills.popleft()[1]
+        tier = bisect_right(self.thresholds, self.volume) - 1
+        return self.tiers[max(tier, 0)][1]
+
+
+class Backtest:
+    def __init__(self, initial_capital, overbought_threshold, oversold_threshold, stop_loss, take_profit, trailing_stop_loss, symbol='XRP', verbose=True,
+                 fee_percentage=0.0, loss_cooldown=LOSS_COOLDOWN, fee_tiers=None, fill_at_quotes=False,
+                 slippage_bps=0.0, latency=0.0, vwap_window=None):
+        self.initial_capital = initial_capital
+        self.overbought_threshold = overbought_threshold
+        self.oversold_threshold = oversold_threshold
+        self.stop_loss_threshold = stop_loss
+        self.take_profit_threshold = take_profit
+        self.trailing_stop_loss_percentage = trailing_stop_loss
+        self.fee_percentage = fee_percentage
+        self.loss_cooldown = loss_cooldown  # Seconds buy signals are ignored after a loss, as in the live bot
+        self.fee_tiers = fee_tiers  # (30-day volume, fee percentage) pairs; replaces fee_percentage when set
+        self.fill_at_quotes = fill_at_quotes  # Buy at the ask and sell at the bid instead of the last price
+        self.slippage_bps = slippage_bps
+        self.latency = latency  # Seconds from signal to fill
+        self.vwap_window = vwap_window  # Trade against local_vwap() instead of the stored ticker VWAP
+        self.symbol = symbol
+        self.verbose = verbose  # Print each signal; sweeps turn this off and read the BacktestResult
+        self.reset()
+
+    def reset(self):
+        # The same state machine the live TradingBot runs; thresholds are scaled on it, not here
+        self.strategy = VwapStrategy(
+            capital=self.initial_capital,
+            overbought_threshold=self.overbought_threshold,
+            oversold_threshold=self.oversold_threshold,
+            stop_loss=self.stop_loss_threshold,
+            take_profit=self.take_profit_threshold,
+            trailing_stop_loss=self.trailing_stop_loss_percentage,
+            fee_percentage=self.fee_percentage,
+            loss_cooldown=self.loss_cooldown,
+            symbol=self.symbol,
+        )
+        self.fee_schedule = FeeSchedule(self.fee_tiers) if self.fee_tiers else None
+        if self.fee_schedule:
+            self.strategy.fee_percentage = self.fee_schedule.fee_percentage(0.0)
+        self.total_trades = 0
+        self.total_profit_loss = 0.0
+        self.trades = []
+
+    @property
+    def capital(self):
+        return self.strategy.capital
+
+    @property
+    def in_position(self):
+        return self.strategy.position is not None
+
+    def print_buy(self, trade):
+        print(f"⚠️ Buy Signal Triggered: Bought at ${trade.entry_price:.5f} on {trade.entry_time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    def print_trade_summary(self, trade, capital):
+        print(f"🚨 Sell Signal Triggered: Sold at ${trade.exit_price:.5f} on {trade.exit_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"   Trade Result: Profit/Loss = ${trade.profit_loss:.2f}, Time Held = {trade.time_held}")
+        print(f"   Updated Capital: ${capital:.2f}\n")
+
+    def record_trade(self, trade):
+        if self.fee_schedule:
+            # The tier is re-evaluated after each round trip, for the next one
+            exit_time = trade.exit_time.timestamp()
+            self.fee_schedule.record(exit_time, trade.capital * (1 + trade.exit_price / trade.entry_price))
+            self.strategy.fee_percentage = self.fee_schedule.fee_percentage(exit_time)
+        self.trades.append(trade)
+        self.total_trades += 1
+        self.total_profit_loss += trade.profit_loss
+        if self.verbose:
+            self.print_buy(trade)
+            self.print_trade_summary(trade, trade.capital + trade.profit_loss)
+
+    def adjust_thresholds(self, batch, volatility=None):
+        if volatility is None:
+            volatility = price_volatility(batch.to_numpy()['last_price'])
+        self.strategy.set_volatility(float(volatility))
+
+    def process_tick(self, timestamp, price, vwap):
+        """Feed one tick (timestamp as a datetime) through the strategy."""
+        if self.strategy.on_tick(timestamp.timestamp(), price, vwap) & SELL:
+            self.record_trade(self.strategy.last_trade)
+
+    def process_row(self, row):
+        self.process_tick(row['timestamp'], row['last_price'], row['vwap'])
+
+    def parameters(self):
+        """Return the strategy parameters of this backtest (after volatility adjustment, once run)."""
+        return {
+            'overbought_threshold': float(self.strategy.overbought_threshold),
+            'oversold_threshold': float(self.strategy.oversold_threshold),
+            'stop_loss': self.stop_loss_threshold,
+            'take_profit': self.take_profit_threshold,
+            'trailing_stop_loss': self.trailing_stop_loss_percentage,
+            'fee_percentage': float(self.fee_percentage),
+            'loss_cooldown': float(self.loss_cooldown),
+            'fill_at_quotes': self.fill_at_quotes,
+            'slippage_bps': float(self.slippage_bps),
+            'latency': float(self.latency),
+            'vwap_window': self.vwap_window,
+        }
+
+    def run(self, data, volatility=None):
+        """
+        Run the strategy over a TickBatch or a DataFrame of timestamp/last_price/vwap rows.
+
+        Args:
+            data (TickBatch or DataFrame): The ticks to trade.
+            volatility (float, optional): Volatility used to widen the thresholds. Defaults to
+                the volatility of data itself, which looks ahead; walk-forward runs pass the
+                volatility of the preceding training window instead.
+
+        Signals are taken on the last price; with fill_at_quotes, slippage_bps or
+        latency set, fills are priced by fill_prices() for the whole batch up front. With
+        vwap_window set, the VWAP is computed from the batch's own traded volumes, so it warms
+        up from the first tick of data.
+
+        Returns:
+            BacktestResult: The trade ledger, equity curve and statistics.
+        """
+        batch = data if isinstance(data, TickBatch) else TickBatch.from_dataframe(data, self.symbol)
+        self.adjust_thresholds(batch, volatility)
+
+        columns = batch.to_numpy()
+        buy_prices = sell_prices = None
+        if self.fill_at_quotes or self.slippage_bps or self.latency:
+            buy_prices, sell_prices = fill_prices(columns, self.fill_at_quotes, self.slippage_bps, self.latency)
+        vwap = local_vwap(columns, self.vwap_window) if self.vwap_window else columns['vwap']
+        self.strategy.run(
+            columns['timestamps'], columns['last_price'], vwap, buy_prices, sell_prices,
+            on_trade=self.record_trade,
+        )
+
+        open_trade = None
+        if self.in_position:
+            strategy = self.strategy
+            open_trade = Trade(self.symbol, datetime.fromtimestamp(strategy.entry_time, tz=timezone.utc),
+                               strategy.entry_price, capital=strategy.capital, fees=strategy.entry_fee)
+        result = BacktestResult(
+            self.symbol, self.initial_capital, columns['timestamps'].copy(), columns['last_price'].copy(),
+            self.trades, open_trade=open_trade, parameters=self.parameters()
+        )
+        del columns, vwap  # Release the zero-copy views so the batch can grow again
+
+        if self.verbose:
+            print("Backtesting Complete")
+            print(f"Total Trades: {self.total_trades}")
+            print(f"Total Profit/Loss: ${self.total_profit_loss:.2f}")
+            print(f"Final Capital: ${self.capital:.2f}")
+        return result
+
+
+def fetch_data_from_db(symbol='XRP'):
+    """
+    Fetches price data for a symbol from the PostgreSQL database.
+    Returns a TickBatch.
+    """
+    # Create a connection string using the environmental variables from config.py
+    db_url = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+    # Create a connection to the database
+    engine = create_engine(db_url)
+
+    # SQL query to get the data from the database
+    query = """
+        SELECT timestamp, last_price, vwap, bid, ask, volume
+        FROM crypto_prices
+        WHERE symbol = %(symbol)s
+        ORDER BY timestamp ASC;
+    """
+
+    # Read data from the database into a DataFrame
+    df = pd.read_sql(query, con=engine, params={'symbol': symbol})
+
+    # Convert to contiguous float columns once, instead of carrying the DataFrame around
+    return TickBatch.from_dataframe(df, symbol)
+
+
+def main(symbol='XRP'):
+    # Define your initial thresholds and parameters
+    initial_capital = 12800
+    initial_overbought_threshold = 0.01
+    initial_oversold_threshold = -0.019
+    stop_loss_threshold = -0.02
+    take_profit_threshold = 0.015
+    trailing_stop_loss_percentage = 0.005  # 0.5% trailing stop loss
+
+    # Create the Backtest object with the specified parameters
+    backtest = Backtest(
+        initial_capital=initial_capital,
+        overbought_threshold=initial_overbought_threshold,
+        oversold_threshold=initial_oversold_threshold,
+        stop_loss=stop_loss_threshold,
+        take_profit=take_profit_threshold,
+        trailing_stop_loss=trailing_stop_loss_percentage,
+        symbol=symbol
+    )
+
+    # Fetch data from the database
+    batch = fetch_data_from_db(symbol)
+
+    # Run the backtest
+    result = backtest.run(batch)
+
+    stats = result.summary()
+    print(f"Max Drawdown: {stats['max_drawdown']:.2%}")
+    print(f"Sharpe Ratio: {stats['sharpe_ratio']:.2f}, Sortino Ratio: {stats['sortino_ratio']:.2f}")
+    print(f"Win Rate: {stats['win_rate']:.2%}, Time in Market: {stats['exposure_time']:.2%}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# backtest_results.py
+
+import logging
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+# Trade ledger columns, in export order
+TRADE_COLUMNS = (
+    'symbol', 'entry_time', 'entry_price', 'exit_time', 'exit_price',
+    'capital', 'fees', 'profit_loss', 'percent_change', 'time_held',
+)
+
+
+class BacktestResult:
+    """
+    The outcome of one backtest: the trade ledger, a per-tick equity curve and summary statistics.
+
+    The equity curve marks open positions to market at every tick (capital
+    scaled by price / entry price, as Backtest settles trades) and is built
+    from the ledger with array operations, so it costs a few passes over the
+    price column regardless of the number of trades.
+    """
+
+    def __init__(self, symbol, initial_capital, timestamps, prices, trades, open_trade=None, parameters=None):
+        """
+        Initialize the result.
+
+        Args:
+            symbol (str): The backtested symbol.
+            initial_capital (float): The starting capital.
+            timestamps (ndarray): Tick times as float epoch seconds (UTC), ascending.
+            prices (ndarray): Last price at each tick.
+            trades (list of Trade): The closed trades, in order.
+            open_trade (Trade, optional): The position still open at the last tick.
+            parameters (dict, optional): The strategy parameters, kept for comparing sweeps.
+        """
+        self.symbol = symbol
+        self.initial_capital = float(initial_capital)
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.trades = list(trades)
+        self.open_trade = open_trade
+        self.parameters = dict(parameters or {})
+        self._equity = None
+        self._in_position = None
+
+    def _tick_index(self, moments):
+        # Trade times come from the same timestamps; the tolerance absorbs datetime round-off
+        seconds = np.array([moment.timestamp() for moment in moments], dtype=np.float64)
+        return np.searchsorted(self.timestamps, seconds - 1e-3, side='left')
+
+    def _build_equity(self):
+        n = len(self.timestamps)
+        trades = self.trades + ([self.open_trade] if self.open_trade is not None else [])
+        if n == 0 or not trades:
+            self._equity = np.full(n, self.initial_capital)
+            self._in_position = np.zeros(n, dtype=bool)
+            return
+
+        entry_index = self._tick_index([trade.entry_time for trade in trades])
+        exit_index = self._tick_index([trade.exit_time for trade in self.trades])
+        if self.open_trade is not None:
+            exit_index = np.append(exit_index, n)
+        entry_price = np.array([trade.entry_price for trade in trades], dtype=np.float64)
+        entry_capital = np.array([trade.capital for trade in trades], dtype=np.float64)
+        closed_capital = np.array(
+            [trade.capital + trade.profit_loss for trade in self.trades], dtype=np.float64
+        )
+
+        ticks = np.arange(n)
+        # Realized capital: the settled capital of the last trade closed at or before each tick
+        closed_before = np.searchsorted(exit_index[:len(self.trades)], ticks, side='right')
+        realized = np.concatenate(([self.initial_capital], closed_capital))[closed_before]
+
+        # A position is held from its entry tick up to (not including) its exit tick
+        changes = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(changes, entry_index, 1)
+        np.add.at(changes, exit_index, -1)
+        in_position = np.cumsum(changes[:n]) > 0
+
+        current = np.clip(np.searchsorted(entry_index, ticks, side='right') - 1, 0, None)
+        marked = entry_capital[current] * self.prices / entry_price[current]
+        self._equity = np.where(in_position, marked, realized)
+        self._in_position = in_position
+
+    @property
+    def equity(self):
+        """Equity at every tick, as an ndarray."""
+        if self._equity is None:
+            self._build_equity()
+        return self._equity
+
+    @property
+    def in_position(self):
+        """Boolean ndarray, True at ticks where a position is held."""
+        if self._in_position is None:
+            self._build_equity()
+        return self._in_position
+
+    @property
+    def final_capital(self):
+        return self.trades[-1].capital + self.trades[-1].profit_loss if self.trades else self.initial_capital
+
+    @property
+    def total_profit_loss(self):
+        return float(sum(trade.profit_loss for trade in self.trades))
+
+    def drawdown(self):
+        """Drawdown from the running equity peak at every tick, as a non-positive fraction."""
+        equity = self.equity
+        if len(equity) == 0:
+            return equity
+        return equity / np.maximum.accumulate(equity) - 1
+
+    def max_drawdown(self):
+        drawdown = self.drawdown()
+        return float(drawdown.min()) if len(drawdown) else 0.0
+
+    def returns(self):
+        """Tick-to-tick returns of the equity curve."""
+        equity = self.equity
+        if len(equity) < 2:
+            return np.empty(0)
+        return np.diff(equity) / equity[:-1]
+
+    def periods_per_year(self):
+        """Ticks per year implied by the median spacing of the timestamps."""
+        if len(self.timestamps) < 2:
+            return 0.0
+        spacing = float(np.median(np.diff(self.timestamps)))
+        return SECONDS_PER_YEAR / spacing if spacing > 0 else 0.0
+
+    def sharpe_ratio(self):
+        """Annualized Sharpe ratio of the tick returns (zero risk-free rate), or NaN if undefined."""
+        returns = self.returns()
+        if len(returns) < 2:
+            return math.nan
+        deviation = returns.std(ddof=1)
+        if deviation == 0:
+            return math.nan
+        return float(returns.mean() / deviation * math.sqrt(self.periods_per_year()))
+
+    def sortino_ratio(self):
+        """Annualized Sortino ratio (downside deviation below zero), or NaN if undefined."""
+        returns = self.returns()
+        if len(returns) < 2:
+            return math.nan
+        downside = math.sqrt(float(np.mean(np.minimum(returns, 0.0) ** 2)))
+        if downside == 0:
+            return math.nan
+        return float(returns.mean() / downside * math.sqrt(self.periods_per_year()))
+
+    def win_rate(self):
+        """Share of closed trades with a positive profit, or NaN without trades."""
+        if not self.trades:
+            return math.nan
+        profits = np.array([trade.profit_loss for trade in self.trades], dtype=np.float64)
+        return float(np.count_nonzero(profits > 0) / len(profits))
+
+    def exposure_time(self):
+        """Share of the backtested time spent in a position."""
+        if len(self.timestamps) < 2:
+            return 0.0
+        spans = np.diff(self.timestamps)
+        total = spans.sum()
+        return float(spans[self.in_position[:-1]].sum() / total) if total > 0 else 0.0
+
+    def summary(self):
+        """
+        Return the headline statistics.
+
+        Returns:
+            dict: Parameters plus trade count, P/L, returns, drawdown and risk ratios.
+        """
+        held = [trade.time_held.total_seconds() for trade in self.trades]
+        stats = dict(self.parameters)
+        stats.update({
+            'symbol': self.symbol,
+            'ticks': len(self.timestamps),
+            'total_trades': len(self.trades),
+            'total_profit_loss': self.total_profit_loss,
+            'initial_capital': self.initial_capital,
+            'final_capital': self.final_capital,
+            'total_return': self.final_capital / self.initial_capital - 1,
+            'max_drawdown': self.max_drawdown(),
+            'sharpe_ratio': self.sharpe_ratio(),
+            'sortino_ratio': self.sortino_ratio(),
+            'win_rate': self.win_rate(),
+            'exposure_time': self.exposure_time(),
+            'average_time_held_seconds': float(np.mean(held)) if held else math.nan,
+            'open_position': self.open_trade is not None,
+        })
+        return stats
+
+    def trades_frame(self):
+        """The trade ledger as a DataFrame with TRADE_COLUMNS."""
+        rows = [
+            (trade.symbol, trade.entry_time, trade.entry_price, trade.exit_time, trade.exit_price,
+             trade.capital, trade.fees, trade.profit_loss, trade.percent_change, trade.time_held)
+            for trade in self.trades
+        ]
+        return pd.DataFrame(rows, columns=list(TRADE_COLUMNS))
+
+    def equity_frame(self):
+        """The equity curve as a DataFrame (timestamp, price, equity, drawdown, in_position)."""
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(self.timestamps, unit='s', utc=True),
+            'price': self.prices,
+            'equity': self.equity,
+            'drawdown': self.drawdown(),
+            'in_position': self.in_position,
+        })
+
+    def _export(self, prefix, extension, write):
+        paths = {
+            'trades': f"{prefix}_trades.{extension}",
+            'equity': f"{prefix}_equity.{extension}",
+            'summary': f"{prefix}_summary.{extension}",
+        }
+        os.makedirs(os.path.dirname(prefix) or '.', exist_ok=True)
+        try:
+            write(self.trades_frame(), paths['trades'])
+            write(self.equity_frame(), paths['equity'])
+            write(pd.DataFrame([self.summary()]), paths['summary'])
+        except (OSError, ImportError, ValueError) as e:
+            logger.error(f"Failed to export backtest results to {prefix}_*.{extension}: {e}")
+            return None
+        return paths
+
+    def to_csv(self, prefix):
+        """
+        Write the trade ledger, equity curve and summary as <prefix>_{trades,equity,summary}.csv.
+
+        Returns:
+            dict or None: The written paths, or None if the export failed.
+        """
+        return self._export(prefix, 'csv', lambda frame, path: frame.to_csv(path, index=False))
+
+    def to_parquet(self, prefix):
+        """
+        Write the trade ledger, equity curve and summary as Parquet files (requires pyarrow or fastparquet).
+
+        Returns:
+            dict or None: The written paths, or None if the export failed.
+        """
+        return self._export(prefix, 'parquet', lambda frame, path: frame.to_parquet(path, index=False))
+
+
+def compare_results(results):
+    """
+    Tabulate the summaries of many backtests, e.g. a parameter sweep.
+
+    Args:
+        results (iterable of BacktestResult): The results to compare.
+
+    Returns:
+        DataFrame: One row per result, sorted by total return (best first).
+    """
+    frame = pd.DataFrame([result.summary() for result in results])
+    if frame.empty:
+        return frame
+    return frame.sort_values('total_return', ascending=False, ignore_index=True)
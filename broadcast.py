@@ -0,0 +1,345 @@
+# broadcast.py
+
+import hashlib
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from config import (
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_BROADCAST_RATE,
+    TELEGRAM_BROADCAST_WORKERS,
+    TELEGRAM_CHAT_ID,
+)
+from database_handler import DatabaseHandler
+from metrics import METRIC_PREFIX, REGISTRY, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+CREATE_SUBSCRIBERS_TABLE = """
+    CREATE TABLE IF NOT EXISTS telegram_subscribers (
+        chat_id BIGINT PRIMARY KEY,
+        active BOOLEAN NOT NULL DEFAULT TRUE,
+        subscribed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+"""
+
+# Telegram allows about one message per second to the same chat
+PER_CHAT_INTERVAL = 1.0
+
+# Attempts per recipient before a delivery is given up
+MAX_ATTEMPTS = 5
+
+# First retry delay in seconds; doubles on each further attempt
+RETRY_BACKOFF = 2.0
+
+# Identical messages broadcast again within this many seconds are dropped
+DEDUPE_WINDOW = 600
+
+SEND_TIMEOUT = 10
+
+BROADCAST_DELIVERIES = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_broadcast_deliveries_total',
+    'Broadcast deliveries by outcome (sent, retried, failed, blocked, duplicate).',
+    ('outcome',),
+))
+BROADCAST_LATENCY = REGISTRY.register(Histogram(
+    f'{METRIC_PREFIX}_broadcast_delivery_seconds',
+    'Time from broadcast() to a successful delivery, per recipient.',
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+))
+
+
+def ensure_subscribers_table(db_handler):
+    """Create the telegram_subscribers table if it does not exist."""
+    return db_handler.execute(CREATE_SUBSCRIBERS_TABLE)
+
+
+def set_subscription(db_handler, chat_id, active):
+    """
+    Subscribe a chat to broadcasts, or unsubscribe it.
+
+    Returns:
+        bool: True if the subscription was saved.
+    """
+    query = """
+        INSERT INTO telegram_subscribers (chat_id, active) VALUES (%(chat_id)s, %(active)s)
+        ON CONFLICT (chat_id) DO UPDATE SET active = EXCLUDED.active, updated_at = NOW();
+    """
+    return db_handler.execute(query, {'chat_id': chat_id, 'active': active})
+
+
+def load_subscribers(db_handler):
+    """Return the chat ids of every active subscriber."""
+    rows = db_handler.fetch_all("SELECT chat_id FROM telegram_subscribers WHERE active;")
+    return [row['chat_id'] for row in rows]
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """
+        Take one token if available.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one is available.
+        """
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class Delivery:
+    """Retry state of one message to one recipient."""
+
+    __slots__ = ('chat_id', 'payload', 'queued_at', 'attempts', 'last_error')
+
+    def __init__(self, chat_id, payload, queued_at):
+        self.chat_id = chat_id
+        self.payload = payload
+        self.queued_at = queued_at
+        self.attempts = 0
+        self.last_error = None
+
+
+class Broadcaster:
+    """
+    Delivers messages to every subscribed Telegram chat from background threads.
+
+    broadcast() only enqueues, so the trading loop never waits on Telegram. A
+    dispatcher thread hands deliveries to a pool of sender threads, within the
+    global rate (TELEGRAM_BROADCAST_RATE messages per second) and at most one
+    message per PER_CHAT_INTERVAL to each chat. Each message is rendered into
+    its request payload once, repeated messages are dropped for DEDUPE_WINDOW
+    seconds, and every recipient keeps its own retry state: rate-limit replies
+    are retried after the delay Telegram asks for, other failures back off
+    exponentially, and chats that blocked the bot are unsubscribed.
+    """
+
+    def __init__(self, db_handler=None, token=TELEGRAM_BOT_TOKEN, default_chat_id=TELEGRAM_CHAT_ID,
+                 rate=TELEGRAM_BROADCAST_RATE, workers=TELEGRAM_BROADCAST_WORKERS, post=None):
+        """
+        Initialize the broadcaster; call start() before broadcasting.
+
+        Args:
+            db_handler (DatabaseHandler, optional): Used only by the dispatcher thread. Defaults to a new one.
+            token (str): The Telegram bot token.
+            default_chat_id (str, optional): Chat or channel that always receives broadcasts.
+            rate (float): Messages per second across all chats.
+            workers (int): Concurrent sender threads.
+            post (callable, optional): Sends one request, as requests.post(url, data=..., timeout=...).
+        """
+        self.db_handler = db_handler or DatabaseHandler()
+        self.url = f"https://api.telegram.org/bot{token}/sendMessage"
+        self.default_chat_id = default_chat_id
+        self.bucket = TokenBucket(rate)
+        self.workers = workers
+        self.post = post
+        self._local = threading.local()
+        self._queue = []  # Heap of (due time, sequence, Delivery)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._next_send = {}  # chat_id -> earliest monotonic time of its next message
+        self._recent = {}  # message digest -> monotonic time it was broadcast
+        self._blocked = []  # Chats that blocked the bot, unsubscribed by the dispatcher (it owns db_handler)
+        self._in_flight = 0
+        self._pool = None
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        """Start the dispatcher thread and the sender pool."""
+        ensure_subscribers_table(self.db_handler)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='broadcast-sender')
+        self._thread = threading.Thread(target=self._dispatch, name='broadcast-dispatcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def broadcast(self, message, parse_mode='Markdown'):
+        """
+        Queue a message for the default chat and every subscriber; returns immediately.
+
+        Returns:
+            bool: False if the message was a duplicate and dropped, True otherwise.
+        """
+        digest = hashlib.sha256(f"{parse_mode}\0{message}".encode('utf-8')).hexdigest()
+        now = time.monotonic()
+        with self._condition:
+            self._recent = {key: sent for key, sent in self._recent.items() if now - sent < DEDUPE_WINDOW}
+            if digest in self._recent:
+                BROADCAST_DELIVERIES.inc(outcome='duplicate')
+                logger.info("Dropped a duplicate broadcast.")
+                return False
+            self._recent[digest] = now
+            # The subscriber list is loaded on the dispatcher thread; this marker expands into deliveries
+            payload = {'text': message, 'parse_mode': parse_mode}
+            heapq.heappush(self._queue, (now, next(self._sequence), Delivery(None, payload, now)))
+            self._condition.notify()
+        return True
+
+    def send(self, message, chat_id, parse_mode='Markdown'):
+        """
+        Queue a message for one chat; returns immediately.
+
+        The delivery gets the same rate limits and retries as a broadcast, without
+        deduplication (e.g., price alert notifications, which name their alert).
+        """
+        now = time.monotonic()
+        self._schedule(Delivery(chat_id, {'text': message, 'parse_mode': parse_mode}, now), now)
+
+    def __call__(self, message):
+        """Lets a Broadcaster be passed as a bot's notifier."""
+        self.broadcast(message)
+
+    def pending(self):
+        """Number of deliveries queued or being sent."""
+        with self._condition:
+            return len(self._queue) + self._in_flight + len(self._blocked)
+
+    def close(self, timeout=30):
+        """Wait up to timeout seconds for pending deliveries, then stop the threads."""
+        deadline = time.monotonic() + timeout
+        while self.pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def _schedule(self, delivery, due):
+        with self._condition:
+            heapq.heappush(self._queue, (due, next(self._sequence), delivery))
+            self._condition.notify()
+
+    def _expand(self, marker):
+        recipients = load_subscribers(self.db_handler)
+        default_chat_id = self.default_chat_id
+        if isinstance(default_chat_id, str) and default_chat_id.lstrip('-').isdigit():
+            default_chat_id = int(default_chat_id)  # Channel usernames (e.g., "@channel") stay strings
+        if default_chat_id and default_chat_id not in recipients:
+            recipients.insert(0, default_chat_id)
+        logger.info(f"Broadcasting to {len(recipients)} chats.")
+        for chat_id in recipients:
+            self._schedule(Delivery(chat_id, marker.payload, marker.queued_at), marker.queued_at)
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while not self._stopping and not self._blocked:
+                    if self._queue:
+                        wait = self._queue[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+                if self._stopping:
+                    return
+                blocked, self._blocked = self._blocked, []
+                if not blocked:
+                    _, _, delivery = heapq.heappop(self._queue)
+
+            if blocked:
+                for chat_id in blocked:
+                    set_subscription(self.db_handler, chat_id, False)
+                continue
+            if delivery.chat_id is None:
+                self._expand(delivery)
+                continue
+
+            now = time.monotonic()
+            chat_ready = self._next_send.get(delivery.chat_id, 0.0)
+            if chat_ready > now:
+                self._schedule(delivery, chat_ready)
+                continue
+            wait = self.bucket.take()
+            if wait:
+                self._schedule(delivery, now + wait)
+                continue
+
+            self._next_send[delivery.chat_id] = now + PER_CHAT_INTERVAL
+            with self._condition:
+                self._in_flight += 1
+            self._pool.submit(self._send, delivery)
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _send(self, delivery):
+        try:
+            delivery.attempts += 1
+            data = dict(delivery.payload, chat_id=delivery.chat_id)
+            try:
+                post = self.post or self._session().post
+                response = post(self.url, data=data, timeout=SEND_TIMEOUT)
+            except requests.RequestException as e:
+                self._retry(delivery, str(e))
+                return
+
+            if response.status_code == 200:
+                BROADCAST_DELIVERIES.inc(outcome='sent')
+                BROADCAST_LATENCY.observe(time.monotonic() - delivery.queued_at)
+            elif response.status_code == 429:
+                retry_after = self._retry_after(response)
+                self._retry(delivery, f"rate limited for {retry_after}s", delay=retry_after)
+            elif response.status_code == 403:
+                BROADCAST_DELIVERIES.inc(outcome='blocked')
+                logger.warning(f"Chat {delivery.chat_id} blocked the bot; unsubscribing it.")
+                with self._condition:
+                    self._blocked.append(delivery.chat_id)
+                    self._condition.notify()
+            elif response.status_code >= 500:
+                self._retry(delivery, f"HTTP {response.status_code}")
+            else:
+                BROADCAST_DELIVERIES.inc(outcome='failed')
+                logger.error(f"Broadcast to {delivery.chat_id} rejected: {response.status_code}, {response.text}")
+        except Exception as e:
+            BROADCAST_DELIVERIES.inc(outcome='failed')
+            logger.error(f"Unexpected error broadcasting to {delivery.chat_id}: {type(e).__name__} - {e}")
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.json()['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            return RETRY_BACKOFF
+
+    def _retry(self, delivery, error, delay=None):
+        delivery.last_error = error
+        if delivery.attempts >= MAX_ATTEMPTS:
+            BROADCAST_DELIVERIES.inc(outcome='failed')
+            logger.error(f"Giving up broadcast to {delivery.chat_id} after {delivery.attempts} attempts: {error}")
+            return
+        BROADCAST_DELIVERIES.inc(outcome='retried')
+        delay = delay if delay is not None else RETRY_BACKOFF * 2 ** (delivery.attempts - 1)
+        logger.warning(f"Broadcast to {delivery.chat_id} failed ({error}); retrying in {delay:.1f}s.")
+        self._schedule(delivery, time.monotonic() + delay)
@@ -0,0 +1,403 @@
+# chart_service.py
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+import mplfinance as mpf
+import pandas as pd
+
+from indicators import traded_volumes
+from metrics import METRIC_PREFIX, REGISTRY, Counter, Timer
+from rollups import align_to_resolution, fetch_bars
+from scheduler import FixedRateScheduler
+
+logger = logging.getLogger(__name__)
+
+# Chart windows: (length, rollup resolution of one candle, title label)
+CHART_WINDOWS = {
+    '1h': (timedelta(hours=1), '1m', '1-Hour'),
+    '3h': (timedelta(hours=3), '15m', '3-Hour'),
+    '24h': (timedelta(hours=24), '15m', '24-Hour'),
+    '7d': (timedelta(days=7), '1h', '7-Day'),
+}
+
+# pandas resampling rule matching each rollup resolution, for the raw-tick fallback
+RESAMPLE_RULES = {
+    '1m': '1min',
+    '15m': '15min',
+    '1h': '1h',
+    '1d': '1D',
+}
+
+DEFAULT_CACHE_SIZE = 32
+
+# Windows rendered ahead of requests on every bar close
+PRERENDERED_WINDOWS = ('1h', '3h', '24h')
+
+# Seconds past each minute at which charts are prerendered, after the price logger's :00 write
+PRERENDER_OFFSET = 10
+
+CHART_CACHE_HITS = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_chart_cache_hits_total',
+    'Chart requests served from the rendered-image cache.',
+    ('window',),
+))
+CHART_CACHE_MISSES = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_chart_cache_misses_total',
+    'Chart requests that had to be rendered.',
+    ('window',),
+))
+
+
+def load_ohlc_from_rollups(db_handler, symbol, resolution, start_time):
+    """
+    Load OHLCV bars for a symbol from the rollup table.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        symbol (str): The cryptocurrency symbol (e.g., 'XRP').
+        resolution (str): The rollup resolution (e.g., '15m').
+        start_time (datetime): The start of the chart window.
+
+    Returns:
+        DataFrame or None: The bars indexed by timestamp, or None if no bars were found.
+    """
+    bars = fetch_bars(db_handler, symbol, resolution, start_time)
+    if not bars:
+        return None
+
+    ohlc = pd.DataFrame(bars)
+    ohlc['timestamp'] = pd.to_datetime(ohlc['bucket_start'], utc=True)
+    ohlc.set_index('timestamp', inplace=True)
+    ohlc = ohlc[['open', 'high', 'low', 'close', 'volume']].apply(pd.to_numeric, errors='coerce')
+    ohlc.dropna(inplace=True)
+    return ohlc if not ohlc.empty else None
+
+
+def load_ohlc_from_ticks(db_handler, symbol, interval, start_time):
+    """
+    Resample raw ticks for a symbol into OHLCV bars.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        symbol (str): The cryptocurrency symbol (e.g., 'XRP').
+        interval (str): The pandas resampling interval (e.g., '15min').
+        start_time (datetime): The start of the chart window.
+
+    Returns:
+        DataFrame or None: The bars indexed by timestamp, or None if no ticks were found.
+    """
+    query = """
+        SELECT timestamp, last_price, volume
+        FROM crypto_prices
+        WHERE symbol = %(symbol)s AND timestamp >= %(start_time)s
+        ORDER BY timestamp ASC;
+    """
+    params = {'symbol': symbol, 'start_time': start_time}
+    data = db_handler.fetch_all(query, params)
+
+    if not data:
+        return None
+
+    # Convert to DataFrame
+    df = pd.DataFrame(data)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df.set_index('timestamp', inplace=True)
+
+    # Use last_price for OHLC resampling
+    df['price'] = pd.to_numeric(df['last_price'], errors='coerce')
+    # Ticks carry the rolling 24h volume; bars sum what traded between ticks, as the rollups do
+    df['volume'] = traded_volumes(pd.to_numeric(df['volume'], errors='coerce'))
+
+    # 🎯 Proper OHLC construction (based on real price action)
+    ohlc = df['price'].resample(interval).ohlc()
+    ohlc['volume'] = df['volume'].resample(interval).sum()
+    ohlc.dropna(inplace=True)
+    return ohlc if not ohlc.empty else None
+
+
+def render_candlestick_chart(ohlc, title, output):
+    """
+    Render OHLC bars as the bot's dark candlestick chart with SMA-5 and EMA-21 overlays.
+
+    Args:
+        ohlc (DataFrame): Bars indexed by timestamp with open/high/low/close/volume columns.
+        title (str): The chart title.
+        output (str or file-like): Filename or binary buffer the PNG is written to.
+    """
+    ohlc = ohlc.copy()
+
+    # 📈 Calculate Moving Averages
+    ohlc['SMA_5'] = ohlc['close'].rolling(window=5).mean()
+    ohlc['EMA_21'] = ohlc['close'].ewm(span=21, adjust=False).mean()
+
+    # 🎨 Custom dark style
+    custom_style = mpf.make_mpf_style(
+        base_mpf_style='nightclouds',
+        rc={
+            "axes.labelcolor": "white",
+            "xtick.color": "white",
+            "ytick.color": "white",
+        },
+        marketcolors=mpf.make_marketcolors(
+            up='green',
+            down='red',
+            edge='inherit',
+            wick='inherit',
+            volume='inherit',
+            ohlc='inherit',
+        )
+    )
+
+    # 🔹 Manually create both overlays for full control
+    sma_5_plot = mpf.make_addplot(
+        ohlc['SMA_5'],
+        color='cyan',
+        width=1.2,
+        linestyle='-'
+    )
+
+    ema_21_plot = mpf.make_addplot(
+        ohlc['EMA_21'],
+        color='orange',
+        width=1.2,
+        linestyle='--'
+    )
+
+    # 🧠 Plot with full matplotlib access
+    fig, axlist = mpf.plot(
+        ohlc,
+        type='candle',
+        style=custom_style,
+        title=title,
+        ylabel='Price (USDT)',
+        volume=False,
+        addplot=[sma_5_plot, ema_21_plot],  # Both overlays added manually
+        returnfig=True
+    )
+
+    # 🎯 Get the plot handles for legend
+    price_ax = axlist[0]
+    sma_line = price_ax.lines[-2]  # Second last added line (SMA-5)
+    ema_line = price_ax.lines[-1]  # Last added line (EMA-21)
+
+    # 🏷️ Add accurate legend with correct colour + style
+    price_ax.legend(
+        [sma_line, ema_line],
+        ['SMA-5 (cyan)', 'EMA-21 (orange dashed)'],
+        loc='upper left',
+        fontsize=8,
+        facecolor='#111111',
+        labelcolor='white',
+        edgecolor='white'
+    )
+
+    # 💧 Add watermark
+    price_ax.text(
+        1.0, -0.12,
+        '@xrppricealerts',
+        transform=price_ax.transAxes,
+        ha='right',
+        va='top',
+        fontsize=8,
+        color='gray',
+        alpha=0.7
+    )
+
+    # 💾 Save chart
+    fig.savefig(output, format='png', bbox_inches='tight')
+    plt.close(fig)
+
+
+class ChartService:
+    """
+    Renders candlestick charts for any symbol and CHART_WINDOWS window, with an LRU cache of the PNGs.
+
+    Images are keyed by (symbol, window, start of the newest bar), so every
+    request for the same chart within one bar period after the first is served
+    from memory without touching the database. Safe to share between threads;
+    renders are serialized because pyplot is not thread-safe.
+    """
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Initialize the service.
+
+        Args:
+            cache_size (int): Number of rendered images kept; 0 disables the cache.
+        """
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+
+    def cache_key(self, symbol, window, now=None):
+        """Return the cache key of a chart: (symbol, window, start of its newest bar)."""
+        _, resolution, _ = CHART_WINDOWS[window]
+        return symbol, window, align_to_resolution(now or datetime.now(timezone.utc), resolution)
+
+    def cached(self, symbol, window, now=None):
+        """Return the cached PNG of a chart, or None if it has not been rendered for the current bar."""
+        key = self.cache_key(symbol, window, now)
+        with self._lock:
+            png = self._cache.get(key)
+            if png is not None:
+                self._cache.move_to_end(key)
+            return png
+
+    def _store(self, key, png):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = png
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached image."""
+        with self._lock:
+            self._cache.clear()
+
+    def render(self, db_handler, symbol='XRP', window='3h', now=None):
+        """
+        Return a chart as PNG bytes, rendering it only on a cache miss.
+
+        Args:
+            db_handler (DatabaseHandler): The database handler instance.
+            symbol (str): The cryptocurrency symbol (e.g., 'XRP').
+            window (str): One of the keys of CHART_WINDOWS.
+            now (datetime, optional): The end of the chart window. Defaults to the current time.
+
+        Returns:
+            bytes or None: The PNG, or None if the window is unknown, no data was found or rendering failed.
+        """
+        if window not in CHART_WINDOWS:
+            logger.error(f"Unknown chart window: {window}")
+            return None
+        now = now or datetime.now(timezone.utc)
+        key = self.cache_key(symbol, window, now)
+        png = self.cached(symbol, window, now)
+        if png is not None:
+            CHART_CACHE_HITS.inc(window=window)
+            return png
+
+        CHART_CACHE_MISSES.inc(window=window)
+        with self._render_lock:
+            # Another thread may have rendered the same chart while this one waited
+            png = self.cached(symbol, window, now)
+            if png is None:
+                png = self._render(db_handler, symbol, window, now)
+                if png is not None:
+                    self._store(key, png)
+        return png
+
+    @Timer('chart_render', failed=lambda result: result is None)
+    def _render(self, db_handler, symbol, window, now):
+        length, resolution, label = CHART_WINDOWS[window]
+        start_time = now - length
+        try:
+            # Prefer the precomputed bars; fall back to raw ticks until they are backfilled
+            ohlc = load_ohlc_from_rollups(db_handler, symbol, resolution, start_time)
+            if ohlc is None:
+                ohlc = load_ohlc_from_ticks(db_handler, symbol, RESAMPLE_RULES[resolution], start_time)
+            if ohlc is None:
+                logger.warning(f"No {symbol} data available for the {label.lower()} chart.")
+                return None
+
+            buffer = BytesIO()
+            render_candlestick_chart(ohlc, f"{symbol}/USDT {label} Price Movement", buffer)
+            return buffer.getvalue()
+        except Exception as e:
+            logger.error(f"An error occurred while rendering the {symbol} {window} chart: {type(e).__name__} - {e}")
+            return None
+
+    def save(self, db_handler, symbol='XRP', window='3h', now=None, directory='.'):
+        """
+        Write a chart to a new PNG file, e.g. for a media upload.
+
+        Returns:
+            str or None: The filename (<symbol>_candlestick_chart_<timestamp>.png), or None if no chart was rendered.
+        """
+        png = self.render(db_handler, symbol, window, now)
+        if png is None:
+            return None
+        filename = os.path.join(
+            directory, f"{symbol.lower()}_candlestick_chart_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+        )
+        try:
+            with open(filename, 'wb') as chart_file:
+                chart_file.write(png)
+        except OSError as e:
+            logger.error(f"Failed to write chart file {filename}: {e}")
+            return None
+        return filename
+
+
+# Process-wide service, so every caller shares one image cache
+CHART_SERVICE = ChartService()
+
+
+class ChartPrerenderer:
+    """
+    Renders charts on one background thread, so request handlers only ever read the cache.
+
+    Every minute (PRERENDER_OFFSET seconds past it) the prerendered windows are
+    rendered for the new bar; windows whose newest bar has not changed are cache
+    hits and cost nothing. Charts that are not cached yet can be requested, which
+    queues them on the same thread.
+    """
+
+    def __init__(self, db_handler, symbol='XRP', windows=PRERENDERED_WINDOWS, service=None,
+                 interval=60, offset=PRERENDER_OFFSET):
+        """
+        Initialize the prerenderer.
+
+        Args:
+            db_handler (DatabaseHandler): Database handler used only by the render thread.
+            symbol (str): The symbol charted.
+            windows (tuple of str): CHART_WINDOWS keys rendered on every bar close.
+            service (ChartService, optional): The service whose cache is filled. Defaults to CHART_SERVICE.
+            interval (float): Seconds between prerender passes.
+            offset (float): Seconds past each interval boundary at which a pass starts.
+        """
+        self.db_handler = db_handler
+        self.symbol = symbol
+        self.windows = windows
+        self.service = service or CHART_SERVICE
+        self.scheduler = FixedRateScheduler(interval=interval, offset=offset, name='chart_prerender')
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chart-render')
+        self._thread = None
+
+    def start(self):
+        """Render the windows now and then on every bar close, on a daemon thread."""
+        for window in self.windows:
+            self.request(window)
+        self._thread = threading.Thread(
+            target=self.scheduler.run, args=(self._prerender,), name='chart-prerender', daemon=True
+        )
+        self._thread.start()
+
+    def _prerender(self, slot_time):
+        futures = [self.request(window, slot_time) for window in self.windows]
+        for future in futures:
+            future.result()
+
+    def request(self, window, now=None):
+        """
+        Queue a chart render on the render thread.
+
+        Returns:
+            Future: Resolves to the PNG bytes, or None if nothing could be rendered.
+        """
+        return self._executor.submit(self.service.render, self.db_handler, self.symbol, window, now)
+
+    def close(self):
+        """Stop accepting renders and wait for the queued ones."""
+        self._executor.shutdown(wait=True)
@@ -11,6 +11,9 @@ ACCESS_TOKEN_SECRET = os.getenv("ACCESS_TOKEN_SECRET")
 RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Trading signals fan out to every /subscribe'd chat: messages per second across all chats, and sender threads
+TELEGRAM_BROADCAST_RATE = float(os.getenv("TELEGRAM_BROADCAST_RATE", "30"))
+TELEGRAM_BROADCAST_WORKERS = int(os.getenv("TELEGRAM_BROADCAST_WORKERS", "8"))
 BITSTAMP_MAIN_KEY = os.getenv("BITSTAMP_MAIN_KEY")
 BITSTAMP_MAIN_SECRET = os.getenv("BITSTAMP_MAIN_SECRET")
 BITSTAMP_KEY = os.getenv("BITSTAMP_KEY")
@@ -20,6 +23,29 @@ DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
+# Seconds a connection attempt may take, so an unreachable database cannot stall a cycle
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+# Directory of the write-ahead logs that queue ticks while the database is unreachable
+TICK_WAL_DIR = os.getenv("TICK_WAL_DIR", "tick_wal")
+
+# Symbols traded by main.py, one TradingBot each (e.g., "XRP,BTC,ETH")
+TRADING_SYMBOLS = [symbol.strip().upper() for symbol in os.getenv("TRADING_SYMBOLS", "XRP").split(",") if symbol.strip()]
+# Seconds per tick when main.py streams prices over Bitstamp's WebSocket (e.g., "1"); 0 reads crypto_prices once a minute
+STREAM_GRANULARITY = float(os.getenv("STREAM_GRANULARITY", "0"))
+# VWAP window computed from the streamed trades ("5m", "1h", "session", "24h"); empty uses the ticker's 24h vwap
+STREAM_VWAP_WINDOW = os.getenv("STREAM_VWAP_WINDOW") or None
+# Optional JSON file with a list of TradingBot configs; overrides TRADING_SYMBOLS when present
+TRADING_BOTS_FILE = os.getenv("TRADING_BOTS_FILE", "trading_bots.json")
+
+# Root log level of the long-running processes (e.g., "DEBUG", "INFO")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Local Prometheus metrics endpoints, one port per long-running process (0 disables)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+PRICE_LOGGER_METRICS_PORT = int(os.getenv("PRICE_LOGGER_METRICS_PORT", "9101"))
+ALERT_BOT_METRICS_PORT = int(os.getenv("ALERT_BOT_METRICS_PORT", "9102"))
+TRADING_BOT_METRICS_PORT = int(os.getenv("TRADING_BOT_METRICS_PORT", "9103"))
+SUPERVISOR_METRICS_PORT = int(os.getenv("SUPERVISOR_METRICS_PORT", "9104"))
 
 # File to store the last tweet data
 LAST_TWEET_FILE = 'last_tweet.json'
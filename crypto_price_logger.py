@@ -1,55 +1,35 @@
 # crypto_price_logger.py
 
 import logging
-from logging.handlers import RotatingFileHandler  # Correct import
+import os
 import time
 from datetime import datetime, timezone
 import random
 
-import requests
-
+from app.fetcher import fetch_prices
+from config import METRICS_HOST, PRICE_LOGGER_METRICS_PORT, TICK_WAL_DIR
 from database_handler import DatabaseHandler  # Import your updated DatabaseHandler
-
-# Configure logging with RotatingFileHandler
+from logging_setup import setup_logging
+from metrics import Timer, start_metrics_server
+from price_alerts import PriceAlertBook
+from records import INSERT_TICK_QUERY, Tick
+from rollups import ensure_rollup_tables, update_rollups
+from scheduler import FixedRateScheduler
+from tick_wal import TickWal
+
+# Records go to crypto_price_logger.log once setup_logging() runs in __main__
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-
-# Disable propagation to avoid root logger handling stdout
-logger.propagate = False
-
-# Remove any default handlers from the root logger to prevent logging to console
-for handler in logging.root.handlers[:]:
-    logging.root.removeHandler(handler)
-
-# Avoid adding multiple handlers if the logger already has handlers
-if not logger.handlers:
-    handler = RotatingFileHandler(
-        'crypto_price_logger.log', maxBytes=5*1024*1024, backupCount=5
-    )
-    formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-
-# URLs for Bitstamp API
-CRYPTO_URLS = {
-    'BTC': "https://www.bitstamp.net/api/v2/ticker/btcusd/",
-    'ETH': "https://www.bitstamp.net/api/v2/ticker/ethusd/",
-}
+
+# Symbols logged against USD; their Bitstamp tickers are fetched together each cycle
+CRYPTO_SYMBOLS = ('BTC', 'ETH')
+
+# Seconds between logging cycles; cycles start on wall-clock boundaries (every minute at :00)
+LOG_INTERVAL = 60
 
 # Retry configuration
 MAX_RETRIES = 5
 BASE_SLEEP_TIME = 2  # in seconds
 
-# Field names corresponding to the database schema
-FIELDNAMES = [
-    'timestamp', 'symbol', 'last_price', 'high_price', 'low_price', 'vwap', 'volume',
-    'bid', 'ask', 'open_price', 'percent_change_24h', 'percent_change'
-]
-
-
 def calculate_percent_change(previous_price, current_price):
     """Calculate the percentage change between two prices."""
     if previous_price != 0 and previous_price is not None:
@@ -58,18 +38,6 @@ def calculate_percent_change(previous_price, current_price):
         return None
 
 
-def fetch_price(url):
-    """Fetch price data from the given Bitstamp API URL."""
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        data = response.json()
-        return data
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching data from {url}: {e}")
-        return None
-
-
 def get_last_price(db_handler, symbol):
     """
     Retrieve the last recorded price for the given symbol from the database.
@@ -100,120 +68,149 @@ def get_last_price(db_handler, symbol):
         return None
 
 
-def save_price_to_db(db_handler, symbol, price_data):
+def save_price_to_db(db_handler, tick, wal=None):
     """
-    Save the fetched price data to the database.
+    Save a fetched tick to the database.
 
     Args:
         db_handler (DatabaseHandler): The database handler instance.
-        symbol (str): The cryptocurrency symbol (e.g., 'BTC', 'ETH').
-        price_data (dict): The price data fetched from the API.
+        tick (Tick): The tick built from the API response.
+        wal (TickWal, optional): Queues the tick instead while the database is unreachable.
+            While it holds ticks, new ones are queued behind them until the next replay.
 
     Returns:
-        bool: True if the data was saved successfully, False otherwise.
+        bool: True if the data was saved (or durably queued) successfully, False otherwise.
     """
+    symbol = tick.symbol
+    if wal is not None and wal.pending:
+        return queue_price(wal, tick)
     try:
-        insert_query = """
-            INSERT INTO crypto_prices (
-                timestamp, symbol, last_price, high_price, low_price, vwap, volume,
-                bid, ask, open_price, percent_change_24h, percent_change
-            ) VALUES (
-                %(timestamp)s, %(symbol)s, %(last_price)s, %(high_price)s, %(low_price)s, %(vwap)s, %(volume)s,
-                %(bid)s, %(ask)s, %(open_price)s, %(percent_change_24h)s, %(percent_change)s
-            );
-        """
-        params = {
-            'timestamp': datetime.now(timezone.utc),
-            'symbol': symbol,
-            'last_price': float(price_data.get('last', 0)),
-            'high_price': float(price_data.get('high', 0)),
-            'low_price': float(price_data.get('low', 0)),
-            'vwap': float(price_data.get('vwap', 0)),
-            'volume': float(price_data.get('volume', 0)),
-            'bid': float(price_data.get('bid', 0)),
-            'ask': float(price_data.get('ask', 0)),
-            'open_price': float(price_data.get('open', 0)),
-            'percent_change_24h': float(price_data.get('percent_change', 0)) if price_data.get('percent_change') else None,
-            'percent_change': price_data.get('percent_change_calculated'),
-        }
-        success = db_handler.execute(insert_query, params)
+        success = db_handler.execute(INSERT_TICK_QUERY, tick.as_row())
         if success:
             logger.info(f"Saved {symbol}/USD data to DB.")
+            update_rollups(db_handler, symbol, tick.timestamp, tick.last_price, tick.volume)
             return True
         else:
             logger.error(f"Failed to save {symbol}/USD data to DB.")
-            return False
     except Exception as e:
         logger.error(f"Error saving {symbol}/USD data to DB: {e}")
-        return False
-
-
-def log_crypto_prices():
-    """Main function to log cryptocurrency prices continuously."""
-    db_handler = DatabaseHandler()
-
-    retry_count = 0
+    # Only connection failures are queued; a tick the database rejects would fail its replay too
+    if wal is not None and not db_handler.connected:
+        return queue_price(wal, tick)
+    return False
 
-    while True:
-        try:
-            current_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-            logger.info(f"Starting price logging cycle at {current_time}")
 
-            for symbol, url in CRYPTO_URLS.items():
-                logger.info(f"Fetching price data for {symbol}/USD from {url}")
-                price_data = fetch_price(url)
+def queue_price(wal, tick):
+    """Queue a tick in the write-ahead log until the database is back; returns True if it was written."""
+    if wal.append(tick):
+        logger.warning(f"Queued {tick.symbol}/USD data in the WAL ({wal.pending} ticks pending).")
+        return True
+    logger.error(f"Failed to queue {tick.symbol}/USD data; the tick is lost.")
+    return False
 
-                if price_data:
-                    # Retrieve the last price from the database
-                    last_price = get_last_price(db_handler, symbol)
 
-                    # Current price
-                    try:
-                        current_price = float(price_data['last'])
-                    except (ValueError, TypeError) as e:
-                        logger.error(f"Invalid 'last' price for {symbol}: {e}")
-                        continue
-
-                    # Calculate percent change
-                    percent_change = calculate_percent_change(last_price, current_price)
-
-                    # Add the calculated percent change to the price_data
-                    price_data['percent_change_calculated'] = percent_change
-
-                    # Prepare data for saving
-                    save_success = save_price_to_db(db_handler, symbol, price_data)
-
-                    if save_success and percent_change is not None:
-                        logger.info(
-                            f"{symbol}/USD: Current Price=${current_price:.2f}, "
-                            f"Change={'+' if percent_change >=0 else ''}{percent_change:.2f}%"
-                        )
-                    elif save_success:
-                        logger.info(
-                            f"{symbol}/USD: Current Price=${current_price:.2f}, Change=N/A"
-                        )
-
-            # Reset retry count after successful fetch and save
-            retry_count = 0
-
-        except Exception as e:
-            retry_count += 1
-            sleep_time = BASE_SLEEP_TIME * (2 ** retry_count) + random.uniform(0, 1)
-            logger.error(
-                f"An error occurred during the logging cycle: {type(e).__name__} - {e}. "
-                f"Retrying in {sleep_time:.2f} seconds... (Attempt {retry_count}/{MAX_RETRIES})"
-            )
+@Timer('price_logger_cycle')
+def log_price_cycle(db_handler, alert_book=None, tick_bus=None, wal=None):
+    """
+    Fetch and store one price observation for every symbol in CRYPTO_SYMBOLS.
 
-            if retry_count >= MAX_RETRIES:
-                logger.error("Max retries reached. Skipping this cycle and waiting for the next one.")
-                retry_count = 0
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        alert_book (PriceAlertBook, optional): User price alerts matched against every stored tick.
+        tick_bus (SharedTickBus, optional): Also fetch the bus's symbols and publish every ticker
+            to it, so supervised workers need not fetch their own.
+        wal (TickWal, optional): Write-ahead log replayed at the start of the cycle and used
+            for ticks that cannot be written while the database is down.
+    """
+    current_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    logger.info(f"Starting price logging cycle at {current_time}")
+    # Replay the ticks queued during an outage first; while it is still down, skip the database reads
+    database_down = wal is not None and wal.pending and not wal.replay(db_handler)
+    if alert_book is not None and not database_down:
+        alert_book.refresh()
+
+    symbols = CRYPTO_SYMBOLS if tick_bus is None else tuple(dict.fromkeys(CRYPTO_SYMBOLS + tick_bus.symbols))
+    tickers = fetch_prices(symbols)
+    logger.info(f"Fetched tickers for {', '.join(tickers) or 'no symbols'}")
+    if tick_bus is not None:
+        published = time.time()
+        for symbol, ticker in tickers.items():
+            tick_bus.publish(symbol, ticker, published)
+    for symbol in CRYPTO_SYMBOLS:
+        price_data = tickers.get(symbol)
+
+        if price_data:
+            # Retrieve the last price from the database
+            last_price = wal.last_price(symbol) if database_down else get_last_price(db_handler, symbol)
+
+            # Current price
+            try:
+                current_price = float(price_data['last'])
+            except (ValueError, TypeError) as e:
+                logger.error(f"Invalid 'last' price for {symbol}: {e}")
+                continue
+
+            # Calculate percent change
+            percent_change = calculate_percent_change(last_price, current_price)
+
+            # Prepare data for saving
+            tick = Tick.from_ticker(symbol, price_data, percent_change=percent_change)
+            save_success = save_price_to_db(db_handler, tick, wal)
+            if save_success and alert_book is not None:
+                alert_book.on_tick(symbol, current_price)
+
+            if save_success and percent_change is not None:
+                logger.info(
+                    f"{symbol}/USD: Current Price=${current_price:.2f}, "
+                    f"Change={'+' if percent_change >=0 else ''}{percent_change:.2f}%"
+                )
+            elif save_success:
+                logger.info(
+                    f"{symbol}/USD: Current Price=${current_price:.2f}, Change=N/A"
+                )
+
+
+def log_crypto_prices(tick_bus=None):
+    """
+    Main function to log cryptocurrency prices continuously, once per wall-clock minute.
 
-            time.sleep(sleep_time)
-            continue
+    Args:
+        tick_bus (SharedTickBus, optional): Bus the fetched tickers are published to, when run by the supervisor.
+    """
+    db_handler = DatabaseHandler()
+    ensure_rollup_tables(db_handler)
+    alert_book = PriceAlertBook(db_handler, CRYPTO_SYMBOLS)
+    wal = TickWal(os.path.join(TICK_WAL_DIR, 'crypto_price_logger'))
+    start_metrics_server(PRICE_LOGGER_METRICS_PORT, METRICS_HOST)
+
+    def run_cycle(slot_time):
+        # Failed cycles are retried with backoff only while the retry still fits in this slot
+        deadline = slot_time.timestamp() + LOG_INTERVAL
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                log_price_cycle(db_handler, alert_book, tick_bus, wal)
+                return
+            except Exception as e:
+                sleep_time = BASE_SLEEP_TIME * (2 ** attempt) + random.uniform(0, 1)
+                if attempt == MAX_RETRIES or time.time() + sleep_time >= deadline:
+                    logger.error(
+                        f"An error occurred during the logging cycle: {type(e).__name__} - {e}. "
+                        f"Skipping this cycle and waiting for the next one. (Attempt {attempt}/{MAX_RETRIES})"
+                    )
+                    return
+                logger.error(
+                    f"An error occurred during the logging cycle: {type(e).__name__} - {e}. "
+                    f"Retrying in {sleep_time:.2f} seconds... (Attempt {attempt}/{MAX_RETRIES})"
+                )
+                time.sleep(sleep_time)
 
-        # Wait for a minute before the next logging cycle
-        time.sleep(60)
+    try:
+        FixedRateScheduler(LOG_INTERVAL, name='price_logger').run(run_cycle)
+    finally:
+        alert_book.close()
+        wal.close()
 
 
 if __name__ == "__main__":
+    setup_logging('crypto_price_logger.log')
     log_crypto_prices()
@@ -1,9 +1,12 @@
 # database_handler.py
 
+import csv
+import io
 import psycopg2
 import psycopg2.extras
 import logging
 import config  # Ensure your config.py is correctly set up with environment variables
+from metrics import Timer
 
 class DatabaseHandler:
     """A handler for PostgreSQL database interactions."""
@@ -15,6 +18,7 @@ class DatabaseHandler:
         self.database = config.DB_NAME
         self.user = config.DB_USER
         self.password = config.DB_PASSWORD
+        self.connect_timeout = config.DB_CONNECT_TIMEOUT
         self.conn = None
 
     def connect(self):
@@ -26,7 +30,8 @@ class DatabaseHandler:
                     port=self.port,
                     database=self.database,
                     user=self.user,
-                    password=self.password
+                    password=self.password,
+                    connect_timeout=self.connect_timeout
                 )
                 logging.info("Connected to the PostgreSQL database.")
             except psycopg2.OperationalError as e:
@@ -36,6 +41,11 @@ class DatabaseHandler:
                 logging.error(f"Error connecting to PostgreSQL database: {e}")
                 self.conn = None
 
+    @property
+    def connected(self):
+        """True while the handler holds an open connection (after a failure, whether it is still usable)."""
+        return self.conn is not None and self.conn.closed == 0
+
     def close(self):
         """Close the database connection."""
         if self.conn is not None and self.conn.closed == 0:
@@ -54,6 +64,7 @@ class DatabaseHandler:
         """Exit the runtime context and close the connection."""
         self.close()
 
+    @Timer('db_execute', failed=lambda result: not result)
     def execute(self, query, params=None):
         """
         Execute a data modification query (INSERT, UPDATE, DELETE).
@@ -77,9 +88,136 @@ class DatabaseHandler:
                 return True
         except psycopg2.Error as e:
             logging.error(f"Error executing query: {e}")
-            self.conn.rollback()
+            if self.connected:  # A lost connection cannot be rolled back; connect() replaces it
+                self.conn.rollback()
+            return False
+
+    @Timer('db_execute_values', failed=lambda result: not result)
+    def execute_values(self, query, rows, page_size=100):
+        """
+        Execute a multi-row INSERT in as few round trips as possible.
+
+        Args:
+            query (str): The SQL query, containing a single ``VALUES %s`` placeholder.
+            rows (list of tuple): The rows to insert.
+            page_size (int): The maximum number of rows sent per statement.
+
+        Returns:
+            bool: True if all rows were written successfully, False otherwise.
+        """
+        self.connect()
+        if self.conn is None:
+            logging.error("No database connection available.")
+            return False
+        try:
+            with self.conn.cursor() as cursor:
+                psycopg2.extras.execute_values(cursor, query, rows, page_size=page_size)
+                self.conn.commit()
+                logging.debug(f"Executed batch of {len(rows)} rows.")
+                return True
+        except psycopg2.Error as e:
+            logging.error(f"Error executing batch query: {e}")
+            if self.connected:  # A lost connection cannot be rolled back; connect() replaces it
+                self.conn.rollback()
+            return False
+
+    @Timer('db_copy_rows', failed=lambda result: not result)
+    def copy_rows(self, copy_query, rows, before=None, after=None):
+        """
+        Bulk-load rows with COPY ... FROM STDIN, in one transaction.
+
+        Args:
+            copy_query (str): A ``COPY <table> (<columns>) FROM STDIN WITH (FORMAT csv)`` statement.
+            rows (iterable of tuple): The rows in the statement's column order; None is loaded as NULL.
+            before (str, optional): Statement run before the COPY (e.g., creating a staging table).
+            after (str, optional): Statement run after the COPY (e.g., merging the staging table).
+
+        Returns:
+            bool: True if everything was committed, False otherwise.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        self.connect()
+        if self.conn is None:
+            logging.error("No database connection available.")
+            return False
+        try:
+            with self.conn.cursor() as cursor:
+                if before:
+                    cursor.execute(before)
+                cursor.copy_expert(copy_query, buffer)
+                if after:
+                    cursor.execute(after)
+                self.conn.commit()
+                logging.debug(f"Copied {buffer.tell()} bytes of rows.")
+                return True
+        except psycopg2.Error as e:
+            logging.error(f"Error copying rows: {e}")
+            if self.connected:  # A lost connection cannot be rolled back; connect() replaces it
+                self.conn.rollback()
+            return False
+
+    @Timer('db_execute_returning', failed=lambda result: result is None)
+    def execute_returning(self, query, params=None):
+        """
+        Execute a data modification query with a RETURNING clause and commit it.
+
+        Args:
+            query (str): The SQL query to execute (e.g., INSERT ... RETURNING id).
+            params (tuple or dict, optional): The parameters to pass with the query.
+
+        Returns:
+            list of dict or None: The returned rows, or None if the query failed.
+        """
+        self.connect()
+        if self.conn is None:
+            logging.error("No database connection available.")
+            return None
+        try:
+            with self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute(query, params)
+                results = cursor.fetchall()
+                self.conn.commit()
+                logging.debug(f"Executed query: {cursor.query.decode()}")
+                return results
+        except psycopg2.Error as e:
+            logging.error(f"Error executing query: {e}")
+            if self.connected:  # A lost connection cannot be rolled back; connect() replaces it
+                self.conn.rollback()
+            return None
+
+    def execute_autocommit(self, query, params=None):
+        """
+        Execute a statement outside of a transaction block (e.g., VACUUM).
+
+        Args:
+            query (str): The SQL statement to execute.
+            params (tuple or dict, optional): The parameters to pass with the statement.
+
+        Returns:
+            bool: True if the statement was executed successfully, False otherwise.
+        """
+        self.connect()
+        if self.conn is None:
+            logging.error("No database connection available.")
+            return False
+        previous_autocommit = self.conn.autocommit
+        try:
+            # Close the implicit transaction left open by earlier SELECTs
+            self.conn.commit()
+            self.conn.autocommit = True
+            with self.conn.cursor() as cursor:
+                cursor.execute(query, params)
+                logging.debug(f"Executed query (autocommit): {cursor.query.decode()}")
+                return True
+        except psycopg2.Error as e:
+            logging.error(f"Error executing autocommit query: {e}")
             return False
+        finally:
+            self.conn.autocommit = previous_autocommit
 
+    @Timer('db_fetch_one')
     def fetch_one(self, query, params=None):
         """
         Execute a SELECT query and fetch a single record.
@@ -105,6 +243,7 @@ class DatabaseHandler:
             logging.error(f"Error fetching one: {e}")
             return None
 
+    @Timer('db_fetch_all')
     def fetch_all(self, query, params=None):
         """
         Execute a SELECT query and fetch all records.
@@ -0,0 +1,351 @@
+# indicators.py
+
+import math
+from array import array
+from collections import deque
+
+import numpy as np
+
+# Rolling VWAP windows in seconds, by name; 'session' restarts at every session boundary instead
+VWAP_WINDOWS = {'5m': 5 * 60, '1h': 60 * 60, '24h': 24 * 60 * 60}
+SESSION = 'session'
+
+# Ring buffer slots per rolling VWAP window; the window edge moves in steps of window / slots
+DEFAULT_VWAP_SLOTS = 300
+
+# Sessions start this many seconds after midnight UTC
+DEFAULT_SESSION_OFFSET = 0
+
+
+class RollingVolatility:
+    """
+    Sample standard deviation of tick-to-tick price changes over the last `window` changes.
+
+    Each update adds the newest change and drops the oldest with Welford's
+    recurrences, so it costs O(1) no matter how long the window is. It matches
+    Backtest's price_volatility() over the same prices.
+    """
+
+    def __init__(self, window=1440, min_periods=30):
+        """
+        Initialize the estimator.
+
+        Args:
+            window (int): Number of most recent price changes included.
+            min_periods (int): Changes required before a value is reported.
+        """
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.window = window
+        self.min_periods = max(2, min(min_periods, window))
+        self._changes = deque()
+        self._last_price = None
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def __len__(self):
+        return len(self._changes)
+
+    def update(self, price):
+        """
+        Add a price and return the current volatility.
+
+        Args:
+            price (float): The newest price. Missing or non-positive prices are ignored.
+
+        Returns:
+            float or None: The volatility, or None until min_periods changes were seen.
+        """
+        if price is None or not price > 0:
+            return self.value
+        if self._last_price is not None:
+            self._add(price / self._last_price - 1)
+        self._last_price = price
+        return self.value
+
+    def _add(self, change):
+        self._changes.append(change)
+        count = len(self._changes)
+        delta = change - self._mean
+        self._mean += delta / count
+        self._m2 += delta * (change - self._mean)
+
+        if count > self.window:
+            oldest = self._changes.popleft()
+            count -= 1
+            delta = oldest - self._mean
+            self._mean -= delta / count
+            self._m2 -= delta * (oldest - self._mean)
+            self._m2 = max(self._m2, 0.0)
+
+    @property
+    def value(self):
+        """The current volatility, or None until min_periods changes were seen."""
+        count = len(self._changes)
+        if count < self.min_periods:
+            return None
+        return math.sqrt(self._m2 / (count - 1))
+
+
+class RollingVwap:
+    """
+    Volume-weighted average price over the last `window` seconds, O(1) per update.
+
+    Price x volume and volume are summed into a ring buffer of `slots` time
+    slots of window / slots seconds each, plus running totals. Moving into a
+    new slot subtracts the slots that fell out of the window, so the window
+    edge advances in slot steps. The totals are re-summed from the slots once
+    per ring turn, so rounding errors do not accumulate. rolling_vwap()
+    computes the same values for whole arrays.
+    """
+
+    def __init__(self, window, slots=DEFAULT_VWAP_SLOTS):
+        """
+        Initialize the estimator.
+
+        Args:
+            window (float): Window length in seconds.
+            slots (int): Ring buffer slots; more slots move the window edge in smaller steps.
+        """
+        if window <= 0 or slots < 1:
+            raise ValueError("window and slots must be positive")
+        self.window = window
+        self.slots = slots
+        self.resolution = window / slots
+        self._price_volume = array('d', bytes(8 * slots))
+        self._volume = array('d', bytes(8 * slots))
+        self._slot = None  # Absolute index of the newest slot
+        self._price_volume_total = 0.0
+        self._volume_total = 0.0
+        self._advanced = 0  # Slots advanced since the totals were last re-summed
+
+    def update(self, time, price, volume):
+        """
+        Add a trade or tick and return the current VWAP.
+
+        Args:
+            time (float): Epoch seconds. Updates older than the window are ignored.
+            price (float): The price.
+            volume (float): The traded volume; missing or non-positive volumes only advance time.
+
+        Returns:
+            float or None: The VWAP, or None while the window holds no volume.
+        """
+        slot = math.floor(time / self.resolution)
+        self._advance(slot)
+        if volume is None or not volume > 0 or price is None or not price > 0 or slot <= self._slot - self.slots:
+            return self.value
+        index = slot % self.slots
+        self._price_volume[index] += price * volume
+        self._volume[index] += volume
+        self._price_volume_total += price * volume
+        self._volume_total += volume
+        return self.value
+
+    def _advance(self, slot):
+        if self._slot is None:
+            self._slot = slot
+            return
+        steps = slot - self._slot
+        if steps <= 0:
+            return
+        if steps >= self.slots:
+            for index in range(self.slots):
+                self._price_volume[index] = self._volume[index] = 0.0
+        else:
+            for absolute in range(self._slot + 1, slot + 1):
+                index = absolute % self.slots
+                self._price_volume_total -= self._price_volume[index]
+                self._volume_total -= self._volume[index]
+                self._price_volume[index] = self._volume[index] = 0.0
+        self._slot = slot
+        self._advanced += steps
+        if self._advanced >= self.slots:
+            self._price_volume_total = math.fsum(self._price_volume)
+            self._volume_total = math.fsum(self._volume)
+            self._advanced = 0
+
+    @property
+    def value(self):
+        """The current VWAP, or None while the window holds no volume."""
+        if self._volume_total <= 1e-12 * self.slots:
+            return None
+        return self._price_volume_total / self._volume_total
+
+
+class SessionVwap:
+    """VWAP since the start of the current session (by default, midnight UTC), O(1) per update."""
+
+    def __init__(self, session_offset=DEFAULT_SESSION_OFFSET):
+        """
+        Initialize the estimator.
+
+        Args:
+            session_offset (float): Seconds after midnight UTC at which sessions start.
+        """
+        self.session_offset = session_offset
+        self._session = None
+        self._price_volume_total = 0.0
+        self._volume_total = 0.0
+
+    def update(self, time, price, volume):
+        """
+        Add a trade or tick and return the session VWAP.
+
+        Args:
+            time (float): Epoch seconds. Updates from an earlier session are ignored.
+            price (float): The price.
+            volume (float): The traded volume; missing or non-positive volumes only advance time.
+
+        Returns:
+            float or None: The VWAP, or None while the session holds no volume.
+        """
+        session = math.floor((time - self.session_offset) / 86400)
+        if self._session is None or session > self._session:
+            self._session = session
+            self._price_volume_total = self._volume_total = 0.0
+        if volume is None or not volume > 0 or price is None or not price > 0 or session < self._session:
+            return self.value
+        self._price_volume_total += price * volume
+        self._volume_total += volume
+        return self.value
+
+    @property
+    def value(self):
+        """The session VWAP, or None while the session holds no volume."""
+        if self._volume_total <= 0:
+            return None
+        return self._price_volume_total / self._volume_total
+
+
+class TradedVolume:
+    """
+    Volume traded between consecutive ticks, from the exchange's rolling 24h volume.
+
+    Stored and REST ticks carry Bitstamp's 24h volume, which changes little from
+    one minute to the next, so weighting ticks by it would turn a VWAP into a
+    plain average. The increase of the 24h volume since the previous tick
+    approximates what traded in between; decreases (more volume leaving the 24h
+    window than entering it) and the first tick count as nothing. Matches
+    traded_volumes() over the same ticks.
+    """
+
+    def __init__(self):
+        self._last_volume = None
+
+    def update(self, volume_24h):
+        """
+        Add a tick's 24h volume and return the volume traded since the previous tick.
+
+        Args:
+            volume_24h (float or None): The tick's rolling 24h volume.
+
+        Returns:
+            float: The traded volume; 0.0 for the first tick and for missing volumes or decreases.
+        """
+        last_volume, self._last_volume = self._last_volume, volume_24h
+        if volume_24h is None or last_volume is None:
+            return 0.0
+        traded = volume_24h - last_volume
+        return traded if traded > 0 else 0.0
+
+
+def traded_volumes(volumes_24h):
+    """
+    The volume traded since the previous tick, for every tick, as TradedVolume reports it.
+
+    Args:
+        volumes_24h (array-like): Rolling 24h volumes, in tick order.
+
+    Returns:
+        np.ndarray: The traded volumes; 0.0 for the first tick and for missing volumes or decreases.
+    """
+    traded = np.diff(np.asarray(volumes_24h, dtype=np.float64), prepend=np.nan)
+    with np.errstate(invalid='ignore'):
+        return np.where(traded > 0, traded, 0.0)
+
+
+def vwap_estimator(window, slots=DEFAULT_VWAP_SLOTS, session_offset=DEFAULT_SESSION_OFFSET):
+    """
+    Create the estimator of a VWAP window.
+
+    Args:
+        window (str or float): A VWAP_WINDOWS name, SESSION, or a length in seconds.
+
+    Returns:
+        RollingVwap or SessionVwap: The estimator.
+    """
+    if window == SESSION:
+        return SessionVwap(session_offset)
+    return RollingVwap(VWAP_WINDOWS.get(window, window), slots)
+
+
+class VwapEngine:
+    """Several VWAP windows of one symbol, fed by the same trades or ticks."""
+
+    def __init__(self, windows=('5m', '1h', SESSION, '24h'), slots=DEFAULT_VWAP_SLOTS,
+                 session_offset=DEFAULT_SESSION_OFFSET):
+        """
+        Initialize the engine.
+
+        Args:
+            windows (iterable): VWAP_WINDOWS names, SESSION, or lengths in seconds.
+            slots (int): Ring buffer slots of each rolling window.
+            session_offset (float): Seconds after midnight UTC at which sessions start.
+        """
+        self.estimators = {window: vwap_estimator(window, slots, session_offset) for window in windows}
+
+    def update(self, time, price, volume):
+        """Add a trade or tick (epoch seconds, price, volume) to every window; returns the engine."""
+        for estimator in self.estimators.values():
+            estimator.update(time, price, volume)
+        return self
+
+    def value(self, window):
+        """The VWAP of one window, or None while it holds no volume."""
+        return self.estimators[window].value
+
+    def values(self):
+        """The VWAP of every window, by window."""
+        return {window: estimator.value for window, estimator in self.estimators.items()}
+
+
+def rolling_vwap(times, prices, volumes, window, slots=DEFAULT_VWAP_SLOTS,
+                 session_offset=DEFAULT_SESSION_OFFSET):
+    """
+    The VWAP after each row, as the estimator of `window` reports it when fed the rows in order.
+
+    Vectorized with cumulative sums, for backtests over whole arrays.
+
+    Args:
+        times (array-like): Epoch seconds, ascending.
+        prices (array-like): Prices.
+        volumes (array-like): Volumes; missing or non-positive volumes add nothing.
+        window (str or float): A VWAP_WINDOWS name, SESSION, or a length in seconds.
+        slots (int): Ring buffer slots of a rolling window.
+        session_offset (float): Seconds after midnight UTC at which sessions start.
+
+    Returns:
+        np.ndarray: The VWAP per row; NaN where the window holds no volume.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        valid = (volumes > 0) & (prices > 0)
+    volumes = np.where(valid, volumes, 0.0)
+    price_volume = np.where(valid, prices, 0.0) * volumes
+    cumulative_price_volume = np.concatenate(([0.0], np.cumsum(price_volume)))
+    cumulative_volume = np.concatenate(([0.0], np.cumsum(volumes)))
+
+    if window == SESSION:
+        keys = np.floor((times - session_offset) / 86400)
+        starts = np.searchsorted(keys, keys, side='left')
+    else:
+        keys = np.floor(times / (VWAP_WINDOWS.get(window, window) / slots))
+        starts = np.searchsorted(keys, keys - slots, side='right')
+    ends = np.arange(1, len(times) + 1)
+    total_volume = cumulative_volume[ends] - cumulative_volume[starts]
+    total_price_volume = cumulative_price_volume[ends] - cumulative_price_volume[starts]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total_volume > 0, total_price_volume / total_volume, np.nan)
@@ -3,9 +3,10 @@ import logging
 import pandas as pd
 import time
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 # import pytz  # Uncomment if using timezone handling
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from strategy import BUY, SELL, TRAIL, VwapStrategy
 
 # Set up logging with custom date format
 logging.basicConfig(
@@ -33,29 +34,14 @@ def send_telegram_message(message):
     
     return response.json()
 
-# Define thresholds for the signals
-overbought_threshold = 0.01  # Price is 1% above VWAP
-oversold_threshold = -0.019   # Price is 1% below VWAP
-
-# Set stop loss and take profit thresholds
-stop_loss_threshold = -0.02  # 2% stop loss
-take_profit_threshold = 0.015  # 1.25% take profit
-
-# Set trailing stop percentage
-trailing_stop_loss_percentage = 0.005  # 0.5% trailing stop
-
-# Initial capital for the live trading
+# The same strategy, thresholds and loss cooldown as the live TradingBot and the backtests
+# (no trading fees are simulated here)
 initial_capital = 12800.0
-capital = initial_capital
-position = None
-entry_price = None
-trailing_stop_price = None  # Variable to track trailing stop price
-highest_price = None  # Variable to track the highest price since entry
+strategy = VwapStrategy(capital=initial_capital)
 last_timestamp = None  # To track the last processed timestamp
-entry_time = None  # To track the entry time of the position
 
 def process_new_data(row):
-    global position, entry_price, capital, trailing_stop_price, highest_price, last_timestamp, entry_time
+    global last_timestamp
     
     try:
         price = float(row['last_price'])
@@ -69,18 +55,14 @@ def process_new_data(row):
         # Update last processed timestamp
         last_timestamp = timestamp
 
-        # Parse and format timestamp
-        timestamp_dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
+        # Parse and format timestamp (the CSV holds UTC times)
+        timestamp_dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
         formatted_timestamp = timestamp_dt.strftime('%B %d, %Y at %I:%M %p')
 
-        # Check for oversold condition (Buy Signal)
-        if (price - vwap) / vwap <= oversold_threshold and position is None:
-            position = 'long'
-            entry_price = price
-            highest_price = price
-            trailing_stop_price = entry_price * (1 - trailing_stop_loss_percentage)
-            entry_time = timestamp_dt
+        events = strategy.on_tick(timestamp_dt.timestamp(), price, vwap)
 
+        # Oversold condition (Buy Signal)
+        if events & BUY:
             message = (
                 f"⚠️ *Buy Signal Triggered*\n"
                 f"Bought at: ${price:.5f} on {formatted_timestamp}"
@@ -88,48 +70,29 @@ def process_new_data(row):
             logger.info(message)
             send_telegram_message(message)
 
-        # Check for trailing stop adjustment and overbought condition (Sell Signal) or take profit/stop loss
-        if position == 'long':
-            # Update the highest price since the entry
-            if price > highest_price:
-                highest_price = price
-                trailing_stop_price = highest_price * (1 - trailing_stop_loss_percentage)
-                logger.info(
-                    f"🔄 Trailing Stop Updated: New Stop Price is ${trailing_stop_price:.5f} "
-                    f"(Highest Price: ${highest_price:.5f})"
-                )
-
-            # Check exit conditions
-            if (price <= trailing_stop_price or 
-                price >= entry_price * (1 + take_profit_threshold) or 
-                price <= entry_price * (1 + stop_loss_threshold)):
-                
-                price_change = (price - entry_price) / entry_price
-                profit_loss = capital * price_change
-                capital += profit_loss
-                exit_time = timestamp_dt
-                time_held = exit_time - entry_time
-
-                # Format time held
-                hours, remainder = divmod(time_held.total_seconds(), 3600)
-                minutes, seconds = divmod(remainder, 60)
-                time_held_formatted = f"{int(hours)}h {int(minutes)}m {int(seconds)}s"
-
-                message = (
-                    f"🚨 *Sell Signal Triggered:*\n"
-                    f"Sold at ${price:.5f} on {formatted_timestamp}\n"
-                    f"Profit/Loss = ${profit_loss:.2f}, Time Held = {time_held_formatted}\n"
-                    f"Updated Capital: ${capital:.2f}"
-                )
-                logger.info(message)
-                send_telegram_message(message)
-
-                # Reset position-related variables
-                position = None
-                entry_price = None
-                trailing_stop_price = None
-                highest_price = None
-                entry_time = None
+        if events & TRAIL and not events & SELL:
+            logger.info(
+                f"🔄 Trailing Stop Updated: New Stop Price is ${strategy.trailing_stop_price:.5f} "
+                f"(Highest Price: ${strategy.highest_price:.5f})"
+            )
+
+        # Trailing stop, take profit or stop loss (Sell Signal)
+        if events & SELL:
+            trade = strategy.last_trade
+
+            # Format time held
+            hours, remainder = divmod(trade.time_held.total_seconds(), 3600)
+            minutes, seconds = divmod(remainder, 60)
+            time_held_formatted = f"{int(hours)}h {int(minutes)}m {int(seconds)}s"
+
+            message = (
+                f"🚨 *Sell Signal Triggered:*\n"
+                f"Sold at ${price:.5f} on {formatted_timestamp}\n"
+                f"Profit/Loss = ${trade.profit_loss:.2f}, Time Held = {time_held_formatted}\n"
+                f"Updated Capital: ${strategy.capital:.2f}"
+            )
+            logger.info(message)
+            send_telegram_message(message)
 
     except Exception as e:
         logger.error(f"An error occurred while processing data: {e}")
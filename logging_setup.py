@@ -0,0 +1,108 @@
+# logging_setup.py
+
+import atexit
+import copy
+import json
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from config import LOG_LEVEL
+
+MAX_LOG_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """Queues records for the listener thread without pre-formatting them into plain text."""
+
+    def prepare(self, record):
+        # Resolve arguments and tracebacks now: they may not be picklable or may change later
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(log_file, level=None, max_bytes=MAX_LOG_BYTES, backup_count=LOG_BACKUP_COUNT):
+    """
+    Send all log records of this process to a rotating JSON-lines file, written by a background thread.
+
+    The root logger gets a single queue handler, so logging from the trading and
+    ingestion loops only enqueues the record and every record is written once,
+    whichever module logged it. Call this once from the entry point of a process;
+    later calls are ignored.
+
+    Args:
+        log_file (str): Path of the log file (e.g., 'xrp_bot.log').
+        level (str or int, optional): Root log level. Defaults to LOG_LEVEL from config.
+        max_bytes (int): Size at which the file is rotated.
+        backup_count (int): Number of rotated files kept.
+
+    Returns:
+        QueueListener: The running listener (stopped automatically at exit).
+    """
+    global _listener
+    if _listener is not None:
+        logging.getLogger(__name__).warning(f"Logging is already set up; ignoring request to log to {log_file}.")
+        return _listener
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_StructuredQueueHandler(log_queue))
+    root.setLevel(level or LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -1,31 +1,91 @@
 # main.py
-import time
+import json
+import os
 import logging
-from trading_bot import TradingBot
+from trading_bot import TradingBotGroup
+from broadcast import Broadcaster
+from database_handler import DatabaseHandler
+from market_data import LatestTickFeed, TickBusFeed
+from config import (
+    METRICS_HOST,
+    STREAM_GRANULARITY,
+    STREAM_VWAP_WINDOW,
+    TRADING_BOT_METRICS_PORT,
+    TRADING_BOTS_FILE,
+    TRADING_SYMBOLS,
+)
+from metrics import Timer, start_metrics_server
+from scheduler import FixedRateScheduler
+from streaming import StreamingTickFeed
+from logging_setup import setup_logging
 from filelock import FileLock
-from logging.handlers import RotatingFileHandler
 
-# Set up logging with rotating handler
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-handler = RotatingFileHandler('live_trading_signals.log', maxBytes=5*1024*1024, backupCount=5)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+logger = logging.getLogger(__name__)
 
-def monitor_live_data(bot):
+# Seconds after each minute boundary at which trading cycles run
+TRADING_CYCLE_OFFSET = 5
+
+def load_bot_configs():
+    """
+    Loads the TradingBot configurations from TRADING_BOTS_FILE, or one default bot per TRADING_SYMBOLS entry.
     """
-    Monitors live data by periodically calling the bot to process new data from the database.
+    if os.path.exists(TRADING_BOTS_FILE):
+        with open(TRADING_BOTS_FILE, 'r') as file:
+            return json.load(file)
+    return [{'symbol': symbol} for symbol in TRADING_SYMBOLS]
+
+def monitor_live_data(bot, interval=60, offset=TRADING_CYCLE_OFFSET):
     """
-    while True:
+    Monitors live data by calling the bot to process new data once per interval.
+
+    By default cycles run a few seconds after each wall-clock minute, once the price logger has stored
+    that minute's ticks; with a streaming feed they run once per tick interval.
+    """
+    def cycle(slot_time):
         try:
-            bot.process_new_data()  # Bot now fetches the latest data directly from the DB
+            with Timer('trading_cycle'):
+                bot.process_new_data()  # Bots fetch the latest data for all symbols from the DB in one query
         except Exception as e:
             logger.error(f"An error occurred while processing live data: {e}")
-        time.sleep(60)  # Sleep for 60 seconds before checking again
 
-if __name__ == "__main__":
+    FixedRateScheduler(interval, offset=offset, name='trading_bot').run(cycle)
+
+def run_trading_bots(tick_bus=None):
+    """
+    Runs the configured trading bots until interrupted.
+
+    Args:
+        tick_bus (SharedTickBus, optional): When run by the supervisor, the latest tickers published by
+            the price logger; symbols it lacks are read from crypto_prices. Ignored when streaming.
+    """
     lock = FileLock("trading_bot.lock")
     with lock:
-        bot = TradingBot()
-        monitor_live_data(bot)
+        start_metrics_server(TRADING_BOT_METRICS_PORT, METRICS_HOST)
+        # Signals are queued for the subscribed chats and sent from background threads
+        broadcaster = Broadcaster().start()
+        bot_configs = load_bot_configs()
+        symbols = [config.get('symbol', 'XRP') for config in bot_configs]
+        db_handler = DatabaseHandler()
+        feed = None
+        if STREAM_GRANULARITY > 0:
+            feed = StreamingTickFeed(symbols, granularity=STREAM_GRANULARITY, vwap_window=STREAM_VWAP_WINDOW)
+            feed.start()
+        elif tick_bus is not None:
+            feed = TickBusFeed(tick_bus, symbols, fallback=LatestTickFeed(db_handler, symbols))
+        bots = TradingBotGroup(bot_configs, db_handler=db_handler, notifier=broadcaster.broadcast, tick_feed=feed)
+        try:
+            if STREAM_GRANULARITY > 0:
+                # Run just after each tick interval closes
+                monitor_live_data(bots, STREAM_GRANULARITY, offset=min(0.1, STREAM_GRANULARITY / 10))
+            else:
+                monitor_live_data(bots)
+        finally:
+            if STREAM_GRANULARITY > 0:
+                feed.close()
+            bots.close()
+            broadcaster.close()
+
+
+if __name__ == "__main__":
+    setup_logging('live_trading_signals.log')
+    run_trading_bots()
@@ -0,0 +1,282 @@
+# market_data.py
+
+import json
+import logging
+import multiprocessing
+import time
+from datetime import datetime, timezone
+
+from records import Tick
+
+logger = logging.getLogger(__name__)
+
+# How long fetched trading fees stay valid; Bitstamp fee tiers change at most daily
+FEE_CACHE_TTL = 60 * 60
+
+# Bytes reserved per symbol on a SharedTickBus; a Bitstamp ticker encodes to about 300
+TICK_BUS_SLOT_SIZE = 2048
+
+# Tickers older than this many seconds (a missed publish) are not served by a SharedTickBus
+TICK_BUS_MAX_AGE = 90
+
+
+class FeeCache:
+    """Caches trading fees per market so many bots share one fetch per TTL."""
+
+    def __init__(self, fetch_fees, ttl=FEE_CACHE_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            fetch_fees (callable): Function taking a market symbol (e.g., 'xrpusd') and
+                returning the fees response, or a dict with an 'error' key on failure.
+            ttl (float): Seconds a fetched fee response is reused.
+        """
+        self.fetch_fees = fetch_fees
+        self.ttl = ttl
+        self._entries = {}
+
+    def get(self, market_symbol):
+        """
+        Return the trading fees for a market, fetching them if the cached copy expired.
+
+        If a refresh fails but an older response is cached, the stale response is
+        returned so a transient API error does not stop trading.
+
+        Args:
+            market_symbol (str): The Bitstamp market symbol (e.g., 'xrpusd').
+
+        Returns:
+            dict: The fees response, or a dict with an 'error' key.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(market_symbol)
+        if entry and now - entry[0] < self.ttl:
+            return entry[1]
+
+        fees = self.fetch_fees(market_symbol)
+        if 'error' in fees:
+            if entry:
+                logger.warning(f"Using stale trading fees for {market_symbol}: {fees['error']}")
+                return entry[1]
+            return fees
+
+        self._entries[market_symbol] = (now, fees)
+        return fees
+
+    def invalidate(self, market_symbol=None):
+        """Drop the cached fees of one market, or of all markets."""
+        if market_symbol is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(market_symbol, None)
+
+
+class LatestTickFeed:
+    """Fetches the newest tick of many symbols with a single query per refresh."""
+
+    # Tick volumes are the exchange's rolling 24h volume, not what traded since the previous tick
+    traded_volume = False
+
+    def __init__(self, db_handler, symbols):
+        """
+        Initialize the feed.
+
+        Args:
+            db_handler (DatabaseHandler): The database handler instance.
+            symbols (iterable of str): The symbols to track (e.g., ['XRP', 'BTC']).
+        """
+        self.db_handler = db_handler
+        self.symbols = sorted(set(symbols))
+        self._latest = {}
+
+    def refresh(self):
+        """
+        Reload the newest tick of every tracked symbol.
+
+        Each symbol is resolved with an index-friendly LIMIT 1 lookup inside one statement.
+
+        Returns:
+            dict: Symbol to Tick (timestamp, last_price, vwap, volume) for symbols with data.
+        """
+        query = """
+            SELECT s.symbol, t.timestamp, t.last_price, t.vwap, t.volume
+            FROM unnest(%(symbols)s::text[]) AS s(symbol)
+            CROSS JOIN LATERAL (
+                SELECT timestamp, last_price, vwap, volume
+                FROM crypto_prices
+                WHERE symbol = s.symbol
+                ORDER BY timestamp DESC
+                LIMIT 1
+            ) AS t;
+        """
+        rows = self.db_handler.fetch_all(query, {'symbols': self.symbols})
+        self._latest = {
+            row['symbol']: Tick.from_row(row)  # Converts Decimal columns to float
+            for row in rows
+            if row['last_price'] is not None and row['vwap'] is not None
+        }
+        return self._latest
+
+    def latest(self, symbol):
+        """
+        Return the newest tick of a symbol from the last refresh.
+
+        Returns:
+            Tick or None: The tick, or None if no data was found for the symbol.
+        """
+        return self._latest.get(symbol)
+
+
+class SharedTickBus:
+    """
+    The latest ticker of each symbol in shared memory, published by one process and read by the others.
+
+    Create it in the parent process and pass it to the workers it starts. Each
+    symbol has a fixed slot holding the ticker JSON and the time it was
+    published; one lock guards all slots, and readers copy the bytes under it
+    and parse them afterwards.
+    """
+
+    def __init__(self, symbols, slot_size=TICK_BUS_SLOT_SIZE, context=None):
+        """
+        Initialize the bus.
+
+        Args:
+            symbols (iterable of str): The symbols carried (e.g., ['XRP', 'BTC']).
+            slot_size (int): Bytes reserved per symbol.
+            context (multiprocessing context, optional): The context the workers are started from.
+        """
+        context = context or multiprocessing.get_context()
+        self.symbols = tuple(dict.fromkeys(symbols))
+        self.slot_size = slot_size
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._lock = context.Lock()
+        self._data = context.RawArray('c', slot_size * len(self.symbols))
+        self._lengths = context.RawArray('i', len(self.symbols))
+        self._published = context.RawArray('d', len(self.symbols))
+
+    def publish(self, symbol, ticker, published=None):
+        """
+        Replace the ticker of a symbol.
+
+        Args:
+            symbol (str): The symbol.
+            ticker (dict): The Bitstamp ticker JSON.
+            published (float, optional): Epoch seconds of the observation. Defaults to now.
+
+        Returns:
+            bool: False if the bus does not carry the symbol or the ticker does not fit its slot.
+        """
+        index = self._index.get(symbol)
+        if index is None:
+            return False
+        payload = json.dumps(ticker, separators=(',', ':')).encode('utf-8')
+        if len(payload) > self.slot_size:
+            logger.warning(f"{symbol} ticker of {len(payload)} bytes does not fit the tick bus slot.")
+            return False
+        start = index * self.slot_size
+        with self._lock:
+            self._data[start:start + len(payload)] = payload
+            self._lengths[index] = len(payload)
+            self._published[index] = published if published is not None else time.time()
+        return True
+
+    def read(self, symbol):
+        """
+        Return the latest ticker of a symbol and when it was published.
+
+        Returns:
+            tuple: (ticker dict, epoch seconds), or (None, None) if nothing was published.
+        """
+        index = self._index.get(symbol)
+        if index is None:
+            return None, None
+        start = index * self.slot_size
+        with self._lock:
+            length = self._lengths[index]
+            payload = self._data[start:start + length]
+            published = self._published[index]
+        if not length:
+            return None, None
+        return json.loads(payload), published
+
+    def ticker(self, symbol, max_age=TICK_BUS_MAX_AGE, wait=0.0):
+        """
+        Return the latest ticker of a symbol if it is fresh.
+
+        Args:
+            symbol (str): The symbol.
+            max_age (float): Oldest acceptable ticker, in seconds.
+            wait (float): Seconds to wait for a fresh ticker to be published.
+
+        Returns:
+            dict or None: The ticker JSON, or None if none was published within max_age.
+        """
+        deadline = time.monotonic() + wait
+        while True:
+            ticker, published = self.read(symbol)
+            if ticker is not None and time.time() - published <= max_age:
+                return ticker
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+
+
+class TickBusFeed:
+    """
+    LatestTickFeed over a SharedTickBus, for bots run by the supervisor.
+
+    Symbols without a fresh ticker on the bus are taken from the fallback feed
+    (usually a LatestTickFeed over crypto_prices), so trading continues while
+    the publishing worker restarts.
+    """
+
+    # Tick volumes are the tickers' rolling 24h volume, as in LatestTickFeed
+    traded_volume = False
+
+    def __init__(self, tick_bus, symbols, fallback=None, max_age=TICK_BUS_MAX_AGE):
+        """
+        Initialize the feed.
+
+        Args:
+            tick_bus (SharedTickBus): The bus to read.
+            symbols (iterable of str): The symbols to track.
+            fallback (optional): Feed with refresh() and latest() used for symbols missing from the bus.
+            max_age (float): Oldest ticker taken from the bus, in seconds.
+        """
+        self.tick_bus = tick_bus
+        self.symbols = sorted(set(symbols))
+        self.fallback = fallback
+        self.max_age = max_age
+        self._latest = {}
+
+    def refresh(self):
+        """
+        Snapshot the newest tick of every tracked symbol.
+
+        Returns:
+            dict: Symbol to Tick for symbols with data.
+        """
+        latest = {}
+        now = time.time()
+        for symbol in self.symbols:
+            ticker, published = self.tick_bus.read(symbol)
+            if ticker is None or now - published > self.max_age:
+                continue
+            tick = Tick.from_ticker(symbol, ticker, timestamp=datetime.fromtimestamp(published, tz=timezone.utc))
+            if tick.last_price is not None and tick.vwap is not None:
+                latest[symbol] = tick
+        missing = [symbol for symbol in self.symbols if symbol not in latest]
+        if missing and self.fallback is not None:
+            self.fallback.refresh()
+            for symbol in missing:
+                tick = self.fallback.latest(symbol)
+                if tick is not None:
+                    latest[symbol] = tick
+        self._latest = latest
+        return latest
+
+    def latest(self, symbol):
+        """Return the newest tick of a symbol as of the last refresh, or None."""
+        return self._latest.get(symbol)
@@ -0,0 +1,248 @@
+# metrics.py
+
+import functools
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Latency bucket upper bounds in seconds, from a local DB round trip to a stalled HTTP call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = 'xrpbot'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class Counter:
+    """A monotonically increasing count, one value per label set."""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, '') for name in self.label_names), 0)
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(zip(self.label_names, key))} {value}")
+        return lines
+
+
+class Gauge:
+    """A value that goes up and down, one value per label set."""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, '') for name in self.label_names))
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(zip(self.label_names, key))} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative latency buckets plus sum and count, one series per label set."""
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            index = 0
+            while index < len(self.buckets) and value > self.buckets[index]:
+                index += 1
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels.get(name, '') for name in self.label_names))
+        return series[2] if series else 0
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                labels = list(zip(self.label_names, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics of one process, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+        self.started_at = time.time()
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = [
+            f"# HELP {METRIC_PREFIX}_process_start_time_seconds Start time of the process (Unix epoch).",
+            f"# TYPE {METRIC_PREFIX}_process_start_time_seconds gauge",
+            f"{METRIC_PREFIX}_process_start_time_seconds {self.started_at}",
+        ]
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+OPERATION_DURATION = REGISTRY.register(Histogram(
+    f'{METRIC_PREFIX}_operation_duration_seconds',
+    'Wall-clock duration of instrumented operations.',
+    ('operation',),
+))
+OPERATION_FAILURES = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_operation_failures_total',
+    'Instrumented operations that raised or returned a failure result.',
+    ('operation',),
+))
+
+
+class Timer:
+    """
+    Times an operation into OPERATION_DURATION, as a decorator or a context manager.
+
+    Failures are counted in OPERATION_FAILURES: exceptions always, and results
+    for which the optional ``failed`` predicate returns True (most functions in
+    this project log errors and return None/False instead of raising).
+
+    Usage:
+        @Timer('bitstamp_ticker', failed=lambda result: result is None)
+        def fetch_price(url): ...
+
+        with Timer('price_logger_cycle'):
+            ...
+    """
+
+    def __init__(self, operation, failed=None):
+        self.operation = operation
+        self.failed = failed
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                OPERATION_FAILURES.inc(operation=self.operation)
+                raise
+            finally:
+                OPERATION_DURATION.observe(time.perf_counter() - start, operation=self.operation)
+            if self.failed is not None and self.failed(result):
+                OPERATION_FAILURES.inc(operation=self.operation)
+            return result
+        return wrapper
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        OPERATION_DURATION.observe(time.perf_counter() - self._start, operation=self.operation)
+        if exc_type is not None:
+            OPERATION_FAILURES.inc(operation=self.operation)
+        return False
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood stderr
+        pass
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """
+    Serve the metrics on http://<host>:<port>/metrics from a daemon thread.
+
+    Args:
+        port (int): The TCP port; 0 or None disables the endpoint.
+        host (str): The interface to bind. Defaults to localhost only.
+
+    Returns:
+        ThreadingHTTPServer or None: The running server, or None if disabled or the port is unavailable.
+    """
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    except OSError as e:
+        logger.error(f"Could not start metrics endpoint on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,354 @@
+# price_alerts.py
+
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+
+from broadcast import Broadcaster
+
+logger = logging.getLogger(__name__)
+
+# Alert kinds: a price level crossed in either direction, or a move of some percent from the price at registration
+CROSS = 'cross'
+MOVE = 'move'
+
+CREATE_PRICE_ALERTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS price_alerts (
+        id BIGSERIAL PRIMARY KEY,
+        chat_id BIGINT NOT NULL,
+        symbol VARCHAR(16) NOT NULL,
+        kind VARCHAR(8) NOT NULL,
+        level NUMERIC,
+        percent NUMERIC,
+        reference_price NUMERIC,
+        active BOOLEAN NOT NULL DEFAULT TRUE,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        triggered_at TIMESTAMPTZ,
+        triggered_price NUMERIC
+    );
+    CREATE INDEX IF NOT EXISTS price_alerts_updated_at_idx ON price_alerts (updated_at);
+"""
+
+ALERT_COLUMNS = "id, chat_id, symbol, kind, level, percent, reference_price, active"
+
+# Alerts changed this long before the previous refresh are read again, in case their transaction committed late
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+# Upper bound on active alerts per chat
+MAX_ALERTS_PER_CHAT = 50
+
+
+def ensure_price_alert_table(db_handler):
+    """Create the price_alerts table if it does not exist."""
+    return db_handler.execute(CREATE_PRICE_ALERTS_TABLE)
+
+
+class PriceAlert:
+    """One user-defined alert; fires once and is then deactivated."""
+
+    __slots__ = ('id', 'chat_id', 'symbol', 'kind', 'level', 'percent', 'reference_price')
+
+    def __init__(self, id, chat_id, symbol, kind, level=None, percent=None, reference_price=None):
+        self.id = id
+        self.chat_id = chat_id
+        self.symbol = symbol
+        self.kind = kind
+        self.level = level
+        self.percent = percent
+        self.reference_price = reference_price
+
+    @classmethod
+    def from_row(cls, row):
+        """Build an alert from a price_alerts row, converting NUMERIC columns to float."""
+        def number(value):
+            return float(value) if value is not None else None
+        return cls(
+            row['id'], row['chat_id'], row['symbol'], row['kind'],
+            number(row['level']), number(row['percent']), number(row['reference_price']),
+        )
+
+    def levels(self):
+        """The price levels whose crossing fires this alert."""
+        if self.kind == CROSS:
+            return (self.level,)
+        change = self.percent / 100
+        return (self.reference_price * (1 + change), self.reference_price * (1 - change))
+
+    def describe(self):
+        if self.kind == CROSS:
+            return f"#{self.id} {self.symbol} crosses ${self.level:.5f}"
+        return f"#{self.id} {self.symbol} moves {self.percent:g}% from ${self.reference_price:.5f}"
+
+    def message(self, previous_price, price):
+        direction = "📈 crossed above" if price > previous_price else "📉 crossed below"
+        if self.kind == CROSS:
+            detail = f"{direction} ${self.level:.5f}"
+        else:
+            detail = f"moved {price / self.reference_price - 1:+.2%} from ${self.reference_price:.5f}"
+        return (
+            f"🔔 *Price Alert #{self.id}*\n\n"
+            f"🪙 *Pair:* {self.symbol}/USD\n"
+            f"{detail}\n"
+            f"💰 *Price:* ${price:.5f}"
+        )
+
+
+class AlertIndex:
+    """
+    Alert price levels of one symbol, kept sorted.
+
+    A tick from previous to current price fires exactly the levels between the
+    two, found with two binary searches, so matching costs O(log n + k) for n
+    levels and k hits.
+    """
+
+    def __init__(self):
+        self.levels = []
+        self.alert_ids = []
+
+    def __len__(self):
+        return len(self.levels)
+
+    def add(self, level, alert_id):
+        index = bisect_right(self.levels, level)
+        self.levels.insert(index, level)
+        self.alert_ids.insert(index, alert_id)
+
+    def remove(self, level, alert_id):
+        index = bisect_left(self.levels, level)
+        while index < len(self.levels) and self.levels[index] == level:
+            if self.alert_ids[index] == alert_id:
+                del self.levels[index]
+                del self.alert_ids[index]
+                return True
+            index += 1
+        return False
+
+    def crossed(self, previous_price, price):
+        """
+        Return the ids of alerts with a level crossed by moving from previous_price to price.
+
+        Rising, levels in (previous, price] are crossed; falling, levels in [price, previous).
+        """
+        if price > previous_price:
+            start, end = bisect_right(self.levels, previous_price), bisect_right(self.levels, price)
+        elif price < previous_price:
+            start, end = bisect_left(self.levels, price), bisect_left(self.levels, previous_price)
+        else:
+            return []
+        return self.alert_ids[start:end]
+
+
+class PriceAlertBook:
+    """
+    The active price alerts of some symbols, matched against every tick in memory.
+
+    Alerts are registered in the price_alerts table (e.g., by the Telegram bot);
+    refresh() picks up new and cancelled ones incrementally, and on_tick() fires
+    and deactivates the alerts a tick crossed. Their notifications are only
+    queued, so a slow or unreachable Telegram never holds up the tick loop.
+    """
+
+    def __init__(self, db_handler, symbols, notifier=None, clock=None):
+        """
+        Initialize the book and load the active alerts.
+
+        Args:
+            db_handler (DatabaseHandler): The database handler instance.
+            symbols (iterable of str): The symbols whose ticks this process sees.
+            notifier (callable, optional): Called as notifier(message, chat_id=...); must not block.
+                Defaults to the send() of a Broadcaster, started when the first alert fires.
+            clock (callable, optional): Returns the current time (timezone-aware, UTC).
+        """
+        self.db_handler = db_handler
+        self.symbols = list(symbols)
+        self.notifier = notifier
+        self.broadcaster = None  # Owned Broadcaster behind the default notifier
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.alerts = {}
+        self.indexes = {symbol: AlertIndex() for symbol in self.symbols}
+        self.last_prices = {}
+        self.triggered = {}  # Alert id -> (previous price, price) of its crossing, until it is deactivated
+        self.last_refresh = None
+        ensure_price_alert_table(db_handler)
+        self.refresh()
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def refresh(self):
+        """Apply alerts added or cancelled since the previous refresh (all active ones the first time)."""
+        if self.last_refresh is None:
+            query = f"""
+                SELECT {ALERT_COLUMNS}, NOW() AS read_at FROM price_alerts
+                WHERE active AND symbol = ANY(%(symbols)s);
+            """
+            params = {'symbols': self.symbols}
+        else:
+            query = f"""
+                SELECT {ALERT_COLUMNS}, NOW() AS read_at FROM price_alerts
+                WHERE updated_at >= %(since)s AND symbol = ANY(%(symbols)s);
+            """
+            params = {'symbols': self.symbols, 'since': self.last_refresh - REFRESH_OVERLAP}
+        rows = self.db_handler.fetch_all(query, params)
+        for row in rows:
+            if row['active']:
+                self.add(PriceAlert.from_row(row))
+            else:
+                self.discard(row['id'])
+        if rows:
+            self.last_refresh = rows[0]['read_at']
+        elif self.last_refresh is None:
+            self.last_refresh = self.clock()
+
+    def add(self, alert):
+        """Index an alert, replacing an earlier version with the same id (a pending crossing is kept)."""
+        self._unindex(alert.id)
+        if alert.symbol not in self.indexes:
+            return
+        self.alerts[alert.id] = alert
+        for level in alert.levels():
+            self.indexes[alert.symbol].add(level, alert.id)
+
+    def discard(self, alert_id):
+        """Remove an alert from the index, if present."""
+        self.triggered.pop(alert_id, None)
+        return self._unindex(alert_id)
+
+    def _unindex(self, alert_id):
+        alert = self.alerts.pop(alert_id, None)
+        if alert is not None:
+            for level in alert.levels():
+                self.indexes[alert.symbol].remove(level, alert.id)
+        return alert
+
+    def on_tick(self, symbol, price):
+        """
+        Fire the alerts crossed since the previous tick of a symbol.
+
+        An alert fires once it is deactivated in the database. If that fails, it
+        stays indexed and is retried on the next tick, so it is neither lost
+        nor fired twice.
+
+        Args:
+            symbol (str): The symbol of the tick.
+            price (float): The tick's last price.
+
+        Returns:
+            list of PriceAlert: The alerts fired (and deactivated) by this tick, including retried ones.
+        """
+        previous_price = self.last_prices.get(symbol)
+        self.last_prices[symbol] = price
+        index = self.indexes.get(symbol)
+        if previous_price is not None and index is not None and price is not None:
+            # A move alert has two levels, but only fires once
+            for alert_id in index.crossed(previous_price, price):
+                self.triggered.setdefault(alert_id, (previous_price, price))
+        if not self.triggered:
+            return []
+
+        query = """
+            UPDATE price_alerts AS a
+            SET active = FALSE, triggered_at = %(now)s, triggered_price = t.price, updated_at = NOW()
+            FROM unnest(%(ids)s::bigint[], %(prices)s::numeric[]) AS t(id, price)
+            WHERE a.id = t.id AND a.active
+            RETURNING a.id;
+        """
+        ids = list(self.triggered)
+        params = {'now': self.clock(), 'ids': ids, 'prices': [self.triggered[alert_id][1] for alert_id in ids]}
+        rows = self.db_handler.execute_returning(query, params)
+        if rows is None:
+            logger.error(f"Failed to mark {len(ids)} price alerts as triggered; retrying on the next tick.")
+            return []
+
+        deactivated = {row['id'] for row in rows}
+        fired = []
+        for alert_id in ids:
+            crossing = self.triggered[alert_id]
+            alert = self.discard(alert_id)
+            if alert_id in deactivated:  # Others were cancelled in the meantime
+                fired.append((alert, crossing))
+        if not fired:
+            return []
+
+        if self.notifier is None:
+            # Sends from its own threads and database connection, with retries and Telegram's rate limits
+            self.broadcaster = Broadcaster().start()
+            self.notifier = self.broadcaster.send
+        for alert, (previous_price, price) in fired:
+            logger.info(f"Price alert fired: {alert.describe()} at ${price:.5f}")
+            self.notifier(alert.message(previous_price, price), chat_id=alert.chat_id)
+        return [alert for alert, _ in fired]
+
+    def close(self, timeout=30):
+        """Wait up to timeout seconds for queued notifications to be sent, then stop the default notifier."""
+        if self.broadcaster is not None:
+            self.broadcaster.close(timeout)
+
+
+def add_price_alert(db_handler, chat_id, symbol, kind, value, reference_price=None):
+    """
+    Register an alert for a chat.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        chat_id (int): The Telegram chat to notify.
+        symbol (str): The cryptocurrency symbol (e.g., 'XRP').
+        kind (str): CROSS (value is a price level) or MOVE (value is a percentage).
+        value (float): The level or the percentage.
+        reference_price (float, optional): The current price, required for MOVE alerts.
+
+    Returns:
+        PriceAlert or None: The stored alert, or None if it was rejected or could not be saved.
+    """
+    if value is None or value <= 0 or (kind == MOVE and not reference_price):
+        return None
+    count = db_handler.fetch_one(
+        "SELECT COUNT(*) AS alerts FROM price_alerts WHERE chat_id = %(chat_id)s AND active;",
+        {'chat_id': chat_id},
+    )
+    if count and count['alerts'] >= MAX_ALERTS_PER_CHAT:
+        logger.warning(f"Chat {chat_id} already has {count['alerts']} active price alerts.")
+        return None
+
+    query = f"""
+        INSERT INTO price_alerts (chat_id, symbol, kind, level, percent, reference_price)
+        VALUES (%(chat_id)s, %(symbol)s, %(kind)s, %(level)s, %(percent)s, %(reference_price)s)
+        RETURNING {ALERT_COLUMNS};
+    """
+    params = {
+        'chat_id': chat_id,
+        'symbol': symbol,
+        'kind': kind,
+        'level': value if kind == CROSS else None,
+        'percent': value if kind == MOVE else None,
+        'reference_price': reference_price if kind == MOVE else None,
+    }
+    rows = db_handler.execute_returning(query, params)
+    return PriceAlert.from_row(rows[0]) if rows else None
+
+
+def list_price_alerts(db_handler, chat_id):
+    """Return the active alerts of a chat, oldest first."""
+    query = f"""
+        SELECT {ALERT_COLUMNS} FROM price_alerts
+        WHERE chat_id = %(chat_id)s AND active
+        ORDER BY id;
+    """
+    return [PriceAlert.from_row(row) for row in db_handler.fetch_all(query, {'chat_id': chat_id})]
+
+
+def cancel_price_alert(db_handler, chat_id, alert_id):
+    """
+    Deactivate one alert of a chat.
+
+    Returns:
+        bool: True if an active alert with that id belonged to the chat.
+    """
+    query = """
+        UPDATE price_alerts SET active = FALSE, updated_at = NOW()
+        WHERE id = %(id)s AND chat_id = %(chat_id)s AND active
+        RETURNING id;
+    """
+    return bool(db_handler.execute_returning(query, {'id': alert_id, 'chat_id': chat_id}))
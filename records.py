@@ -0,0 +1,299 @@
+# records.py
+
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Columns of crypto_prices in insert order
+TICK_FIELDS = (
+    'timestamp', 'symbol', 'last_price', 'high_price', 'low_price', 'vwap', 'volume',
+    'bid', 'ask', 'open_price', 'percent_change_24h', 'percent_change',
+)
+
+INSERT_TICK_QUERY = f"""
+    INSERT INTO crypto_prices ({', '.join(TICK_FIELDS)})
+    VALUES ({', '.join(['%s'] * len(TICK_FIELDS))});
+"""
+
+# Numeric tick columns held by TickBatch, besides the timestamps
+BATCH_COLUMNS = ('last_price', 'vwap', 'bid', 'ask', 'volume')
+
+
+def _to_float(value):
+    """Convert an API string or database Decimal to float, keeping missing values as None."""
+    if value is None or value == '':
+        return None
+    return float(value)
+
+
+class Tick:
+    """A single price observation of one symbol."""
+
+    __slots__ = TICK_FIELDS
+
+    def __init__(self, timestamp, symbol, last_price, high_price=None, low_price=None, vwap=None,
+                 volume=None, bid=None, ask=None, open_price=None, percent_change_24h=None,
+                 percent_change=None):
+        self.timestamp = timestamp
+        self.symbol = symbol
+        self.last_price = last_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.vwap = vwap
+        self.volume = volume
+        self.bid = bid
+        self.ask = ask
+        self.open_price = open_price
+        self.percent_change_24h = percent_change_24h
+        self.percent_change = percent_change
+
+    @classmethod
+    def from_ticker(cls, symbol, data, timestamp=None, percent_change=None):
+        """
+        Build a tick from a Bitstamp ticker response.
+
+        Args:
+            symbol (str): The cryptocurrency symbol (e.g., 'XRP').
+            data (dict): The ticker JSON (string values, as returned by the API).
+            timestamp (datetime, optional): Observation time. Defaults to now (UTC).
+            percent_change (float, optional): Change against the previously stored price.
+
+        Returns:
+            Tick: The parsed tick.
+        """
+        return cls(
+            timestamp=timestamp or datetime.now(timezone.utc),
+            symbol=symbol,
+            last_price=_to_float(data.get('last')),
+            high_price=_to_float(data.get('high')),
+            low_price=_to_float(data.get('low')),
+            vwap=_to_float(data.get('vwap')),
+            volume=_to_float(data.get('volume')),
+            bid=_to_float(data.get('bid')),
+            ask=_to_float(data.get('ask')),
+            open_price=_to_float(data.get('open')),
+            percent_change_24h=_to_float(data.get('percent_change_24')),
+            percent_change=percent_change,
+        )
+
+    @classmethod
+    def from_row(cls, row, symbol=None):
+        """
+        Build a tick from a crypto_prices row; missing columns are left as None.
+
+        Args:
+            row (dict): A database row (e.g., a RealDictRow).
+            symbol (str, optional): Symbol to use when the row has no symbol column.
+
+        Returns:
+            Tick: The tick with Decimal columns converted to float.
+        """
+        return cls(
+            timestamp=row['timestamp'],
+            symbol=row.get('symbol', symbol),
+            last_price=_to_float(row.get('last_price')),
+            high_price=_to_float(row.get('high_price')),
+            low_price=_to_float(row.get('low_price')),
+            vwap=_to_float(row.get('vwap')),
+            volume=_to_float(row.get('volume')),
+            bid=_to_float(row.get('bid')),
+            ask=_to_float(row.get('ask')),
+            open_price=_to_float(row.get('open_price')),
+            percent_change_24h=_to_float(row.get('percent_change_24h')),
+            percent_change=_to_float(row.get('percent_change')),
+        )
+
+    def as_row(self):
+        """Return the tick as a tuple in TICK_FIELDS order, ready for an INSERT."""
+        return tuple(getattr(self, field) for field in TICK_FIELDS)
+
+    def __repr__(self):
+        return f"Tick({self.symbol} {self.timestamp} last={self.last_price} vwap={self.vwap})"
+
+
+class Trade:
+    """A round trip: one entry and, once closed, its exit."""
+
+    __slots__ = (
+        'symbol', 'entry_time', 'entry_price', 'exit_time', 'exit_price',
+        'capital', 'fees', 'profit_loss',
+    )
+
+    def __init__(self, symbol, entry_time, entry_price, capital=None, fees=0.0):
+        self.symbol = symbol
+        self.entry_time = entry_time
+        self.entry_price = entry_price
+        self.capital = capital
+        self.fees = fees
+        self.exit_time = None
+        self.exit_price = None
+        self.profit_loss = None
+
+    def close(self, exit_time, exit_price, profit_loss, fees=0.0):
+        """Record the exit of the trade."""
+        self.exit_time = exit_time
+        self.exit_price = exit_price
+        self.profit_loss = profit_loss
+        self.fees += fees
+
+    @property
+    def is_open(self):
+        return self.exit_time is None
+
+    @property
+    def percent_change(self):
+        """Price change from entry to exit as a fraction, or None while open."""
+        if self.exit_price is None:
+            return None
+        return (self.exit_price - self.entry_price) / self.entry_price
+
+    @property
+    def time_held(self):
+        """Holding time as a timedelta, or None while open."""
+        if self.exit_time is None:
+            return None
+        return self.exit_time - self.entry_time
+
+    def __repr__(self):
+        return (
+            f"Trade({self.symbol} {self.entry_time} @ {self.entry_price} -> "
+            f"{self.exit_time} @ {self.exit_price}, P/L={self.profit_loss})"
+        )
+
+
+class TickBatch:
+    """
+    Columnar container of ticks for one symbol.
+
+    Timestamps are stored as float epoch seconds (UTC) and every column is a
+    contiguous array('d'), so batches cost 8 bytes per value and to_numpy()
+    returns views over the same memory instead of copies. Missing values are NaN.
+    """
+
+    __slots__ = ('symbol', 'timestamps') + BATCH_COLUMNS
+
+    def __init__(self, symbol=None):
+        self.symbol = symbol
+        self.timestamps = array('d')
+        for column in BATCH_COLUMNS:
+            setattr(self, column, array('d'))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append(self, timestamp, last_price, vwap=None, bid=None, ask=None, volume=None):
+        """
+        Append one observation.
+
+        Args:
+            timestamp (datetime or float): The observation time (naive datetimes are treated as UTC).
+            last_price (float): The last traded price.
+            vwap, bid, ask, volume (float, optional): Further columns; None is stored as NaN.
+        """
+        if isinstance(timestamp, datetime):
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            timestamp = timestamp.timestamp()
+        nan = float('nan')
+        self.timestamps.append(timestamp)
+        self.last_price.append(last_price)
+        self.vwap.append(nan if vwap is None else vwap)
+        self.bid.append(nan if bid is None else bid)
+        self.ask.append(nan if ask is None else ask)
+        self.volume.append(nan if volume is None else volume)
+
+    def append_tick(self, tick):
+        """Append a Tick."""
+        self.append(tick.timestamp, tick.last_price, tick.vwap, tick.bid, tick.ask, tick.volume)
+
+    @classmethod
+    def from_rows(cls, rows, symbol=None):
+        """
+        Build a batch from crypto_prices rows (dicts) ordered by timestamp.
+
+        Args:
+            rows (iterable of dict): Rows with at least timestamp and last_price.
+            symbol (str, optional): The symbol of the rows.
+
+        Returns:
+            TickBatch: The batch.
+        """
+        batch = cls(symbol)
+        for row in rows:
+            batch.append(
+                row['timestamp'],
+                float(row['last_price']),
+                _to_float(row.get('vwap')),
+                _to_float(row.get('bid')),
+                _to_float(row.get('ask')),
+                _to_float(row.get('volume')),
+            )
+        return batch
+
+    @classmethod
+    def from_dataframe(cls, df, symbol=None):
+        """
+        Build a batch from a DataFrame with a 'timestamp' column and price columns.
+
+        Args:
+            df (DataFrame): Price data ordered by timestamp.
+            symbol (str, optional): The symbol of the rows.
+
+        Returns:
+            TickBatch: The batch.
+        """
+        batch = cls(symbol)
+        timestamps = pd.to_datetime(df['timestamp'], utc=True)
+        epoch = pd.Timestamp('1970-01-01', tz='UTC')
+        batch.timestamps = array('d', (timestamps - epoch).dt.total_seconds().tolist())
+        for column in BATCH_COLUMNS:
+            if column in df:
+                values = pd.to_numeric(df[column], errors='coerce').astype('float64').tolist()
+            else:
+                values = [float('nan')] * len(df)
+            setattr(batch, column, array('d', values))
+        return batch
+
+    @classmethod
+    def from_numpy(cls, columns, symbol=None):
+        """
+        Build a batch by copying NumPy columns (e.g., slices of a shared array).
+
+        Args:
+            columns (dict): 'timestamps' and any of BATCH_COLUMNS to float arrays of equal length;
+                missing columns are filled with NaN.
+            symbol (str, optional): The symbol of the rows.
+
+        Returns:
+            TickBatch: The batch.
+        """
+        batch = cls(symbol)
+        timestamps = np.ascontiguousarray(columns['timestamps'], dtype=np.float64)
+        batch.timestamps.frombytes(timestamps.tobytes())
+        for column in BATCH_COLUMNS:
+            values = columns.get(column)
+            if values is None:
+                values = np.full(len(timestamps), np.nan)
+            getattr(batch, column).frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        return batch
+
+    def tick_time(self, index):
+        """Return the timestamp at an index as a timezone-aware datetime."""
+        return datetime.fromtimestamp(self.timestamps[index], tz=timezone.utc)
+
+    def to_numpy(self):
+        """
+        Return zero-copy NumPy views of every column.
+
+        The batch cannot be appended to while the views are alive (array('d')
+        refuses to resize an exported buffer).
+
+        Returns:
+            dict: Column name ('timestamps', 'last_price', ...) to float64 ndarray.
+        """
+        columns = {'timestamps': np.frombuffer(self.timestamps, dtype=np.float64)}
+        for column in BATCH_COLUMNS:
+            columns[column] = np.frombuffer(getattr(self, column), dtype=np.float64)
+        return columns
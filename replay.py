@@ -0,0 +1,300 @@
+# replay.py
+
+import argparse
+import bisect
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from database_handler import DatabaseHandler
+from market_data import FeeCache
+from records import TickBatch, Tick
+
+logger = logging.getLogger(__name__)
+
+# Maker fee (percent) reported by the stubbed fee source unless another is given
+DEFAULT_FEE_PERCENTAGE = 0.3
+
+
+class SimulatedClock:
+    """A clock the replay sets to the time of each recorded tick."""
+
+    def __init__(self, start=None):
+        self._now = start
+
+    def __call__(self):
+        return self._now
+
+    def set(self, now):
+        """Move the clock to the given time."""
+        self._now = now
+
+    def advance(self, seconds):
+        """Move the clock forward by a number of seconds."""
+        self._now += timedelta(seconds=seconds)
+
+
+class ReplayTickFeed:
+    """Stands in for LatestTickFeed, serving the tick currently being replayed."""
+
+    traded_volume = False
+
+    def __init__(self):
+        self._latest = {}
+
+    def set(self, tick):
+        self._latest[tick.symbol] = tick
+
+    def latest(self, symbol):
+        return self._latest.get(symbol)
+
+
+class ReplayDatabaseHandler:
+    """
+    In-memory stand-in for DatabaseHandler.
+
+    Writes are recorded instead of executed. Reads of crypto_prices with a
+    start_time parameter are answered from the replayed history, up to the
+    simulated clock, so queries never see ticks from the future. Every other
+    read returns nothing, as on a fresh database.
+    """
+
+    def __init__(self, history, clock):
+        """
+        Initialize the handler.
+
+        Args:
+            history (TickBatch): The ticks being replayed.
+            clock (SimulatedClock): The replay clock.
+        """
+        self.history = history
+        self.clock = clock
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        return True
+
+    def execute_values(self, query, rows, page_size=100):
+        self.executed.append((query, rows))
+        return True
+
+    def execute_autocommit(self, query, params=None):
+        self.executed.append((query, params))
+        return True
+
+    def fetch_one(self, query, params=None):
+        return None
+
+    def fetch_all(self, query, params=None):
+        if 'FROM crypto_prices' not in query or not params or 'start_time' not in params:
+            return []
+        timestamps = self.history.timestamps
+        start = bisect.bisect_left(timestamps, params['start_time'].timestamp())
+        end = bisect.bisect_right(timestamps, self.clock().timestamp())
+        return [
+            {'timestamp': self.history.tick_time(i), 'last_price': self.history.last_price[i]}
+            for i in range(start, end)
+        ]
+
+    def close(self):
+        pass
+
+
+class _MediaUpload:
+    def __init__(self, media_id_string):
+        self.media_id_string = media_id_string
+
+
+class RecordingTwitterClient:
+    """Stands in for tweepy.Client and tweepy.API, recording tweets instead of posting them."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.tweets = []
+        self.uploads = []
+
+    def create_tweet(self, text, media_ids=None):
+        self.tweets.append({'timestamp': self.clock(), 'text': text, 'media_ids': media_ids})
+        return {'data': {'id': str(len(self.tweets))}}
+
+    def media_upload(self, filename):
+        self.uploads.append(filename)
+        return _MediaUpload(str(len(self.uploads)))
+
+
+def stub_fee_cache(fee_percentage=DEFAULT_FEE_PERCENTAGE):
+    """Return a FeeCache that always reports the given maker fee, without calling Bitstamp."""
+    return FeeCache(lambda market_symbol: {'fees': {'maker': str(fee_percentage)}})
+
+
+def replay_trading_bot(batch, initial_capital, bot_id='replay', thresholds=None,
+                       fee_percentage=DEFAULT_FEE_PERCENTAGE):
+    """
+    Feed recorded ticks through TradingBot.process_new_data.
+
+    The bot starts from a fresh state, sees each tick as the newest one in the
+    database with the clock set to its timestamp, and its messages are
+    collected instead of being sent to Telegram.
+
+    Args:
+        batch (TickBatch): The ticks to replay, ordered by timestamp.
+        initial_capital (float): The starting capital.
+        bot_id (str): The bot identifier used in signals and state.
+        thresholds (dict, optional): Threshold overrides, as for TradingBot.
+        fee_percentage (float): Maker fee in percent reported by the stubbed fee source.
+
+    Returns:
+        dict: The closed trades, the notifications, the final capital and the replay statistics.
+    """
+    # Imported here as trading_bot requires Bitstamp credentials at import time
+    from trading_bot import TradingBot
+
+    clock = SimulatedClock(batch.tick_time(0) if len(batch) else datetime.now(timezone.utc))
+    feed = ReplayTickFeed()
+    db_handler = ReplayDatabaseHandler(batch, clock)
+    notifications = []
+
+    bot = TradingBot(
+        symbol=batch.symbol, bot_id=bot_id, thresholds=thresholds, initial_capital=initial_capital,
+        db_handler=db_handler, fee_cache=stub_fee_cache(fee_percentage), tick_feed=feed,
+        clock=clock, notifier=lambda message: notifications.append({'timestamp': clock(), 'text': message}),
+    )
+
+    trades = []
+    started = time.perf_counter()
+    for i in range(len(batch)):
+        timestamp = batch.tick_time(i)
+        clock.set(timestamp)
+        feed.set(Tick(timestamp, batch.symbol, batch.last_price[i], vwap=batch.vwap[i], volume=batch.volume[i]))
+        bot.process_new_data()
+        if bot.last_trade is not None and (not trades or trades[-1] is not bot.last_trade):
+            trades.append(bot.last_trade)
+    bot.close()
+
+    return {
+        'ticks': len(batch),
+        'trades': trades,
+        'notifications': notifications,
+        'final_capital': bot.capital,
+        'open_position': bot.position,
+        'db_writes': len(db_handler.executed),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def replay_alert_bot(batch, render_charts=False):
+    """
+    Feed recorded XRP ticks through XRPPriceAlertBot.main_loop.
+
+    Each tick is served as the Bitstamp ticker response of one loop iteration,
+    with the clock set to the tick's timestamp and sleeps skipped. Tweets are
+    recorded instead of being posted.
+
+    Args:
+        batch (TickBatch): The XRP ticks to replay, ordered by timestamp.
+        render_charts (bool): Whether 3-hour summaries render charts (slow).
+
+    Returns:
+        dict: The recorded tweets and the replay statistics.
+    """
+    from xrppricealerts import XRPPriceAlertBot
+
+    clock = SimulatedClock(batch.tick_time(0) if len(batch) else datetime.now(timezone.utc))
+    db_handler = ReplayDatabaseHandler(batch, clock)
+    twitter = RecordingTwitterClient(clock)
+    current = {}
+
+    bot = XRPPriceAlertBot(
+        client=twitter, api=twitter, db_handler=db_handler, clock=clock,
+        sleep=lambda seconds: None, price_source=lambda: dict(current),
+        render_charts=render_charts,
+    )
+
+    started = time.perf_counter()
+    for i in range(len(batch)):
+        clock.set(batch.tick_time(i))
+        current.clear()
+        current['last'] = str(batch.last_price[i])
+        for column in ('vwap', 'bid', 'ask', 'volume'):
+            value = getattr(batch, column)[i]
+            if value == value:  # Skip NaN (missing) columns
+                current[column] = str(value)
+        bot.main_loop()
+
+    return {
+        'ticks': len(batch),
+        'tweets': twitter.tweets,
+        'db_writes': len(db_handler.executed),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def load_history(symbol, since, until=None):
+    """
+    Load recorded ticks of a symbol from crypto_prices.
+
+    Args:
+        symbol (str): The cryptocurrency symbol (e.g., 'XRP').
+        since (datetime): Start of the range (inclusive).
+        until (datetime, optional): End of the range (exclusive). Defaults to now.
+
+    Returns:
+        TickBatch: The ticks ordered by timestamp.
+    """
+    query = """
+        SELECT timestamp, last_price, vwap, bid, ask, volume
+        FROM crypto_prices
+        WHERE symbol = %(symbol)s AND timestamp >= %(since)s AND timestamp < %(until)s
+          AND last_price IS NOT NULL
+        ORDER BY timestamp ASC;
+    """
+    params = {'symbol': symbol, 'since': since, 'until': until or datetime.now(timezone.utc)}
+    with DatabaseHandler() as db_handler:
+        rows = db_handler.fetch_all(query, params)
+    return TickBatch.from_rows(rows, symbol)
+
+
+def _parse_date(value):
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded ticks through the live bots offline.")
+    parser.add_argument('bot', choices=('trading', 'alerts'), help="Which bot to replay.")
+    parser.add_argument('--symbol', default='XRP', help="Symbol to replay (the alert bot is XRP only).")
+    parser.add_argument('--since', type=_parse_date, required=True, help="Start date (YYYY-MM-DD, UTC).")
+    parser.add_argument('--until', type=_parse_date, help="End date (YYYY-MM-DD, UTC). Defaults to now.")
+    parser.add_argument('--capital', type=float, default=1000.0, help="Initial capital of the trading bot.")
+    parser.add_argument('--fee', type=float, default=DEFAULT_FEE_PERCENTAGE, help="Maker fee in percent.")
+    parser.add_argument('--charts', action='store_true', help="Render 3-hour summary charts.")
+    parser.add_argument('--verbose', action='store_true', help="Print every signal or tweet.")
+    args = parser.parse_args()
+
+    # The bots log every tick at INFO; replaying a month of them should not rewrite their log files
+    logging.disable(logging.INFO)
+
+    batch = load_history('XRP' if args.bot == 'alerts' else args.symbol, args.since, args.until)
+    if not len(batch):
+        print("No ticks found in the requested range.")
+        return
+
+    if args.bot == 'trading':
+        report = replay_trading_bot(batch, args.capital, fee_percentage=args.fee)
+        events = report['notifications']
+        print(f"Replayed {report['ticks']} {batch.symbol} ticks in {report['elapsed']:.2f}s")
+        print(f"Closed trades: {len(report['trades'])}, open position: {report['open_position'] or 'none'}")
+        print(f"Final capital: ${report['final_capital']:.2f}")
+    else:
+        report = replay_alert_bot(batch, render_charts=args.charts)
+        events = report['tweets']
+        print(f"Replayed {report['ticks']} XRP ticks in {report['elapsed']:.2f}s")
+        print(f"Tweets: {len(events)}")
+
+    if args.verbose:
+        for event in events:
+            print(f"\n[{event['timestamp']:%Y-%m-%d %H:%M:%S}]\n{event['text']}")
+
+
+if __name__ == "__main__":
+    main()
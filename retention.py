@@ -0,0 +1,375 @@
+# retention.py
+
+import argparse
+import csv
+import gzip
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from database_handler import DatabaseHandler
+from rollups import RESOLUTIONS, align_to_resolution, ensure_rollup_tables, rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Raw ticks older than this are compacted into rollups, archived and deleted
+RAW_TICK_RETENTION_DAYS = 30
+
+# Fine-grained bars are as numerous as raw ticks, so they are only kept for a while
+ROLLUP_RETENTION_DAYS = {
+    '1m': 90,
+}
+
+# State history newer than this is kept in full; older rows are thinned to one per day
+STATE_HISTORY_DAYS = 7
+
+ARCHIVE_DIR = 'archive'
+
+# State history tables thinned to daily checkpoints: (time column, extra GROUP BY prefix)
+STATE_HISTORY_TABLES = {
+    'bot_state': ('last_timestamp', ''),
+    'bot_state_journal': ('recorded_at', 'bot_id, symbol, '),
+}
+
+MAINTAINED_TABLES = ('crypto_prices', 'crypto_price_rollups', 'bot_state', 'bot_state_journal')
+
+
+def get_table_sizes(db_handler, tables=MAINTAINED_TABLES):
+    """
+    Fetch the on-disk size (table, indexes and TOAST) of the given tables.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        tables (tuple of str): The table names.
+
+    Returns:
+        dict: Table name to size in bytes; missing tables are omitted.
+    """
+    sizes = {}
+    for table in tables:
+        row = db_handler.fetch_one(
+            "SELECT pg_total_relation_size(to_regclass(%(table)s)) AS size;",
+            {'table': table}
+        )
+        if row and row['size'] is not None:
+            sizes[table] = int(row['size'])
+    return sizes
+
+
+def delete_rows(db_handler, table, condition, params):
+    """
+    Delete rows and measure the space their tuples took.
+
+    Plain VACUUM rarely shrinks a table's files; it marks the space of deleted
+    rows free for reuse. The sum of their pg_column_size() is what a run frees
+    (index entries not included).
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        table (str): The table name; rows are referred to as t in the condition.
+        condition (str): The WHERE condition.
+        params (dict): The query parameters.
+
+    Returns:
+        tuple or None: (rows deleted, bytes freed), or None if the delete failed.
+    """
+    result = db_handler.execute_returning(
+        f"""
+            WITH deleted AS (
+                DELETE FROM {table} AS t WHERE {condition} RETURNING pg_column_size(t.*) AS size
+            )
+            SELECT COUNT(*) AS count, COALESCE(SUM(size), 0) AS bytes FROM deleted;
+        """,
+        params
+    )
+    if not result:
+        return None
+    return int(result[0]['count']), int(result[0]['bytes'])
+
+
+def archive_rows(path, rows):
+    """
+    Write rows to a gzip-compressed CSV file atomically.
+
+    Args:
+        path (str): Destination file path; parent directories are created as needed.
+        rows (list of dict): The rows to archive. Must not be empty.
+
+    Returns:
+        int: The size of the written archive in bytes.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, 'wt', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    # Make sure the archive is on disk before the source rows are deleted
+    with open(tmp_path, 'rb') as file:
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def _delete_archived_day(db_handler, params, tick_count, path, stats):
+    """Delete one symbol-day of raw ticks that has been rolled up and archived."""
+    symbol, day = params['symbol'], params['start_time'].date()
+    deleted = delete_rows(
+        db_handler, 'crypto_prices',
+        "t.symbol = %(symbol)s AND t.timestamp >= %(start_time)s AND t.timestamp < %(end_time)s",
+        params
+    )
+    if deleted:
+        stats['ticks_deleted'] += deleted[0]
+        stats['freed_bytes'] += deleted[1]
+        logger.info(f"Compacted {tick_count} {symbol} ticks for {day} into {path}.")
+    else:
+        logger.error(f"Failed to delete archived {symbol} ticks for {day}.")
+
+
+def compact_raw_ticks(db_handler, cutoff, archive_dir=ARCHIVE_DIR):
+    """
+    Roll up, archive and delete raw ticks older than the cutoff, one symbol-day at a time.
+
+    Each day is rebuilt into every rollup resolution and written to
+    <archive_dir>/<symbol>/<year>/<symbol>-<date>.csv.gz before its rows are deleted,
+    so an interrupted run can simply be started again.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        cutoff (datetime): Day-aligned instant; ticks before it are compacted.
+        archive_dir (str): Root directory of the tick archives.
+
+    Returns:
+        dict: Counts of archived and deleted ticks, archive bytes written and row bytes freed.
+    """
+    stats = {'ticks_archived': 0, 'ticks_deleted': 0, 'archive_bytes': 0, 'freed_bytes': 0}
+
+    rows = db_handler.fetch_all(
+        """
+            SELECT symbol, MIN(timestamp) AS first_timestamp
+            FROM crypto_prices
+            WHERE timestamp < %(cutoff)s
+            GROUP BY symbol;
+        """,
+        {'cutoff': cutoff}
+    )
+    for row in rows:
+        symbol = row['symbol']
+        day_start = align_to_resolution(row['first_timestamp'], '1d')
+        # An archived day is deleted only after the next day is rolled up, whose first
+        # bar is weighted by the volume traded since the archived day's last tick
+        archived = None
+
+        while day_start < cutoff:
+            day_end = day_start + timedelta(days=1)
+            params = {'symbol': symbol, 'start_time': day_start, 'end_time': day_end}
+
+            ticks = db_handler.fetch_all(
+                """
+                    SELECT * FROM crypto_prices
+                    WHERE symbol = %(symbol)s AND timestamp >= %(start_time)s AND timestamp < %(end_time)s
+                    ORDER BY timestamp ASC;
+                """,
+                params
+            )
+            if not ticks:
+                day_start = day_end
+                continue
+
+            rolled_up = all(
+                rebuild_rollups(db_handler, symbol, resolution, day_start, day_end)
+                for resolution in RESOLUTIONS
+            )
+            if archived:
+                _delete_archived_day(db_handler, *archived, stats)
+                archived = None
+            if not rolled_up:
+                logger.error(f"Failed to roll up {symbol} ticks for {day_start.date()}, keeping raw rows.")
+                day_start = day_end
+                continue
+
+            path = os.path.join(
+                archive_dir, symbol, f"{day_start:%Y}", f"{symbol}-{day_start:%Y-%m-%d}.csv.gz"
+            )
+            try:
+                stats['archive_bytes'] += archive_rows(path, ticks)
+                stats['ticks_archived'] += len(ticks)
+            except OSError as e:
+                logger.error(f"Failed to archive {symbol} ticks for {day_start.date()}: {e}")
+                day_start = day_end
+                continue
+
+            archived = (params, len(ticks), path)
+            day_start = day_end
+
+        if archived:
+            _delete_archived_day(db_handler, *archived, stats)
+
+    return stats
+
+
+def prune_rollups(db_handler, now):
+    """
+    Delete fine-grained bars that have outlived ROLLUP_RETENTION_DAYS.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        now (datetime): The reference time of the retention run.
+
+    Returns:
+        dict: The number of bars deleted and the row bytes freed.
+    """
+    stats = {'rollups_pruned': 0, 'freed_bytes': 0}
+    for resolution, days in ROLLUP_RETENTION_DAYS.items():
+        params = {'resolution': resolution, 'cutoff': now - timedelta(days=days)}
+        deleted = delete_rows(
+            db_handler, 'crypto_price_rollups',
+            "t.resolution = %(resolution)s AND t.bucket_start < %(cutoff)s", params
+        )
+        if deleted is None:
+            logger.error(f"Failed to prune {resolution} bars.")
+        elif deleted[0]:
+            stats['rollups_pruned'] += deleted[0]
+            stats['freed_bytes'] += deleted[1]
+            logger.info(f"Pruned {deleted[0]} {resolution} bars older than {params['cutoff']:%Y-%m-%d}.")
+    return stats
+
+
+def prune_state_history(db_handler, cutoff, archive_dir=ARCHIVE_DIR, tables=None):
+    """
+    Thin state history older than the cutoff down to one checkpoint per day.
+
+    Covers the legacy append-only bot_state table and the bot_state_journal audit
+    log. The latest row of each day (per bot and symbol for the journal) is kept.
+    Pruned rows are archived before they are deleted.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        cutoff (datetime): Rows newer than this are left untouched.
+        archive_dir (str): Root directory of the archives.
+        tables (list of str, optional): Subset of STATE_HISTORY_TABLES to prune.
+
+    Returns:
+        dict: The number of pruned rows, archive bytes written and row bytes freed.
+    """
+    stats = {'state_rows_pruned': 0, 'archive_bytes': 0, 'freed_bytes': 0}
+
+    for table in tables or STATE_HISTORY_TABLES:
+        time_column, partition = STATE_HISTORY_TABLES[table]
+        rows = db_handler.fetch_all(
+            f"""
+                SELECT * FROM {table}
+                WHERE ({time_column} IS NULL OR {time_column} < %(cutoff)s)
+                  AND id NOT IN (
+                      SELECT MAX(id) FROM {table} GROUP BY {partition}date_trunc('day', {time_column})
+                  )
+                ORDER BY id ASC;
+            """,
+            {'cutoff': cutoff}
+        )
+        if not rows:
+            continue
+
+        path = os.path.join(archive_dir, table, f"{table}-{datetime.now(timezone.utc):%Y%m%d_%H%M%S}.csv.gz")
+        try:
+            stats['archive_bytes'] += archive_rows(path, rows)
+        except OSError as e:
+            logger.error(f"Failed to archive pruned {table} rows: {e}")
+            continue
+
+        deleted = delete_rows(db_handler, table, "t.id = ANY(%(ids)s)", {'ids': [row['id'] for row in rows]})
+        if deleted:
+            stats['state_rows_pruned'] += deleted[0]
+            stats['freed_bytes'] += deleted[1]
+            logger.info(f"Pruned {deleted[0]} {table} rows into {path}.")
+        else:
+            logger.error(f"Failed to delete pruned {table} rows.")
+
+    return stats
+
+
+def run_retention(db_handler, raw_days=RAW_TICK_RETENTION_DAYS, state_days=STATE_HISTORY_DAYS,
+                  archive_dir=ARCHIVE_DIR, vacuum=True):
+    """
+    Run one retention pass and report how much space it freed.
+
+    freed_bytes is the size of the deleted rows, which VACUUM makes reusable for
+    new rows. size_change_bytes is the change in size of the tables' files
+    (negative when they shrank), usually close to zero, since a plain VACUUM only truncates empty pages at
+    the end of a table.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        raw_days (int): Days of raw ticks to keep in crypto_prices.
+        state_days (int): Days of full bot_state history to keep.
+        archive_dir (str): Root directory of the archives.
+        vacuum (bool): Whether to VACUUM the maintained tables afterwards so freed
+            space is reused (and trailing empty pages returned to the OS).
+
+    Returns:
+        dict: The retention report.
+    """
+    now = datetime.now(timezone.utc)
+    raw_cutoff = align_to_resolution(now - timedelta(days=raw_days), '1d')
+    ensure_rollup_tables(db_handler)
+
+    sizes_before = get_table_sizes(db_handler)
+
+    report = compact_raw_ticks(db_handler, raw_cutoff, archive_dir)
+    rollup_stats = prune_rollups(db_handler, now)
+    report['rollups_pruned'] = rollup_stats['rollups_pruned']
+    report['freed_bytes'] += rollup_stats['freed_bytes']
+    state_stats = prune_state_history(
+        db_handler, now - timedelta(days=state_days), archive_dir,
+        tables=[table for table in STATE_HISTORY_TABLES if table in sizes_before]
+    )
+    report['state_rows_pruned'] = state_stats['state_rows_pruned']
+    report['archive_bytes'] += state_stats['archive_bytes']
+    report['freed_bytes'] += state_stats['freed_bytes']
+
+    if vacuum:
+        for table in sizes_before:
+            db_handler.execute_autocommit(f"VACUUM (ANALYZE) {table};")
+
+    sizes_after = get_table_sizes(db_handler)
+    report['size_before'] = sizes_before
+    report['size_after'] = sizes_after
+    report['size_change_bytes'] = sum(sizes_after.values()) - sum(sizes_before.values())
+
+    logger.info(
+        f"Retention run complete: {report['ticks_deleted']} ticks compacted, "
+        f"{report['rollups_pruned']} bars pruned, {report['state_rows_pruned']} state rows pruned, "
+        f"{report['archive_bytes']} archive bytes written, {report['freed_bytes']} row bytes freed, "
+        f"on-disk size change {report['size_change_bytes']} bytes."
+    )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact, archive and prune old price and bot state history.")
+    parser.add_argument('--raw-days', type=int, default=RAW_TICK_RETENTION_DAYS,
+                        help="Days of raw ticks to keep in crypto_prices.")
+    parser.add_argument('--state-days', type=int, default=STATE_HISTORY_DAYS,
+                        help="Days of full bot_state history to keep.")
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR, help="Directory for compressed archives.")
+    parser.add_argument('--no-vacuum', action='store_true', help="Skip VACUUM after pruning.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    with DatabaseHandler() as db_handler:
+        report = run_retention(
+            db_handler, args.raw_days, args.state_days, args.archive_dir, vacuum=not args.no_vacuum
+        )
+
+    for table, size in report['size_after'].items():
+        before = report['size_before'].get(table, size)
+        print(f"{table}: {before / 1024 ** 2:.1f} MiB -> {size / 1024 ** 2:.1f} MiB")
+    print(f"Freed {report['freed_bytes'] / 1024 ** 2:.1f} MiB of rows for reuse, "
+          f"on-disk size change {report['size_change_bytes'] / 1024 ** 2:.1f} MiB, "
+          f"archived {report['archive_bytes'] / 1024 ** 2:.1f} MiB.")
+
+
+if __name__ == "__main__":
+    main()
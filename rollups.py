@@ -0,0 +1,360 @@
+# rollups.py
+
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+
+from database_handler import DatabaseHandler
+
+logger = logging.getLogger(__name__)
+
+# Bar resolutions maintained for every symbol, in seconds. Each resolution divides a
+# UTC day evenly, so day-aligned backfill chunks never split a bar.
+RESOLUTIONS = {
+    '1m': 60,
+    '15m': 15 * 60,
+    '1h': 60 * 60,
+    '1d': 24 * 60 * 60,
+}
+
+# Size of the slices raw history is re-aggregated in during a backfill
+BACKFILL_CHUNK_DAYS = 30
+
+CREATE_ROLLUPS_TABLE = """
+    CREATE TABLE IF NOT EXISTS crypto_price_rollups (
+        symbol VARCHAR(16) NOT NULL,
+        resolution VARCHAR(8) NOT NULL,
+        bucket_start TIMESTAMPTZ NOT NULL,
+        open NUMERIC NOT NULL,
+        high NUMERIC NOT NULL,
+        low NUMERIC NOT NULL,
+        close NUMERIC NOT NULL,
+        volume NUMERIC NOT NULL DEFAULT 0,
+        price_volume NUMERIC NOT NULL DEFAULT 0,
+        vwap NUMERIC,
+        tick_count INTEGER NOT NULL DEFAULT 0,
+        first_timestamp TIMESTAMPTZ NOT NULL,
+        last_timestamp TIMESTAMPTZ NOT NULL,
+        PRIMARY KEY (symbol, resolution, bucket_start)
+    );
+"""
+
+# Bucket boundaries are computed in SQL for both the incremental and the backfill path
+# so that a bar written tick-by-tick and one rebuilt from history land on the same key.
+BUCKET_START_SQL = "to_timestamp(floor(extract(epoch FROM {ts}) / {seconds}) * {seconds})"
+
+ROLLUP_COLUMNS = """
+    symbol, resolution, bucket_start, open, high, low, close,
+    volume, price_volume, vwap, tick_count, first_timestamp, last_timestamp
+"""
+
+# Merges a partial bar into the stored one: open/close follow the earliest/latest tick,
+# volume sums add up, and VWAP is re-derived from the running price*volume total.
+MERGE_ON_CONFLICT = """
+    ON CONFLICT (symbol, resolution, bucket_start) DO UPDATE SET
+        open = CASE WHEN EXCLUDED.first_timestamp < r.first_timestamp THEN EXCLUDED.open ELSE r.open END,
+        high = GREATEST(r.high, EXCLUDED.high),
+        low = LEAST(r.low, EXCLUDED.low),
+        close = CASE WHEN EXCLUDED.last_timestamp >= r.last_timestamp THEN EXCLUDED.close ELSE r.close END,
+        volume = r.volume + EXCLUDED.volume,
+        price_volume = r.price_volume + EXCLUDED.price_volume,
+        vwap = (r.price_volume + EXCLUDED.price_volume) / NULLIF(r.volume + EXCLUDED.volume, 0),
+        tick_count = r.tick_count + EXCLUDED.tick_count,
+        first_timestamp = LEAST(r.first_timestamp, EXCLUDED.first_timestamp),
+        last_timestamp = GREATEST(r.last_timestamp, EXCLUDED.last_timestamp);
+"""
+
+# Replaces the stored bar outright; used when a bar is rebuilt from raw history.
+REPLACE_ON_CONFLICT = """
+    ON CONFLICT (symbol, resolution, bucket_start) DO UPDATE SET
+        open = EXCLUDED.open,
+        high = EXCLUDED.high,
+        low = EXCLUDED.low,
+        close = EXCLUDED.close,
+        volume = EXCLUDED.volume,
+        price_volume = EXCLUDED.price_volume,
+        vwap = EXCLUDED.vwap,
+        tick_count = EXCLUDED.tick_count,
+        first_timestamp = EXCLUDED.first_timestamp,
+        last_timestamp = EXCLUDED.last_timestamp;
+"""
+
+
+# Ticks carry the exchange's rolling 24h volume; a bar is weighted by what traded between
+# consecutive ticks instead, the SQL counterpart of indicators.traded_volumes(): the positive
+# change since the previous tick, 0 for the first tick, missing volumes and 24h decreases.
+# (GREATEST skips NULLs, so a missing volume on either side yields 0.)
+TRADED_VOLUME_SQL = "GREATEST({current} - {previous}, 0)"
+
+# The 24h volume of the stored tick preceding the one being folded in
+PREVIOUS_VOLUME_SQL = """(
+    SELECT p.volume FROM crypto_prices AS p
+    WHERE p.symbol = %(symbol)s AND p.timestamp < %(timestamp)s
+    ORDER BY p.timestamp DESC LIMIT 1
+)"""
+
+
+def _build_update_query():
+    """Build the single-statement upsert that folds one tick into every resolution."""
+    resolutions = ", ".join(
+        f"('{name}', {seconds})" for name, seconds in RESOLUTIONS.items()
+    )
+    bucket_start = BUCKET_START_SQL.format(ts="%(timestamp)s::timestamptz", seconds="b.seconds")
+    return f"""
+        INSERT INTO crypto_price_rollups AS r ({ROLLUP_COLUMNS})
+        SELECT
+            %(symbol)s, b.resolution, {bucket_start},
+            %(price)s, %(price)s, %(price)s, %(price)s,
+            t.volume, %(price)s * t.volume, CASE WHEN t.volume > 0 THEN %(price)s END, 1,
+            %(timestamp)s, %(timestamp)s
+        FROM (VALUES {resolutions}) AS b(resolution, seconds)
+        CROSS JOIN (
+            SELECT {TRADED_VOLUME_SQL.format(current="%(volume)s::numeric", previous=PREVIOUS_VOLUME_SQL)} AS volume
+        ) AS t
+        {MERGE_ON_CONFLICT}
+    """
+
+
+UPDATE_ROLLUPS_QUERY = _build_update_query()
+
+
+def ensure_rollup_tables(db_handler):
+    """
+    Create the rollup table if it does not exist yet.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+
+    Returns:
+        bool: True if the table is available, False otherwise.
+    """
+    return db_handler.execute(CREATE_ROLLUPS_TABLE)
+
+
+def update_rollups(db_handler, symbol, timestamp, price, volume):
+    """
+    Fold a freshly written tick into the bars of every resolution.
+
+    Volume and VWAP weight the tick by the volume traded since the previous stored
+    tick (see TRADED_VOLUME_SQL), so the tick must already be written.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        symbol (str): The cryptocurrency symbol (e.g., 'XRP', 'BTC').
+        timestamp (datetime): The tick timestamp (timezone-aware, UTC).
+        price (float): The last traded price.
+        volume (float): The rolling 24h volume reported with the tick.
+
+    Returns:
+        bool: True if the bars were updated successfully, False otherwise.
+    """
+    try:
+        params = {
+            'symbol': symbol,
+            'timestamp': timestamp,
+            'price': float(price),
+            'volume': float(volume) if volume is not None else None,
+        }
+        success = db_handler.execute(UPDATE_ROLLUPS_QUERY, params)
+        if not success:
+            logger.error(f"Failed to update rollups for {symbol}.")
+        return success
+    except Exception as e:
+        logger.error(f"Error updating rollups for {symbol}: {type(e).__name__} - {e}")
+        return False
+
+
+def align_to_resolution(timestamp, resolution):
+    """
+    Floor a timestamp to the start of the bar it belongs to.
+
+    Args:
+        timestamp (datetime): The timestamp to align (naive values are treated as UTC).
+        resolution (str): One of the keys of RESOLUTIONS.
+
+    Returns:
+        datetime: The timezone-aware (UTC) bucket start.
+    """
+    seconds = RESOLUTIONS[resolution]
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+def fetch_bars(db_handler, symbol, resolution, start_time, end_time=None):
+    """
+    Fetch the bars of one symbol and resolution covering a time range.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        symbol (str): The cryptocurrency symbol (e.g., 'XRP').
+        resolution (str): One of the keys of RESOLUTIONS.
+        start_time (datetime): Bars containing this instant or later are returned.
+        end_time (datetime, optional): Only bars starting before this instant are returned.
+
+    Returns:
+        list of dict: The bars ordered by bucket_start, or an empty list if none were found.
+    """
+    if resolution not in RESOLUTIONS:
+        logger.error(f"Unknown rollup resolution: {resolution}")
+        return []
+
+    query = """
+        SELECT bucket_start, open, high, low, close, volume, vwap, tick_count
+        FROM crypto_price_rollups
+        WHERE symbol = %(symbol)s
+          AND resolution = %(resolution)s
+          AND bucket_start >= %(start_time)s
+          AND (%(end_time)s::timestamptz IS NULL OR bucket_start < %(end_time)s)
+        ORDER BY bucket_start ASC;
+    """
+    params = {
+        'symbol': symbol,
+        'resolution': resolution,
+        'start_time': align_to_resolution(start_time, resolution),
+        'end_time': end_time,
+    }
+    return db_handler.fetch_all(query, params)
+
+
+def rebuild_rollups(db_handler, symbol, resolution, start_time, end_time):
+    """
+    Re-aggregate one resolution of a symbol from raw ticks in [start_time, end_time).
+
+    The bars in the range are replaced, so both bounds should be aligned to the
+    resolution (day-aligned bounds work for every resolution). The first tick is
+    weighted by the volume traded since the last tick before start_time, as
+    update_rollups weighted it.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        symbol (str): The cryptocurrency symbol.
+        resolution (str): One of the keys of RESOLUTIONS.
+        start_time (datetime): Inclusive lower bound.
+        end_time (datetime): Exclusive upper bound.
+
+    Returns:
+        bool: True if the bars were rebuilt successfully, False otherwise.
+    """
+    seconds = RESOLUTIONS[resolution]
+    bucket_start = BUCKET_START_SQL.format(ts="timestamp", seconds=seconds)
+    traded_volume = TRADED_VOLUME_SQL.format(current="volume", previous="LAG(volume) OVER (ORDER BY timestamp)")
+    query = f"""
+        INSERT INTO crypto_price_rollups AS r ({ROLLUP_COLUMNS})
+        SELECT
+            symbol, %(resolution)s, bucket_start,
+            (array_agg(last_price ORDER BY timestamp ASC))[1],
+            MAX(last_price),
+            MIN(last_price),
+            (array_agg(last_price ORDER BY timestamp DESC))[1],
+            COALESCE(SUM(volume), 0),
+            COALESCE(SUM(last_price * volume), 0),
+            SUM(last_price * volume) / NULLIF(SUM(volume), 0),
+            COUNT(*),
+            MIN(timestamp),
+            MAX(timestamp)
+        FROM (
+            SELECT symbol, timestamp, last_price, {traded_volume} AS volume, {bucket_start} AS bucket_start
+            FROM crypto_prices
+            WHERE symbol = %(symbol)s
+              AND timestamp >= COALESCE(
+                  (SELECT MAX(timestamp) FROM crypto_prices
+                   WHERE symbol = %(symbol)s AND timestamp < %(start_time)s),
+                  %(start_time)s
+              )
+              AND timestamp < %(end_time)s
+        ) AS ticks
+        WHERE timestamp >= %(start_time)s AND last_price IS NOT NULL
+        GROUP BY symbol, bucket_start
+        {REPLACE_ON_CONFLICT}
+    """
+    params = {
+        'symbol': symbol,
+        'resolution': resolution,
+        'start_time': start_time,
+        'end_time': end_time,
+    }
+    return db_handler.execute(query, params)
+
+
+def backfill_rollups(db_handler, symbols=None, resolutions=None, since=None, until=None):
+    """
+    Build bars for existing history, one day-aligned chunk at a time.
+
+    Args:
+        db_handler (DatabaseHandler): The database handler instance.
+        symbols (list of str, optional): Symbols to backfill. Defaults to every symbol in crypto_prices.
+        resolutions (list of str, optional): Resolutions to build. Defaults to all of RESOLUTIONS.
+        since (datetime, optional): Start of the backfill. Defaults to the oldest tick per symbol.
+        until (datetime, optional): End of the backfill. Defaults to now.
+
+    Returns:
+        bool: True if every chunk was rebuilt successfully, False otherwise.
+    """
+    if not ensure_rollup_tables(db_handler):
+        return False
+
+    if symbols is None:
+        rows = db_handler.fetch_all("SELECT DISTINCT symbol FROM crypto_prices;")
+        symbols = [row['symbol'] for row in rows]
+    resolutions = resolutions or list(RESOLUTIONS)
+    until = until or datetime.now(timezone.utc)
+    end_time = align_to_resolution(until, '1d') + timedelta(days=1)
+
+    success = True
+    for symbol in symbols:
+        start_time = since
+        if start_time is None:
+            row = db_handler.fetch_one(
+                "SELECT MIN(timestamp) AS first_timestamp FROM crypto_prices WHERE symbol = %(symbol)s;",
+                {'symbol': symbol}
+            )
+            if not row or row['first_timestamp'] is None:
+                logger.warning(f"No ticks found for {symbol}, nothing to backfill.")
+                continue
+            start_time = row['first_timestamp']
+        chunk_start = align_to_resolution(start_time, '1d')
+
+        while chunk_start < end_time:
+            chunk_end = min(chunk_start + timedelta(days=BACKFILL_CHUNK_DAYS), end_time)
+            for resolution in resolutions:
+                if not rebuild_rollups(db_handler, symbol, resolution, chunk_start, chunk_end):
+                    logger.error(f"Failed to backfill {resolution} bars for {symbol} from {chunk_start}.")
+                    success = False
+            logger.info(f"Backfilled {symbol} rollups from {chunk_start} to {chunk_end}.")
+            chunk_start = chunk_end
+
+    return success
+
+
+def _parse_datetime(value):
+    """Parse an ISO date/time argument into a timezone-aware datetime."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain OHLCV/VWAP rollups of crypto_prices.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backfill = subparsers.add_parser('backfill', help="Rebuild bars from existing raw ticks.")
+    backfill.add_argument('--symbol', action='append', dest='symbols', help="Symbol to backfill (repeatable).")
+    backfill.add_argument('--resolution', action='append', dest='resolutions', choices=list(RESOLUTIONS),
+                          help="Resolution to build (repeatable).")
+    backfill.add_argument('--since', type=_parse_datetime, help="ISO start date (default: oldest tick).")
+    backfill.add_argument('--until', type=_parse_datetime, help="ISO end date (default: now).")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    with DatabaseHandler() as db_handler:
+        if args.command == 'backfill':
+            ok = backfill_rollups(db_handler, args.symbols, args.resolutions, args.since, args.until)
+            raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# scheduler.py
+
+import logging
+import math
+import time
+from datetime import datetime, timezone
+
+from metrics import REGISTRY, Counter, Histogram, METRIC_PREFIX
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_RUNS = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_scheduler_runs_total',
+    'Scheduled task runs.',
+    ('scheduler',),
+))
+SCHEDULER_OVERRUNS = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_scheduler_overruns_total',
+    'Task runs that did not finish before their next slot.',
+    ('scheduler',),
+))
+SCHEDULER_SKIPPED_SLOTS = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_scheduler_skipped_slots_total',
+    'Slots dropped because the previous run was still busy.',
+    ('scheduler',),
+))
+SCHEDULER_LATENESS = REGISTRY.register(Histogram(
+    f'{METRIC_PREFIX}_scheduler_lateness_seconds',
+    'Delay between a slot boundary and the start of its run.',
+    ('scheduler',),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0),
+))
+
+
+class FixedRateScheduler:
+    """
+    Runs a task on a fixed grid of wall-clock slots (e.g., every minute at :00).
+
+    Unlike "work, then sleep(interval)", the period does not stretch by the time
+    the task takes, so samples stay on the grid. A run that takes longer than an
+    interval is an overrun; the slots it covered are skipped (not run late in a
+    burst) and counted, and the next run starts on the following boundary.
+    """
+
+    def __init__(self, interval=60, offset=0.0, name='scheduler', clock=time.time, sleep=time.sleep):
+        """
+        Initialize the scheduler.
+
+        Args:
+            interval (float): Seconds between slots.
+            offset (float): Seconds after each boundary at which slots start
+                (e.g., 5 to run 5 seconds past every minute).
+            name (str): Name used in logs and metrics.
+            clock (callable): Returns the wall-clock time in epoch seconds.
+            sleep (callable): Sleeps for a number of seconds.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.offset = offset % interval
+        self.name = name
+        self.clock = clock
+        self.sleep = sleep
+        self.runs = 0
+        self.overruns = 0
+        self.skipped_slots = 0
+
+    def next_slot(self, now):
+        """Return the first slot boundary strictly after the given epoch time."""
+        return (math.floor((now - self.offset) / self.interval) + 1) * self.interval + self.offset
+
+    def wait_for(self, slot):
+        """
+        Sleep until the slot boundary.
+
+        If the clock jumps backwards so the slot is more than an interval away,
+        the wait is moved to the next boundary of the new time instead.
+
+        Returns:
+            tuple: The slot that was waited for and the time the wait ended.
+        """
+        while True:
+            now = self.clock()
+            remaining = slot - now
+            if remaining <= 0:
+                return slot, now
+            if remaining > self.interval:
+                logger.warning(f"{self.name}: clock jumped back {remaining - self.interval:.1f}s, realigning.")
+                slot = self.next_slot(now)
+                continue
+            self.sleep(remaining)
+
+    def run(self, task, iterations=None):
+        """
+        Run the task on every slot, starting at the next boundary.
+
+        Exceptions raised by the task are logged and do not stop the schedule.
+
+        Args:
+            task (callable): Called with the scheduled slot time (a UTC datetime).
+            iterations (int, optional): Stop after this many runs. Runs forever by default.
+        """
+        slot = self.next_slot(self.clock())
+        while iterations is None or self.runs < iterations:
+            slot, started = self.wait_for(slot)
+            if started - slot >= self.interval:
+                # Woke up more than a slot late (e.g., after a suspend); drop the stale slots
+                skipped = math.floor((started - slot) / self.interval) + 1
+                self.skipped_slots += skipped
+                SCHEDULER_SKIPPED_SLOTS.inc(skipped, scheduler=self.name)
+                logger.warning(f"{self.name}: woke up {started - slot:.1f}s late, skipping {skipped} slot(s).")
+                slot = self.next_slot(started)
+                continue
+
+            SCHEDULER_LATENESS.observe(started - slot, scheduler=self.name)
+            try:
+                task(datetime.fromtimestamp(slot, tz=timezone.utc))
+            except Exception as e:
+                logger.error(f"{self.name}: task raised {type(e).__name__} - {e}")
+            self.runs += 1
+            SCHEDULER_RUNS.inc(scheduler=self.name)
+
+            finished = self.clock()
+            next_slot = slot + self.interval
+            if finished >= next_slot:
+                skipped = math.floor((finished - next_slot) / self.interval) + 1
+                self.overruns += 1
+                self.skipped_slots += skipped
+                SCHEDULER_OVERRUNS.inc(scheduler=self.name)
+                SCHEDULER_SKIPPED_SLOTS.inc(skipped, scheduler=self.name)
+                logger.warning(
+                    f"{self.name}: run took {finished - slot:.1f}s (interval {self.interval}s), "
+                    f"skipping {skipped} slot(s)."
+                )
+                next_slot += skipped * self.interval
+            slot = next_slot
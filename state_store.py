@@ -0,0 +1,189 @@
+# state_store.py
+
+import logging
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Columns persisted for every trading bot, in table order
+STATE_FIELDS = (
+    'capital', 'position', 'entry_price', 'trailing_stop_price',
+    'highest_price', 'last_timestamp', 'entry_time',
+)
+
+# fillfactor leaves room on each page so in-place updates stay HOT (no index churn)
+CREATE_STATE_TABLES = """
+    CREATE TABLE IF NOT EXISTS bot_state_current (
+        bot_id VARCHAR(64) NOT NULL,
+        symbol VARCHAR(16) NOT NULL,
+        capital NUMERIC,
+        position VARCHAR(16),
+        entry_price NUMERIC,
+        trailing_stop_price NUMERIC,
+        highest_price NUMERIC,
+        last_timestamp TIMESTAMPTZ,
+        entry_time TIMESTAMPTZ,
+        updated_at TIMESTAMPTZ NOT NULL,
+        PRIMARY KEY (bot_id, symbol)
+    ) WITH (fillfactor = 50);
+
+    CREATE TABLE IF NOT EXISTS bot_state_journal (
+        id BIGSERIAL PRIMARY KEY,
+        bot_id VARCHAR(64) NOT NULL,
+        symbol VARCHAR(16) NOT NULL,
+        recorded_at TIMESTAMPTZ NOT NULL,
+        capital NUMERIC,
+        position VARCHAR(16),
+        entry_price NUMERIC,
+        trailing_stop_price NUMERIC,
+        highest_price NUMERIC,
+        last_timestamp TIMESTAMPTZ,
+        entry_time TIMESTAMPTZ
+    );
+"""
+
+# Upper bound on journal entries held in memory while the database is unavailable
+MAX_JOURNAL_BUFFER = 1000
+
+UPSERT_STATE_QUERY = f"""
+    INSERT INTO bot_state_current (bot_id, symbol, {', '.join(STATE_FIELDS)}, updated_at)
+    VALUES (%(bot_id)s, %(symbol)s, {', '.join(f'%({field})s' for field in STATE_FIELDS)}, %(updated_at)s)
+    ON CONFLICT (bot_id, symbol) DO UPDATE SET
+        {', '.join(f'{field} = EXCLUDED.{field}' for field in STATE_FIELDS)},
+        updated_at = EXCLUDED.updated_at;
+"""
+
+INSERT_JOURNAL_QUERY = f"""
+    INSERT INTO bot_state_journal (bot_id, symbol, recorded_at, {', '.join(STATE_FIELDS)})
+    VALUES %s;
+"""
+
+
+class BotStateStore:
+    """Keyed store holding one state row per bot/symbol, updated in place."""
+
+    def __init__(self, db_handler, bot_id='default', symbol='XRP', journal=True,
+                 journal_batch_size=50, journal_flush_interval=300):
+        """
+        Initialize the store and make sure its tables exist.
+
+        Args:
+            db_handler (DatabaseHandler): The database handler instance.
+            bot_id (str): Identifier of the bot instance owning the state.
+            symbol (str): The traded symbol (e.g., 'XRP').
+            journal (bool): Whether to keep an append-only audit journal of saves.
+            journal_batch_size (int): Journal entries buffered before they are written.
+            journal_flush_interval (float): Seconds after which buffered entries are
+                written even if the batch is not full.
+        """
+        self.db_handler = db_handler
+        self.bot_id = bot_id
+        self.symbol = symbol
+        self.journal = journal
+        self.journal_batch_size = journal_batch_size
+        self.journal_flush_interval = journal_flush_interval
+        self._journal_buffer = []
+        self._journal_buffer_since = None
+        self.db_handler.execute(CREATE_STATE_TABLES)
+
+    def load(self):
+        """
+        Load the current state of this bot.
+
+        Falls back to the newest row of the legacy append-only bot_state table so
+        existing deployments pick up where they left off.
+
+        Returns:
+            dict or None: The stored state, or None if nothing was saved yet.
+        """
+        query = f"""
+            SELECT {', '.join(STATE_FIELDS)}
+            FROM bot_state_current
+            WHERE bot_id = %(bot_id)s AND symbol = %(symbol)s;
+        """
+        row = self.db_handler.fetch_one(query, {'bot_id': self.bot_id, 'symbol': self.symbol})
+        if row:
+            return row
+
+        if self.bot_id == 'default' and self.symbol == 'XRP':
+            legacy_query = f"""
+                SELECT {', '.join(STATE_FIELDS)}
+                FROM bot_state
+                ORDER BY id DESC
+                LIMIT 1;
+            """
+            row = self.db_handler.fetch_one(legacy_query)
+            if row:
+                logger.info("Loaded state from the legacy bot_state table.")
+        return row
+
+    def save(self, state):
+        """
+        Upsert the state row of this bot and queue a journal entry.
+
+        Args:
+            state (dict): Values for every field in STATE_FIELDS.
+
+        Returns:
+            bool: True if the state row was written successfully, False otherwise.
+        """
+        now = datetime.now(timezone.utc)
+        params = {field: state.get(field) for field in STATE_FIELDS}
+        params.update({'bot_id': self.bot_id, 'symbol': self.symbol, 'updated_at': now})
+        success = self.db_handler.execute(UPSERT_STATE_QUERY, params)
+
+        if self.journal:
+            if len(self._journal_buffer) >= MAX_JOURNAL_BUFFER:
+                logger.warning("bot_state_journal buffer is full, dropping the oldest entry.")
+                self._journal_buffer.pop(0)
+            self._journal_buffer.append(
+                (self.bot_id, self.symbol, now) + tuple(params[field] for field in STATE_FIELDS)
+            )
+            if self._journal_buffer_since is None:
+                self._journal_buffer_since = time.monotonic()
+            self.flush_journal_if_due()
+
+        return success
+
+    def flush_journal_if_due(self):
+        """
+        Write buffered journal entries once the batch is full or the oldest entry
+        has waited journal_flush_interval seconds.
+
+        save() checks this itself; callers that run on a schedule should call it
+        too, so entries are written while the bot is not saving.
+
+        Returns:
+            bool: False if a due write failed, True otherwise.
+        """
+        if not self._journal_buffer:
+            return True
+        if (
+            len(self._journal_buffer) >= self.journal_batch_size
+            or time.monotonic() - self._journal_buffer_since >= self.journal_flush_interval
+        ):
+            return self.flush_journal()
+        return True
+
+    def flush_journal(self):
+        """
+        Write buffered journal entries in a single batch.
+
+        Returns:
+            bool: True if the buffer is empty afterwards, False if the write failed
+            (entries are kept and retried on the next flush).
+        """
+        if not self._journal_buffer:
+            return True
+        if not self.db_handler.execute_values(INSERT_JOURNAL_QUERY, self._journal_buffer):
+            logger.error(f"Failed to write {len(self._journal_buffer)} bot_state_journal entries.")
+            return False
+        logger.debug(f"Wrote {len(self._journal_buffer)} bot_state_journal entries.")
+        self._journal_buffer = []
+        self._journal_buffer_since = None
+        return True
+
+    def close(self):
+        """Flush any pending journal entries."""
+        self.flush_journal()
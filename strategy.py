@@ -0,0 +1,236 @@
+# strategy.py
+
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+
+from records import Trade
+
+# Event flags returned by VwapStrategy.on_tick, combined with |
+BUY = 1           # A long position was opened
+SELL = 2          # The position was closed (take profit, stop loss or trailing stop)
+TRAIL = 4         # A new high moved the trailing stop up
+BUY_BLOCKED = 8   # A buy signal was ignored: loss cooldown running or no capital configured
+
+# After a losing trade, buy signals are ignored for this many seconds
+LOSS_COOLDOWN = 30 * 60
+
+DEFAULT_PARAMETERS = {
+    'overbought_threshold': 0.01,
+    'oversold_threshold': -0.019,
+    'stop_loss': -0.02,
+    'take_profit': 0.015,
+    'trailing_stop_loss': 0.005,
+}
+
+
+def _as_datetime(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+class VwapStrategy:
+    """
+    The VWAP-deviation strategy with take profit, stop loss and trailing stop, as one state machine.
+
+    Buys when the price is oversold_threshold (or more) below VWAP and no position
+    is open. A position is sold when the price reaches the take profit, falls to
+    the stop loss, or falls to the trailing stop, which follows the highest price
+    since entry. Fees are charged on both sides as a percentage of the traded
+    value, and buy signals are ignored for loss_cooldown seconds after a loss.
+
+    The live TradingBot, the CSV monitor and the backtests all drive this class:
+    on_tick() for streaming ticks, run() for whole arrays. Times are float epoch
+    seconds; only closed Trade records carry datetimes.
+    """
+
+    __slots__ = (
+        'symbol', 'capital', 'fee_percentage', 'loss_cooldown',
+        'base_overbought_threshold', 'base_oversold_threshold',
+        'overbought_threshold', 'oversold_threshold', 'stop_loss', 'take_profit', 'trailing_stop_loss',
+        'position', 'entry_price', 'entry_time', 'entry_capital', 'entry_fee',
+        'highest_price', 'trailing_stop_price', 'last_loss_time', 'last_fee', 'last_trade',
+    )
+
+    def __init__(self, capital, overbought_threshold=0.01, oversold_threshold=-0.019, stop_loss=-0.02,
+                 take_profit=0.015, trailing_stop_loss=0.005, fee_percentage=0.0,
+                 loss_cooldown=LOSS_COOLDOWN, symbol='XRP'):
+        """
+        Initialize a flat strategy.
+
+        Args:
+            capital (float or None): Capital traded on each entry; None blocks buying.
+            overbought_threshold (float): Upper VWAP deviation, scaled with volatility.
+            oversold_threshold (float): VWAP deviation at or below which to buy (negative).
+            stop_loss (float): Price change from entry at or below which to sell (negative).
+            take_profit (float): Price change from entry at or above which to sell.
+            trailing_stop_loss (float): Distance of the trailing stop below the highest price.
+            fee_percentage (float): Trading fee per side, in percent of the traded value.
+            loss_cooldown (float): Seconds buy signals are ignored after a losing trade.
+            symbol (str): The traded symbol, recorded on trades.
+        """
+        self.symbol = symbol
+        self.capital = capital
+        self.fee_percentage = fee_percentage
+        self.loss_cooldown = loss_cooldown
+        self.base_overbought_threshold = overbought_threshold
+        self.base_oversold_threshold = oversold_threshold
+        self.overbought_threshold = overbought_threshold
+        self.oversold_threshold = oversold_threshold
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.trailing_stop_loss = trailing_stop_loss
+        self.position = None
+        self.entry_price = None
+        self.entry_time = None
+        self.entry_capital = None
+        self.entry_fee = 0.0
+        self.highest_price = None
+        self.trailing_stop_price = None
+        self.last_loss_time = None
+        self.last_fee = 0.0
+        self.last_trade = None
+
+    def set_volatility(self, volatility):
+        """
+        Widen the thresholds by a volatility: overbought * (1 + v), oversold * (1 - v).
+
+        Args:
+            volatility (float or None): The volatility; None or NaN restores the base thresholds.
+        """
+        if volatility is None or math.isnan(volatility):
+            volatility = 0.0
+        self.overbought_threshold = self.base_overbought_threshold * (1 + volatility)
+        self.oversold_threshold = self.base_oversold_threshold * (1 - volatility)
+
+    def restore(self, position, entry_price, entry_time, highest_price, trailing_stop_price):
+        """Restore an open position (e.g., from saved bot state); entry_time is epoch seconds."""
+        self.position = position
+        self.entry_price = entry_price
+        self.entry_time = entry_time
+        self.entry_capital = self.capital
+        self.entry_fee = 0.0
+        self.highest_price = highest_price if highest_price is not None else entry_price
+        self.trailing_stop_price = trailing_stop_price
+
+    def fee(self, traded_value):
+        """The fee charged on a trade of the given value."""
+        return traded_value * (self.fee_percentage / 100)
+
+    def on_tick(self, time, price, vwap, buy_price=None, sell_price=None):
+        """
+        Advance the strategy by one tick.
+
+        Signals are always taken on the last price. Entries and exits fill at
+        buy_price and sell_price when given (e.g., the ask and bid), so the
+        take profit and stop loss are measured from the price actually paid.
+
+        Args:
+            time (float): Tick time in epoch seconds.
+            price (float): Last traded price.
+            vwap (float): Volume-weighted average price; a NaN or non-positive VWAP gives no buy signal.
+            buy_price (float, optional): Fill price of a buy on this tick. Defaults to price.
+            sell_price (float, optional): Fill price of a sell on this tick. Defaults to price.
+
+        Returns:
+            int: The events of this tick (BUY, SELL, TRAIL, BUY_BLOCKED flags), 0 if nothing happened.
+        """
+        events = 0
+        if self.position is None:
+            # Written so a NaN or non-positive VWAP (e.g., a NULL from the logger) is never a buy signal
+            if not (vwap > 0 and (price - vwap) / vwap <= self.oversold_threshold):
+                return 0
+            if self.capital is None or (
+                self.last_loss_time is not None and time - self.last_loss_time < self.loss_cooldown
+            ):
+                return BUY_BLOCKED
+            self.position = 'long'
+            self.entry_price = price if buy_price is None else buy_price
+            self.entry_time = time
+            self.highest_price = price
+            self.trailing_stop_price = price * (1 - self.trailing_stop_loss)
+            self.entry_fee = self.last_fee = self.fee(self.capital)
+            self.capital -= self.entry_fee
+            self.entry_capital = self.capital
+            events = BUY
+
+        if price > self.highest_price:
+            self.highest_price = price
+            self.trailing_stop_price = price * (1 - self.trailing_stop_loss)
+            events |= TRAIL
+
+        entry_price = self.entry_price
+        if (
+            price <= self.trailing_stop_price
+            or price >= entry_price * (1 + self.take_profit)
+            or price <= entry_price * (1 + self.stop_loss)
+        ):
+            self._sell(time, price if sell_price is None else sell_price)
+            events |= SELL
+        return events
+
+    def _sell(self, time, price):
+        capital = self.capital
+        sell_fee = self.last_fee = self.fee(capital * price / self.entry_price)
+        profit_loss = capital * (price - self.entry_price) / self.entry_price - sell_fee
+        self.capital = capital + profit_loss
+
+        trade = Trade(self.symbol, _as_datetime(self.entry_time), self.entry_price, capital=capital,
+                      fees=self.entry_fee)
+        trade.close(_as_datetime(time), price, profit_loss, fees=sell_fee)
+        self.last_trade = trade
+        self.last_loss_time = time if profit_loss < 0 else None
+
+        self.position = None
+        self.entry_price = None
+        self.entry_time = None
+        self.entry_capital = None
+        self.entry_fee = 0.0
+        self.highest_price = None
+        self.trailing_stop_price = None
+
+    def run(self, times, prices, vwaps, buy_prices=None, sell_prices=None, on_trade=None):
+        """
+        Run the strategy over arrays of ticks, with the same results as calling on_tick for each.
+
+        While flat, ticks without a buy signal cannot change the state, so they are
+        skipped in bulk. Only ticks with a signal and ticks inside a position are
+        stepped through.
+
+        Args:
+            times, prices, vwaps (array-like): Tick times (epoch seconds), prices and VWAPs.
+            buy_prices, sell_prices (array-like, optional): Fill prices per tick. Default to prices.
+            on_trade (callable, optional): Called with each Trade as it closes.
+
+        Returns:
+            list of Trade: The trades closed during the run.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        vwaps = np.asarray(vwaps, dtype=np.float64)
+        # Thresholds are fixed for the whole run, so the buy signals can be found up front
+        with np.errstate(divide='ignore', invalid='ignore'):
+            candidates = np.flatnonzero((vwaps > 0) & ((prices - vwaps) / vwaps <= self.oversold_threshold))
+        # Plain lists make per-element access cheaper than indexing ndarrays
+        time_list, price_list, vwap_list = times.tolist(), prices.tolist(), vwaps.tolist()
+        buy_list = np.asarray(buy_prices, dtype=np.float64).tolist() if buy_prices is not None else price_list
+        sell_list = np.asarray(sell_prices, dtype=np.float64).tolist() if sell_prices is not None else price_list
+
+        trades = []
+        n = len(price_list)
+        index = 0
+        while index < n:
+            if self.position is None:
+                next_signal = np.searchsorted(candidates, index)
+                if next_signal == len(candidates):
+                    break
+                index = int(candidates[next_signal])
+            events = self.on_tick(
+                time_list[index], price_list[index], vwap_list[index], buy_list[index], sell_list[index]
+            )
+            if events & SELL:
+                trades.append(self.last_trade)
+                if on_trade is not None:
+                    on_trade(self.last_trade)
+            index += 1
+        return trades
@@ -0,0 +1,340 @@
+# streaming.py
+
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+import websocket
+
+from app.fetcher import currency_pair, fetch_prices
+from indicators import vwap_estimator
+from metrics import METRIC_PREFIX, REGISTRY, Counter
+from records import Tick
+
+logger = logging.getLogger(__name__)
+
+BITSTAMP_WS_URL = "wss://ws.bitstamp.net"
+
+# Seconds covered by each aggregated tick
+DEFAULT_GRANULARITY = 1.0
+
+# Seconds between REST resyncs of the 24h ticker fields (vwap, high, low, open) while connected
+RESYNC_INTERVAL = 60
+
+# Reconnect backoff: doubles from the first delay up to the maximum, reset once a connection works
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+# Reconnect if nothing (not even a book update) arrives for this long
+STALE_TIMEOUT = 30.0
+
+STREAM_MESSAGES = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_stream_messages_total',
+    'WebSocket messages received by the streaming tick feed, by event.',
+    ('event',),
+))
+STREAM_RECONNECTS = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_stream_reconnects_total',
+    'Reconnects of the streaming tick feed, by reason.',
+    ('reason',),
+))
+
+
+def _number(value):
+    return float(value) if value not in (None, '') else None
+
+
+def _event_time(data):
+    """Event time in epoch seconds, from Bitstamp's microtimestamp (or timestamp) field."""
+    if data.get('microtimestamp'):
+        return int(data['microtimestamp']) / 1e6
+    return float(data['timestamp'])
+
+
+class TickAggregator:
+    """
+    Aggregates one symbol's trades and order-book tops into ticks of fixed duration.
+
+    Each tick covers [start, start + granularity) on the epoch grid and carries
+    the last trade price, the high, low and traded volume of its trades, and the
+    book top at its end. The 24h ticker fields (vwap, open, change) come from the
+    last REST resync; with a vwap_window, the vwap is instead computed from the
+    trades themselves (the ticker's is used until the window holds a trade). Intervals without trades repeat the last price, so the
+    consumer still sees time advance; the feed flushes at least once per interval.
+    """
+
+    def __init__(self, symbol, granularity=DEFAULT_GRANULARITY, vwap_window=None):
+        self.symbol = symbol
+        self.granularity = granularity
+        self.vwap = vwap_estimator(vwap_window) if vwap_window else None
+        self.bucket_start = None
+        self.last_price = None
+        self.high = None
+        self.low = None
+        self.volume = 0.0
+        self.bid = None
+        self.ask = None
+        self.reference = {}  # Last REST ticker of the symbol
+
+    def resync(self, ticker):
+        """Take the 24h fields from a REST ticker; seeds the price and book top before the first trade."""
+        self.reference = ticker
+        if self.last_price is None:
+            self.last_price = _number(ticker.get('last'))
+        if self.bid is None:
+            self.bid, self.ask = _number(ticker.get('bid')), _number(ticker.get('ask'))
+
+    def _bucket(self, event_time):
+        return math.floor(event_time / self.granularity) * self.granularity
+
+    def on_trade(self, price, amount, event_time):
+        """Add a trade; returns the ticks it closed (usually none)."""
+        ticks = self.flush(event_time)
+        if self.bucket_start is None:
+            self.bucket_start = self._bucket(event_time)
+        self.last_price = price
+        self.high = price if self.high is None else max(self.high, price)
+        self.low = price if self.low is None else min(self.low, price)
+        self.volume += amount
+        if self.vwap is not None:
+            self.vwap.update(event_time, price, amount)
+        return ticks
+
+    def on_book(self, bid, ask, event_time):
+        """Update the book top; returns the ticks it closed (usually none)."""
+        ticks = self.flush(event_time)
+        if self.bucket_start is None:
+            self.bucket_start = self._bucket(event_time)
+        self.bid, self.ask = bid, ask
+        return ticks
+
+    def flush(self, now):
+        """
+        Close the current interval if it ended at or before now; the next one starts at now's interval.
+
+        Returns:
+            list of Tick: The closed tick, or an empty list.
+        """
+        if self.bucket_start is None:
+            if self.last_price is not None:  # Seeded by a resync: start ticking before the first event
+                self.bucket_start = self._bucket(now)
+            return []
+        if now < self.bucket_start + self.granularity:
+            return []
+        tick = self._tick(self.bucket_start + self.granularity)
+        self.bucket_start = self._bucket(now)
+        self.high = self.low = None
+        self.volume = 0.0
+        return [tick] if tick is not None else []
+
+    def _tick(self, end):
+        if self.last_price is None:
+            return None
+        reference = self.reference
+        vwap = self.vwap.value if self.vwap is not None else None
+        if vwap is None:
+            vwap = _number(reference.get('vwap'))
+        open_price = _number(reference.get('open_24') or reference.get('open'))
+        return Tick(
+            timestamp=datetime.fromtimestamp(end, tz=timezone.utc),
+            symbol=self.symbol,
+            last_price=self.last_price,
+            high_price=self.high if self.high is not None else self.last_price,
+            low_price=self.low if self.low is not None else self.last_price,
+            vwap=vwap if vwap is not None else self.last_price,
+            volume=self.volume,
+            bid=self.bid,
+            ask=self.ask,
+            open_price=open_price,
+            percent_change_24h=_number(reference.get('percent_change_24')),
+        )
+
+
+class StreamingTickFeed:
+    """
+    Sub-second ticks from a persistent Bitstamp WebSocket subscription.
+
+    A background thread subscribes to the live trades and order book of every
+    symbol and aggregates them into ticks of `granularity` seconds. On every
+    (re)connect, and every RESYNC_INTERVAL while connected, the REST tickers are
+    fetched so the 24h fields and the price are current after a gap. The
+    connection is re-established with exponential backoff when it fails, goes
+    quiet for STALE_TIMEOUT, or the server asks for a reconnect.
+
+    refresh() and latest() match LatestTickFeed, so a TradingBotGroup can use
+    this feed in place of the database.
+    """
+
+    # Tick volumes are the amounts traded in each tick's interval
+    traded_volume = True
+
+    def __init__(self, symbols, url=BITSTAMP_WS_URL, granularity=DEFAULT_GRANULARITY, quote='usd',
+                 resync=fetch_prices, on_tick=None, connect=websocket.create_connection, vwap_window=None):
+        """
+        Initialize the feed; call start() to connect.
+
+        Args:
+            symbols (iterable of str): The symbols to stream (e.g., ['XRP', 'BTC']).
+            url (str): The WebSocket endpoint (a local stand-in in tests).
+            granularity (float): Seconds covered by each tick.
+            quote (str): The quote currency of the pairs.
+            resync (callable, optional): Returns REST tickers keyed by symbol, like fetch_prices;
+                None disables resyncs.
+            on_tick (callable, optional): Called with each completed Tick, on the feed thread.
+            connect (callable): Opens the connection, like websocket.create_connection(url, timeout=...).
+            vwap_window (str, optional): Compute each tick's vwap from the trades over this window
+                ('5m', '1h', 'session', '24h') instead of taking the ticker's.
+        """
+        self.symbols = sorted(set(symbols))
+        self.url = url
+        self.granularity = granularity
+        self.quote = quote
+        self.resync = resync
+        self.on_tick = on_tick
+        self.connect = connect
+        self.aggregators = {symbol: TickAggregator(symbol, granularity, vwap_window) for symbol in self.symbols}
+        self.pairs = {currency_pair(symbol, quote): symbol for symbol in self.symbols}
+        self._completed = {}  # symbol -> newest completed Tick, written by the feed thread
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._connection = None
+        self._thread = None
+        self._last_resync = 0.0
+
+    def start(self):
+        """Start the feed thread."""
+        self._thread = threading.Thread(target=self._run, name='tick-stream', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the feed thread and close the connection."""
+        self._stop.set()
+        connection = self._connection
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def refresh(self):
+        """
+        Snapshot the newest completed tick of every symbol.
+
+        Returns:
+            dict: Symbol to Tick for symbols with data.
+        """
+        with self._lock:
+            self._latest = dict(self._completed)
+        return self._latest
+
+    def latest(self, symbol):
+        """Return the newest tick of a symbol as of the last refresh, or None."""
+        return self._latest.get(symbol)
+
+    def _emit(self, ticks):
+        for tick in ticks:
+            with self._lock:
+                self._completed[tick.symbol] = tick
+            if self.on_tick is not None:
+                try:
+                    self.on_tick(tick)
+                except Exception as e:
+                    logger.error(f"Streaming tick callback failed for {tick.symbol}: {type(e).__name__} - {e}")
+
+    def _resync(self):
+        self._last_resync = time.monotonic()
+        if self.resync is None:
+            return
+        tickers = self.resync(self.symbols)
+        for symbol, ticker in tickers.items():
+            self.aggregators[symbol].resync(ticker)
+        missing = set(self.symbols) - set(tickers)
+        if missing:
+            logger.warning(f"Resync returned no ticker for {', '.join(sorted(missing))}.")
+
+    def _subscribe(self, connection):
+        for pair in self.pairs:
+            for channel in (f"live_trades_{pair}", f"order_book_{pair}"):
+                connection.send(json.dumps({'event': 'bts:subscribe', 'data': {'channel': channel}}))
+
+    def _run(self):
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                self._connection = self.connect(self.url, timeout=self.granularity)
+                self._subscribe(self._connection)
+                self._resync()
+                logger.info(f"Streaming {', '.join(self.symbols)} from {self.url}.")
+                delay = RECONNECT_DELAY
+                reason = self._receive(self._connection)
+            except Exception as e:
+                reason = 'error'
+                if not self._stop.is_set():
+                    logger.error(f"Tick stream failed: {type(e).__name__} - {e}")
+            finally:
+                if self._connection is not None:
+                    try:
+                        self._connection.close()
+                    except Exception:
+                        pass
+                    self._connection = None
+            if self._stop.is_set():
+                return
+            STREAM_RECONNECTS.inc(reason=reason)
+            if reason == 'requested':
+                continue
+            logger.warning(f"Reconnecting tick stream in {delay:.1f}s ({reason}).")
+            self._stop.wait(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def _receive(self, connection):
+        """Read messages until the connection must be replaced; returns the reason."""
+        last_message = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                raw = connection.recv()
+            except websocket.WebSocketTimeoutException:
+                raw = None
+            except websocket.WebSocketConnectionClosedException:
+                return 'closed'
+            now = time.monotonic()
+            if raw == '':
+                return 'closed'
+            if raw is not None:
+                last_message = now
+                if self._handle(json.loads(raw)):
+                    return 'requested'
+            elif now - last_message > STALE_TIMEOUT:
+                return 'stale'
+            for aggregator in self.aggregators.values():
+                self._emit(aggregator.flush(time.time()))
+            if now - self._last_resync >= RESYNC_INTERVAL:
+                self._resync()
+        return 'stopped'
+
+    def _handle(self, message):
+        """Apply one message; returns True if the server asked for a reconnect."""
+        event = message.get('event', '')
+        STREAM_MESSAGES.inc(event=event or 'unknown')
+        if event == 'bts:request_reconnect':
+            logger.info("Tick stream server requested a reconnect.")
+            return True
+        channel = message.get('channel', '')
+        symbol = self.pairs.get(channel.rsplit('_', 1)[-1])
+        if symbol is None:
+            return False
+        data = message.get('data') or {}
+        aggregator = self.aggregators[symbol]
+        if event == 'trade':
+            self._emit(aggregator.on_trade(float(data['price']), float(data['amount']), _event_time(data)))
+        elif event == 'data' and data.get('bids') and data.get('asks'):
+            bid, ask = float(data['bids'][0][0]), float(data['asks'][0][0])
+            self._emit(aggregator.on_book(bid, ask, _event_time(data)))
+        return False
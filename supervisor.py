@@ -0,0 +1,255 @@
+# supervisor.py
+
+import argparse
+import importlib
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import wait
+
+import psutil
+
+from config import METRICS_HOST, SUPERVISOR_METRICS_PORT, TRADING_SYMBOLS
+from crypto_price_logger import CRYPTO_SYMBOLS
+from logging_setup import setup_logging
+from market_data import SharedTickBus
+from metrics import METRIC_PREFIX, REGISTRY, Counter, Gauge, start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+# Supervised components: name -> (module, entry function, log file). Each entry function takes the
+# tick bus as its only argument; the Telegram bot configures its own log file when imported
+WORKERS = {
+    'price_logger': ('crypto_price_logger', 'log_crypto_prices', 'crypto_price_logger.log'),
+    'alert_bot': ('xrppricealerts', 'run_alert_bot', 'xrp_bot.log'),
+    'trading_bots': ('main', 'run_trading_bots', 'live_trading_signals.log'),
+    'telegram_bot': ('xrp_telegram_bot', 'main', None),
+}
+
+# Imported once by the fork server; every worker is forked from it with these already loaded.
+# Nothing here may start a thread or open a connection at import time
+PRELOAD_MODULES = [
+    'numpy', 'pandas', 'requests', 'psycopg2', 'psycopg2.extras',
+    'config', 'metrics', 'records', 'database_handler', 'market_data', 'scheduler',
+    'logging_setup', 'rollups', 'price_alerts', 'app.fetcher',
+]
+
+# First restart delay in seconds; doubles with each crash in a row, up to the maximum
+RESTART_BACKOFF = 1.0
+MAX_RESTART_BACKOFF = 300.0
+
+# A worker that ran this long before exiting restarts without backoff
+STABLE_RUNTIME = 300
+
+# Seconds between CPU and memory reports
+REPORT_INTERVAL = 60
+
+# Seconds workers get to exit after SIGTERM before they are killed
+SHUTDOWN_TIMEOUT = 30
+
+WORKER_RESTARTS = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_supervisor_restarts_total',
+    'Worker processes restarted after they exited, by worker.',
+    ('worker',),
+))
+WORKER_UP = REGISTRY.register(Gauge(
+    f'{METRIC_PREFIX}_supervisor_worker_up',
+    '1 while the worker process is running, 0 while it waits to be restarted.',
+    ('worker',),
+))
+WORKER_CPU = REGISTRY.register(Gauge(
+    f'{METRIC_PREFIX}_supervisor_worker_cpu_percent',
+    'CPU use of the worker since the previous report, in percent of one core.',
+    ('worker',),
+))
+WORKER_MEMORY = REGISTRY.register(Gauge(
+    f'{METRIC_PREFIX}_supervisor_worker_memory_bytes',
+    'Resident memory of the worker process.',
+    ('worker',),
+))
+
+
+def _exit_on_sigterm(signum, frame):
+    # Unwind normally so finally blocks close connections and release the trading lock
+    raise SystemExit(0)
+
+
+def _worker_main(name, module, function, log_file, tick_bus):
+    """Entry point of a worker process: sets up its logging and runs the component."""
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    if log_file:
+        setup_logging(log_file)
+    logging.getLogger(__name__).info(f"Worker {name} starting {module}.{function}.")
+    entry = getattr(importlib.import_module(module), function)
+    entry(tick_bus)
+
+
+class Worker:
+    """One supervised component, its current process and its restart state."""
+
+    def __init__(self, name, module, function, log_file=None):
+        self.name = name
+        self.module = module
+        self.function = function
+        self.log_file = log_file
+        self.process = None
+        self.started_at = None
+        self.crashes = 0  # Exits in a row that came before STABLE_RUNTIME
+        self.restart_at = 0.0  # Monotonic time the next start is due
+        self.usage = None  # psutil.Process of the running worker, for CPU and memory reports
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+
+class Supervisor:
+    """
+    Runs the bots as worker processes and keeps them running.
+
+    Workers are forked from a fork server that has the shared modules
+    imported, so each one starts without re-importing numpy, pandas, psycopg2
+    and the project modules. They share a SharedTickBus: the price logger
+    fetches every symbol in one pass each minute and publishes the tickers,
+    and the other workers read them from memory instead of fetching their own.
+    A worker that exits is restarted, after a delay that doubles with every
+    crash in a row (reset once it runs for STABLE_RUNTIME). CPU and memory of
+    every worker are logged and exported every REPORT_INTERVAL.
+    """
+
+    def __init__(self, worker_names, tick_bus, context):
+        """
+        Initialize the supervisor; call run() to start the workers.
+
+        Args:
+            worker_names (iterable of str): Keys of WORKERS to run.
+            tick_bus (SharedTickBus): Bus shared by the workers, created from context.
+            context (multiprocessing context): Context the workers are started from.
+        """
+        self.workers = [Worker(name, *WORKERS[name]) for name in worker_names]
+        self.tick_bus = tick_bus
+        self.context = context
+        self._stopping = False
+        self._next_report = 0.0
+
+    def request_stop(self, signum=None, frame=None):
+        """Stop restarting workers and return from run(); safe to call from a signal handler."""
+        self._stopping = True
+
+    def start_worker(self, worker):
+        """Start a worker's process."""
+        worker.process = self.context.Process(
+            target=_worker_main, name=worker.name,
+            args=(worker.name, worker.module, worker.function, worker.log_file, self.tick_bus),
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        try:
+            worker.usage = psutil.Process(worker.process.pid)
+            worker.usage.cpu_percent(None)  # Starts the CPU measurement interval
+        except psutil.Error:
+            worker.usage = None
+        WORKER_UP.set(1, worker=worker.name)
+        logger.info(f"Started worker {worker.name} (pid {worker.process.pid}).")
+
+    def reap(self, worker):
+        """Record the exit of a worker and schedule its restart."""
+        now = time.monotonic()
+        runtime = now - worker.started_at
+        exitcode = worker.process.exitcode
+        worker.process.close()
+        worker.process = worker.usage = None
+        WORKER_UP.set(0, worker=worker.name)
+        WORKER_CPU.set(0, worker=worker.name)
+        WORKER_MEMORY.set(0, worker=worker.name)
+        if self._stopping:
+            return
+        worker.crashes = 0 if runtime >= STABLE_RUNTIME else worker.crashes + 1
+        delay = min(RESTART_BACKOFF * 2 ** (worker.crashes - 1), MAX_RESTART_BACKOFF) if worker.crashes else 0.0
+        worker.restart_at = now + delay
+        WORKER_RESTARTS.inc(worker=worker.name)
+        logger.error(
+            f"Worker {worker.name} exited with code {exitcode} after {runtime:.0f}s; restarting in {delay:.0f}s."
+        )
+
+    def report(self):
+        """Sample and log every running worker's CPU and memory."""
+        lines = []
+        for worker in self.workers:
+            if worker.usage is None:
+                lines.append(f"{worker.name} down")
+                continue
+            try:
+                cpu = worker.usage.cpu_percent(None)
+                memory = worker.usage.memory_info().rss
+            except psutil.Error:
+                continue  # Exited since the last check; reaped on the next pass
+            WORKER_CPU.set(cpu, worker=worker.name)
+            WORKER_MEMORY.set(memory, worker=worker.name)
+            lines.append(f"{worker.name} pid {worker.process.pid} cpu {cpu:.1f}% rss {memory / 2 ** 20:.1f} MiB")
+        logger.info(f"Workers: {'; '.join(lines)}.")
+
+    def run(self):
+        """Start the workers and supervise them until request_stop(); then stop them."""
+        try:
+            while not self._stopping:
+                now = time.monotonic()
+                for worker in self.workers:
+                    if worker.process is not None and not worker.process.is_alive():
+                        self.reap(worker)
+                    if worker.process is None and not self._stopping and now >= worker.restart_at:
+                        self.start_worker(worker)
+                if now >= self._next_report:
+                    self._next_report = now + REPORT_INTERVAL
+                    self.report()
+                # Wake when a worker exits, a restart is due or (at least every second) to notice a stop request
+                due = [worker.restart_at for worker in self.workers if worker.process is None]
+                timeout = max(0.0, min([1.0, self._next_report - now] + [at - now for at in due]))
+                wait([worker.process.sentinel for worker in self.workers if worker.process is not None], timeout)
+        finally:
+            self.stop()
+
+    def stop(self, timeout=SHUTDOWN_TIMEOUT):
+        """Send SIGTERM to every worker, wait up to timeout seconds, then kill the rest."""
+        self._stopping = True
+        running = [worker for worker in self.workers if worker.alive]
+        for worker in running:
+            worker.process.terminate()
+        deadline = time.monotonic() + timeout
+        for worker in running:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.name} did not stop in {timeout}s; killing it.")
+                worker.process.kill()
+                worker.process.join()
+        for worker in self.workers:
+            if worker.process is not None:
+                self.reap(worker)
+        logger.info("All workers stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bots as supervised worker processes.")
+    parser.add_argument('--workers', nargs='+', choices=sorted(WORKERS), default=list(WORKERS),
+                        help="Components to run (default: all).")
+    parser.add_argument('--symbols', nargs='+',
+                        help="Symbols published on the tick bus (default: XRP, the logged and the traded symbols).")
+    args = parser.parse_args()
+
+    setup_logging('supervisor.log')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(PRELOAD_MODULES)
+    symbols = args.symbols or ['XRP', *CRYPTO_SYMBOLS, *TRADING_SYMBOLS]
+    tick_bus = SharedTickBus([symbol.upper() for symbol in symbols], context=context)
+    start_metrics_server(SUPERVISOR_METRICS_PORT, METRICS_HOST)
+
+    supervisor = Supervisor(args.workers, tick_bus, context)
+    signal.signal(signal.SIGTERM, supervisor.request_stop)
+    signal.signal(signal.SIGINT, supervisor.request_stop)
+    logger.info(f"Supervising {', '.join(args.workers)}; tick bus symbols: {', '.join(tick_bus.symbols)}.")
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
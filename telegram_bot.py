@@ -3,13 +3,15 @@ import logging
 import time
 from requests.exceptions import RequestException
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from metrics import Timer
 
 logger = logging.getLogger(__name__)
 
-def send_telegram_message(message, retries=3, backoff_factor=2):
+@Timer('telegram_send', failed=lambda result: result is None)
+def send_telegram_message(message, retries=3, backoff_factor=2, chat_id=None):
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {
-        'chat_id': TELEGRAM_CHAT_ID,
+        'chat_id': chat_id or TELEGRAM_CHAT_ID,
         'text': message,
         'parse_mode': 'Markdown'
     }
@@ -0,0 +1,53 @@
+# tests/benchmarks/bench_charts.py
+
+import os
+from datetime import timedelta
+
+from app.xrp_messaging import generate_xrp_chart
+from chart_service import CHART_SERVICE, ChartService
+
+from .conftest import START_TIME
+
+
+class RollupBarsStandIn:
+    """Serves the twelve 15m bars of a 3-hour chart window, like crypto_price_rollups would."""
+
+    def __init__(self, end_time):
+        self.bars = []
+        price = 0.6
+        for i in range(12):
+            close = price * (1.004 if i % 3 else 0.995)
+            self.bars.append({
+                'bucket_start': end_time - timedelta(minutes=15 * (12 - i)),
+                'open': price, 'high': max(price, close) * 1.002, 'low': min(price, close) * 0.998,
+                'close': close, 'volume': 25_000.0, 'vwap': (price + close) / 2, 'tick_count': 15,
+            })
+            price = close
+
+    def fetch_all(self, query, params=None):
+        return self.bars if 'crypto_price_rollups' in query else []
+
+
+def test_generate_xrp_chart(benchmark, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    now = START_TIME + timedelta(hours=3)
+    db_handler = RollupBarsStandIn(now)
+
+    def render():
+        CHART_SERVICE.clear()  # Measure the render, not the image cache
+        filename = generate_xrp_chart(db_handler=db_handler, now=now)
+        os.remove(filename)
+        return filename
+
+    filename = benchmark.pedantic(render, rounds=5, warmup_rounds=1)
+    assert filename.endswith('.png')
+
+
+def test_chart_service_cache_hit(benchmark):
+    now = START_TIME + timedelta(hours=3)
+    db_handler = RollupBarsStandIn(now)
+    service = ChartService()
+    png = service.render(db_handler, 'XRP', '3h', now)
+
+    result = benchmark(service.render, db_handler, 'XRP', '3h', now)
+    assert result is png
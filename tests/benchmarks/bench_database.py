@@ -0,0 +1,58 @@
+# tests/benchmarks/bench_database.py
+
+import itertools
+from datetime import timedelta
+
+import pytest
+
+from records import TICK_FIELDS, Tick
+
+from .conftest import START_TIME
+
+ROWS_PER_ROUND = 1000
+
+# Temporary tables live on the handler's connection only, so benchmarks never touch real data
+CREATE_BENCH_TABLE = "CREATE TEMP TABLE IF NOT EXISTS bench_prices (LIKE crypto_prices INCLUDING DEFAULTS);"
+
+INSERT_BENCH_QUERY = f"""
+    INSERT INTO bench_prices ({', '.join(TICK_FIELDS)})
+    VALUES ({', '.join(['%s'] * len(TICK_FIELDS))});
+"""
+
+INSERT_BENCH_VALUES_QUERY = f"INSERT INTO bench_prices ({', '.join(TICK_FIELDS)}) VALUES %s;"
+
+
+@pytest.fixture
+def bench_table(db_handler):
+    if not db_handler.execute(CREATE_BENCH_TABLE):
+        pytest.skip("crypto_prices does not exist in the configured database.")
+    yield db_handler
+    db_handler.execute("DROP TABLE IF EXISTS bench_prices;")
+
+
+def _tick_rows(start):
+    return [
+        Tick(START_TIME + timedelta(minutes=start + i), 'XRP', 0.6 + i * 1e-5, vwap=0.6, volume=1000.0).as_row()
+        for i in range(ROWS_PER_ROUND)
+    ]
+
+
+def test_insert_row_by_row(benchmark, bench_table):
+    offsets = itertools.count(step=ROWS_PER_ROUND)
+
+    def insert():
+        for row in _tick_rows(next(offsets)):
+            bench_table.execute(INSERT_BENCH_QUERY, row)
+
+    benchmark.pedantic(insert, rounds=5)
+    benchmark.extra_info['rows_per_round'] = ROWS_PER_ROUND
+
+
+def test_insert_execute_values(benchmark, bench_table):
+    offsets = itertools.count(step=ROWS_PER_ROUND)
+
+    def insert():
+        return bench_table.execute_values(INSERT_BENCH_VALUES_QUERY, _tick_rows(next(offsets)), page_size=ROWS_PER_ROUND)
+
+    assert benchmark.pedantic(insert, rounds=5)
+    benchmark.extra_info['rows_per_round'] = ROWS_PER_ROUND
@@ -0,0 +1,61 @@
+# tests/benchmarks/bench_messages.py
+
+from app.comparisons import ComparisonsGenerator, MessageGenerator
+from app.templates import TELEGRAM, TEMPLATES, TWITTER, MessageTemplate, TimestampFormatter
+from app.xrp_messaging import generate_daily_summary_message, generate_message
+
+from .conftest import START_TIME
+
+LAYOUT = "🔔📈 $XRP is UP {percent:.2f}% over the last hour to ${price:.2f}!\nTime: {now}\n#Ripple #XRP #XRPPriceAlerts"
+CONTEXT = {'percent': 1.2345, 'price': 0.61234, 'now': '2024-01-01 00:00:00'}
+
+
+def test_generate_message(benchmark):
+    message = benchmark(generate_message, 0.60, 0.61234, now=START_TIME)
+    assert message.startswith("🔔📈 $XRP is UP")
+
+
+def test_generate_daily_summary_message(benchmark):
+    message = benchmark(generate_daily_summary_message, 0.63, 0.59, now=START_TIME)
+    assert "$0.59000" in message
+
+
+def test_message_generator_create_message(benchmark):
+    comparisons_generator = ComparisonsGenerator()
+    comparisons_generator.set_last_tweet_price(0.60)
+    comparisons = comparisons_generator.get_comparisons(0.61234, 0.58)
+    message = benchmark(MessageGenerator('ripple', 'XRP', 4).create_message, 0.61234, comparisons)
+    assert message.count('\n') == 4
+
+
+def test_template_render_compiled(benchmark):
+    template = MessageTemplate(LAYOUT)
+    assert benchmark(template.render, CONTEXT) == LAYOUT.format_map(CONTEXT)
+
+
+def test_template_render_format_map(benchmark):
+    """Baseline: str.format_map parses the layout on every call."""
+    benchmark(LAYOUT.format_map, CONTEXT)
+
+
+def test_registry_render_twitter(benchmark):
+    context = {'percent': 1.2345, 'price': 0.61234, 'now': START_TIME}
+    message = benchmark(TEMPLATES.render, 'xrp_up', context, TWITTER)
+    assert message.endswith('#XRPPriceAlerts')
+
+
+def test_registry_render_telegram(benchmark):
+    TEMPLATES.register('bench_telegram', "*{name}* at ${price:.5f}\nTime: {now}")
+    context = {'name': 'XRP_USD', 'price': 0.61234, 'now': START_TIME}
+    message = benchmark(TEMPLATES.render, 'bench_telegram', context, TELEGRAM)
+    assert message.startswith('*XRP\\_USD*')
+
+
+def test_timestamp_formatter_cached(benchmark):
+    formatter = TimestampFormatter('%Y-%m-%d %H:%M:%S')
+    assert benchmark(formatter, START_TIME) == START_TIME.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def test_strftime(benchmark):
+    """Baseline for test_timestamp_formatter_cached."""
+    benchmark(START_TIME.strftime, '%Y-%m-%d %H:%M:%S')
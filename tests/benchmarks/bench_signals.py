@@ -0,0 +1,88 @@
+# tests/benchmarks/bench_signals.py
+
+import io
+import itertools
+from contextlib import redirect_stdout
+from datetime import timedelta
+
+from app.xrp_messaging import get_percent_change
+from backtest import Backtest
+from crypto_price_logger import calculate_percent_change
+from indicators import VwapEngine, rolling_vwap
+from records import Tick
+from replay import ReplayDatabaseHandler, ReplayTickFeed, SimulatedClock, stub_fee_cache
+
+from .conftest import START_TIME
+
+
+def test_calculate_percent_change(benchmark):
+    result = benchmark(calculate_percent_change, 0.61234, 0.62345)
+    assert result > 0
+
+
+def test_get_percent_change(benchmark):
+    result = benchmark(get_percent_change, 0.61234, 0.62345)
+    assert result > 0
+
+
+def test_backtest_run_million_rows(benchmark, million_ticks):
+    def setup():
+        backtest = Backtest(
+            initial_capital=12800, overbought_threshold=0.01, oversold_threshold=-0.019,
+            stop_loss=-0.02, take_profit=0.015, trailing_stop_loss=0.005,
+        )
+        return (backtest,), {}
+
+    def run(backtest):
+        with redirect_stdout(io.StringIO()):
+            backtest.run(million_ticks)
+        return backtest
+
+    backtest = benchmark.pedantic(run, setup=setup, rounds=3)
+    benchmark.extra_info['rows'] = len(million_ticks)
+    benchmark.extra_info['trades'] = backtest.total_trades
+    assert backtest.total_trades > 0
+
+
+def test_trading_bot_process_new_data_per_tick(benchmark, million_ticks):
+    from trading_bot import TradingBot
+
+    clock = SimulatedClock()
+    feed = ReplayTickFeed()
+    bot = TradingBot(
+        initial_capital=1000, db_handler=ReplayDatabaseHandler(million_ticks, clock),
+        fee_cache=stub_fee_cache(), tick_feed=feed, clock=clock, notifier=lambda message: None,
+    )
+    counter = itertools.count()
+    rows = len(million_ticks)
+
+    def process_next_tick():
+        i = next(counter)
+        timestamp = START_TIME + timedelta(minutes=i)
+        clock.set(timestamp)
+        feed.set(Tick(timestamp, 'XRP', million_ticks.last_price[i % rows], vwap=million_ticks.vwap[i % rows]))
+        bot.process_new_data()
+
+    benchmark(process_next_tick)
+    bot.close()
+    assert bot.last_timestamp is not None
+
+
+def test_vwap_engine_update(benchmark, million_ticks):
+    engine = VwapEngine()
+    counter = itertools.count()
+    rows = len(million_ticks)
+    prices, volumes = million_ticks.last_price, million_ticks.volume
+
+    def update_next_tick():
+        i = next(counter)
+        return engine.update(START_TIME.timestamp() + 60 * i, prices[i % rows], volumes[i % rows])
+
+    benchmark(update_next_tick)
+    assert engine.value('1h') is not None
+
+
+def test_rolling_vwap_million_rows(benchmark, million_ticks):
+    columns = million_ticks.to_numpy()
+    vwap = benchmark(rolling_vwap, columns['timestamps'], columns['last_price'], columns['volume'], '1h')
+    assert len(vwap) == len(million_ticks)
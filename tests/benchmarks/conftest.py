@@ -0,0 +1,70 @@
+# tests/benchmarks/conftest.py
+
+import os
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+# trading_bot refuses to import without Bitstamp credentials; benchmarks never call the API
+os.environ.setdefault('BITSTAMP_MAIN_KEY', 'benchmark')
+os.environ.setdefault('BITSTAMP_MAIN_SECRET', 'benchmark')
+
+from database_handler import DatabaseHandler  # noqa: E402
+from records import BATCH_COLUMNS, TickBatch  # noqa: E402
+
+MILLION = 1_000_000
+START_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def synthetic_batch(rows, symbol='XRP', seed=42, interval=60):
+    """
+    Build a reproducible random-walk TickBatch with a trailing one-day VWAP.
+
+    Args:
+        rows (int): Number of ticks.
+        symbol (str): The symbol of the batch.
+        seed (int): Random seed, so every run benchmarks the same series.
+        interval (float): Seconds between ticks.
+
+    Returns:
+        TickBatch: The synthetic ticks.
+    """
+    rng = np.random.default_rng(seed)
+    prices = 0.6 * np.exp(np.cumsum(rng.normal(0, 0.002, rows)))
+    window = 1440
+    cumulative = np.concatenate(([0.0], np.cumsum(prices)))
+    counts = np.minimum(np.arange(1, rows + 1), window)
+    vwap = (cumulative[1:] - cumulative[np.arange(rows) + 1 - counts]) / counts
+    columns = {
+        'timestamps': START_TIME.timestamp() + np.arange(rows) * float(interval),
+        'last_price': prices,
+        'vwap': vwap,
+        'bid': prices * 0.9995,
+        'ask': prices * 1.0005,
+        'volume': rng.uniform(1_000, 50_000, rows),
+    }
+
+    batch = TickBatch(symbol)
+    for name in ('timestamps',) + BATCH_COLUMNS:
+        column = array('d')
+        column.frombytes(np.ascontiguousarray(columns[name], dtype=np.float64).tobytes())
+        setattr(batch, name, column)
+    return batch
+
+
+@pytest.fixture(scope='session')
+def million_ticks():
+    return synthetic_batch(MILLION)
+
+
+@pytest.fixture
+def db_handler():
+    """A DatabaseHandler connected to the configured Postgres, or skip when none is reachable."""
+    handler = DatabaseHandler()
+    handler.connect()
+    if handler.conn is None:
+        pytest.skip("No PostgreSQL database reachable with the configured DB_* settings.")
+    yield handler
+    handler.close()
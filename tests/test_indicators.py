@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+import pytest
+
+from indicators import SESSION, TradedVolume, rolling_vwap, traded_volumes, vwap_estimator
+
+START_TIME = 1704067200.0  # 2024-01-01 00:00 UTC
+
+
+def make_ticks(count=3000, seed=7):
+    """Irregularly spaced ticks over about two days, with gaps, idle ticks and missing volumes."""
+    rng = np.random.default_rng(seed)
+    steps = rng.choice([1.0, 30.0, 60.0, 60.0, 600.0, 5400.0], size=count, p=[0.1, 0.2, 0.3, 0.3, 0.07, 0.03])
+    times = START_TIME + np.cumsum(steps)
+    prices = 0.5 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    volumes = rng.exponential(100.0, count)
+    volumes[rng.random(count) < 0.1] = 0.0
+    volumes[rng.random(count) < 0.02] = np.nan
+    return times, prices, volumes
+
+
+def make_volumes_24h(count=2000, seed=11):
+    """A rolling 24h volume that mostly grows, sometimes shrinks, and is sometimes missing."""
+    rng = np.random.default_rng(seed)
+    volumes = 1e6 + np.cumsum(rng.normal(50.0, 200.0, count))
+    volumes[rng.random(count) < 0.03] = np.nan
+    return volumes
+
+
+@pytest.mark.parametrize('window', ['5m', '1h', '24h', SESSION, 90.0])
+def test_streaming_vwap_matches_rolling_vwap(window):
+    times, prices, volumes = make_ticks()
+    expected = rolling_vwap(times, prices, volumes, window)
+
+    estimator = vwap_estimator(window)
+    for i, (time, price, volume) in enumerate(zip(times, prices, volumes)):
+        value = estimator.update(time, price, None if math.isnan(volume) else volume)
+        if math.isnan(expected[i]):
+            assert value is None, i
+        else:
+            assert value == pytest.approx(expected[i], rel=1e-9), i
+
+
+def test_session_vwap_restarts_at_the_session_offset():
+    offset = 8 * 3600
+    times = START_TIME + np.array([7, 7.5, 8, 9]) * 3600
+    expected = rolling_vwap(times, [1.0, 2.0, 4.0, 6.0], [1.0, 1.0, 1.0, 1.0], SESSION, session_offset=offset)
+    assert list(expected) == [1.0, 1.5, 4.0, 5.0]
+
+    estimator = vwap_estimator(SESSION, session_offset=offset)
+    assert [estimator.update(time, price, 1.0) for time, price in zip(times, [1.0, 2.0, 4.0, 6.0])] == list(expected)
+
+
+def test_traded_volume_matches_traded_volumes():
+    volumes = make_volumes_24h()
+    expected = traded_volumes(volumes)
+
+    traded = TradedVolume()
+    actual = [traded.update(None if math.isnan(volume) else volume) for volume in volumes]
+    assert actual == pytest.approx(list(expected), rel=0, abs=1e-9)
+    assert expected[0] == 0.0
+    assert (expected >= 0).all()
+
+
+def test_traded_volumes_counts_only_increases():
+    volumes = [1000.0, 1010.0, 1005.0, np.nan, 1020.0, 1030.0]
+    assert list(traded_volumes(volumes)) == [0.0, 10.0, 0.0, 0.0, 0.0, 10.0]
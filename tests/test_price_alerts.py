@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+
+from price_alerts import CROSS, MOVE, AlertIndex, PriceAlert, PriceAlertBook
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class StubDatabase:
+    """Serves no stored alerts and deactivates every alert it is asked to, unless told to fail."""
+
+    def __init__(self):
+        self.fail = False
+        self.deactivated = []
+
+    def execute(self, query, params=None):
+        return True
+
+    def fetch_all(self, query, params=None):
+        return []
+
+    def execute_returning(self, query, params=None):
+        if self.fail:
+            return None
+        self.deactivated.extend(params['ids'])
+        return [{'id': alert_id} for alert_id in params['ids']]
+
+
+def make_book(*alerts):
+    messages = []
+    book = PriceAlertBook(StubDatabase(), ['XRP'], notifier=lambda message, chat_id: messages.append(chat_id),
+                          clock=lambda: NOW)
+    for alert in alerts:
+        book.add(alert)
+    return book, messages
+
+
+def test_crossed_rising_and_falling():
+    index = AlertIndex()
+    for alert_id, level in enumerate((0.4, 0.5, 0.6, 0.7)):
+        index.add(level, alert_id)
+
+    assert index.crossed(0.45, 0.65) == [1, 2]
+    assert index.crossed(0.65, 0.45) == [1, 2]
+    assert index.crossed(0.1, 0.2) == []
+    assert index.crossed(0.5, 0.5) == []
+
+
+def test_crossed_level_exactly_at_a_price():
+    index = AlertIndex()
+    index.add(0.5, 1)
+
+    # Reaching a level crosses it; leaving it again does not cross it a second time
+    assert index.crossed(0.45, 0.5) == [1]
+    assert index.crossed(0.5, 0.55) == []
+    assert index.crossed(0.55, 0.5) == [1]
+    assert index.crossed(0.5, 0.45) == []
+
+
+def test_removed_levels_no_longer_cross():
+    index = AlertIndex()
+    index.add(0.5, 1)
+    index.add(0.5, 2)
+    assert index.remove(0.5, 1)
+    assert not index.remove(0.5, 1)
+    assert index.crossed(0.4, 0.6) == [2]
+    assert len(index) == 1
+
+
+def test_cross_alert_fires_once():
+    book, messages = make_book(PriceAlert(1, 100, 'XRP', CROSS, level=0.5))
+    assert book.on_tick('XRP', 0.48) == []
+    assert [alert.id for alert in book.on_tick('XRP', 0.52)] == [1]
+    assert book.on_tick('XRP', 0.48) == []
+    assert messages == [100]
+    assert len(book) == 0
+
+
+def test_move_alert_fires_once():
+    book, messages = make_book(PriceAlert(1, 100, 'XRP', MOVE, percent=10, reference_price=0.5))
+    book.on_tick('XRP', 0.5)
+
+    # One jump across both of its levels (0.45 and 0.55) fires it once
+    assert [alert.id for alert in book.on_tick('XRP', 0.4)] == [1]
+    assert book.db_handler.deactivated == [1]
+    assert book.on_tick('XRP', 0.6) == []
+    assert messages == [100]
+
+
+def test_failed_deactivation_is_retried_on_the_next_tick():
+    book, messages = make_book(PriceAlert(1, 100, 'XRP', CROSS, level=0.5))
+    book.on_tick('XRP', 0.48)
+    book.db_handler.fail = True
+    assert book.on_tick('XRP', 0.52) == []
+    assert messages == []
+
+    book.db_handler.fail = False
+    # The price went back below the level, but the recorded crossing still fires
+    assert [alert.id for alert in book.on_tick('XRP', 0.49)] == [1]
+    assert messages == [100]
+    assert book.on_tick('XRP', 0.52) == []
@@ -0,0 +1,68 @@
+from scheduler import FixedRateScheduler
+
+
+class FakeClock:
+    """Epoch time that only moves when the scheduler sleeps or a task says so."""
+
+    def __init__(self, now):
+        self.now = now
+        self.oversleep = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds + self.oversleep
+        self.oversleep = 0.0
+
+
+def run(clock, durations, iterations, interval=60, offset=0.0):
+    """Run a task that takes durations[i] seconds on run i; returns the scheduler and the slots run."""
+    scheduler = FixedRateScheduler(interval, offset=offset, clock=clock, sleep=clock.sleep)
+    slots = []
+
+    def task(slot_time):
+        slots.append(slot_time.timestamp())
+        clock.now += durations.get(len(slots) - 1, 0.5)
+
+    scheduler.run(task, iterations=iterations)
+    return scheduler, slots
+
+
+def test_runs_on_the_grid():
+    clock = FakeClock(1000.5)
+    scheduler, slots = run(clock, {}, 3, offset=5)
+    assert slots == [1025, 1085, 1145]
+    assert (scheduler.runs, scheduler.overruns, scheduler.skipped_slots) == (3, 0, 0)
+
+
+def test_overrun_skips_the_covered_slots():
+    clock = FakeClock(1000.5)
+    # The first run takes 130s: the slots at 1080 and 1140 pass while it is busy
+    scheduler, slots = run(clock, {0: 130}, 3)
+    assert slots == [1020, 1200, 1260]
+    assert (scheduler.runs, scheduler.overruns, scheduler.skipped_slots) == (3, 1, 2)
+
+
+def test_late_wake_up_skips_stale_slots():
+    clock = FakeClock(1000.5)
+    clock.oversleep = 200  # e.g., the machine was suspended
+    scheduler, slots = run(clock, {}, 1)
+    assert slots == [1260]
+    assert (scheduler.runs, scheduler.overruns, scheduler.skipped_slots) == (1, 0, 4)
+
+
+def test_clock_jump_back_realigns_to_the_new_time():
+    clock = FakeClock(1000.5)
+    slots = []
+
+    def jump_back(slot_time):
+        slots.append(slot_time.timestamp())
+        if len(slots) == 1:
+            clock.now -= 600
+
+    scheduler = FixedRateScheduler(60, clock=clock, sleep=clock.sleep)
+    scheduler.run(jump_back, iterations=3)
+    # Without realigning, the second run would wait ten minutes for the slot at 1080
+    assert slots == [1020, 480, 540]
+    assert (scheduler.runs, scheduler.overruns, scheduler.skipped_slots) == (3, 0, 0)
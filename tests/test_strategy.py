@@ -0,0 +1,51 @@
+import math
+
+from strategy import BUY, SELL, VwapStrategy
+
+
+def _replay(strategy, times, prices, vwaps):
+    trades = []
+    for time, price, vwap in zip(times, prices, vwaps):
+        if strategy.on_tick(time, price, vwap) & SELL:
+            trades.append(strategy.last_trade)
+    return trades
+
+
+def _trade_key(trade):
+    return (trade.entry_time, trade.entry_price, trade.exit_time, trade.exit_price, round(trade.profit_loss, 9))
+
+
+def test_nan_vwap_is_no_buy_signal():
+    strategy = VwapStrategy(1000)
+    assert strategy.on_tick(0, 1.0, float('nan')) == 0
+    assert strategy.position is None
+    assert strategy.run([0], [1.0], [float('nan')]) == []
+    assert strategy.position is None
+
+
+def test_zero_vwap_is_no_buy_signal():
+    strategy = VwapStrategy(1000)
+    assert strategy.on_tick(0, 1.0, 0.0) == 0
+    assert strategy.on_tick(60, 0.0, 0.0) == 0
+    assert strategy.position is None
+
+
+def test_on_tick_and_run_agree_with_missing_vwaps():
+    nan = float('nan')
+    prices = [1.00, 0.97, 0.97, 0.98, 0.99, 0.97, 1.00, 0.96, 0.95, 0.99, 0.97, 0.97, 1.00]
+    vwaps = [1.00, nan, 0.0, 1.00, 1.00, 1.00, 1.00, nan, 1.00, 1.00, 0.0, 1.00, 1.00]
+    times = [index * 3600.0 for index in range(len(prices))]
+
+    streamed = _replay(VwapStrategy(1000, loss_cooldown=0), times, prices, vwaps)
+    batched = VwapStrategy(1000, loss_cooldown=0).run(times, prices, vwaps)
+
+    assert streamed
+    assert [_trade_key(trade) for trade in streamed] == [_trade_key(trade) for trade in batched]
+    # No position is ever opened on a tick whose VWAP is missing or zero
+    for trade in streamed:
+        vwap = vwaps[times.index(trade.entry_time.timestamp())]
+        assert vwap > 0 and not math.isnan(vwap)
+
+
+def test_buy_on_oversold_tick():
+    assert VwapStrategy(1000).on_tick(0, 0.97, 1.0) & BUY
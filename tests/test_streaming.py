@@ -0,0 +1,132 @@
+import math
+import threading
+import time
+
+import pytest
+
+from streaming import StreamingTickFeed
+
+from .ws_stand_in import StandInWebSocketServer
+
+GRANULARITY = 0.5
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class Resync:
+    """REST ticker stand-in that counts its calls; the ticker can be changed between connections."""
+
+    def __init__(self, vwap='0.49'):
+        self.calls = 0
+        self.ticker = {'last': '0.5', 'vwap': vwap, 'bid': '0.499', 'ask': '0.501', 'open': '0.48',
+                       'percent_change_24': '1.5'}
+
+    def __call__(self, symbols):
+        self.calls += 1
+        return {'XRP': dict(self.ticker)}
+
+
+@pytest.fixture
+def server():
+    server = StandInWebSocketServer().start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def feed_factory(server):
+    feeds = []
+
+    def start(resync=None):
+        ticks = []
+        lock = threading.Lock()
+
+        def on_tick(tick):
+            with lock:
+                ticks.append(tick)
+
+        feed = StreamingTickFeed(['XRP'], url=server.url, granularity=GRANULARITY, resync=resync, on_tick=on_tick)
+        feeds.append(feed.start())
+        assert wait_for(lambda: server.subscribed('live_trades_xrpusd') and server.subscribed('order_book_xrpusd'))
+        return feed, ticks
+
+    yield start
+    for feed in feeds:
+        feed.close()
+
+
+def _next_interval_start():
+    """Sleep until just after an interval boundary and return that boundary (epoch seconds)."""
+    start = math.floor(time.time() / GRANULARITY) * GRANULARITY + GRANULARITY
+    time.sleep(max(0.0, start - time.time()) + 0.02)
+    return start
+
+
+def test_trades_aggregate_into_one_tick(server, feed_factory):
+    feed, ticks = feed_factory()
+    start = _next_interval_start()
+    server.publish_book('xrpusd', 0.5, 0.51, start)
+    server.publish_trade('xrpusd', 0.50, 10, start)
+    server.publish_trade('xrpusd', 0.53, 5, start + 0.01)
+    server.publish_trade('xrpusd', 0.49, 2, start + 0.02)
+    server.publish_trade('xrpusd', 0.52, 3, start + 0.03)
+
+    end = start + GRANULARITY
+    assert wait_for(lambda: any(tick.timestamp.timestamp() == end for tick in ticks))
+    tick = next(tick for tick in ticks if tick.timestamp.timestamp() == end)
+    assert tick.symbol == 'XRP'
+    assert tick.last_price == 0.52
+    assert tick.high_price == 0.53
+    assert tick.low_price == 0.49
+    assert tick.volume == 20
+    assert (tick.bid, tick.ask) == (0.5, 0.51)
+    assert feed.refresh()['XRP'].timestamp.timestamp() >= end
+
+
+def test_idle_intervals_repeat_the_last_price(server, feed_factory):
+    feed, ticks = feed_factory()
+    start = _next_interval_start()
+    server.publish_trade('xrpusd', 0.61, 4, start)
+
+    # No further events: later intervals still tick, at the last price and without volume
+    assert wait_for(lambda: any(tick.timestamp.timestamp() > start + GRANULARITY for tick in ticks))
+    idle = [tick for tick in ticks if tick.timestamp.timestamp() > start + GRANULARITY]
+    assert all(tick.last_price == 0.61 and tick.volume == 0 for tick in idle)
+    assert all(tick.high_price == tick.low_price == 0.61 for tick in idle)
+
+
+def test_reconnects_when_the_server_requests_it(server, feed_factory):
+    resync = Resync()
+    feed, ticks = feed_factory(resync)
+    assert server.connections == 1
+    server.request_reconnect()
+
+    # A requested reconnect is immediate and subscribes to every channel again
+    assert wait_for(lambda: server.connections == 2 and server.subscribed('live_trades_xrpusd'), timeout=2)
+    assert server.subscriptions.count('live_trades_xrpusd') == 2
+    assert server.subscriptions.count('order_book_xrpusd') == 2
+    assert wait_for(lambda: resync.calls == 2)
+
+
+def test_resyncs_after_a_dropped_connection(server, feed_factory):
+    resync = Resync(vwap='0.49')
+    feed, ticks = feed_factory(resync)
+    # Before any trade, ticks are seeded from the REST ticker
+    assert wait_for(lambda: ticks)
+    assert ticks[-1].last_price == 0.5 and ticks[-1].vwap == 0.49
+    assert ticks[-1].open_price == 0.48 and ticks[-1].percent_change_24h == 1.5
+
+    resync.ticker['vwap'] = '0.47'
+    server.drop_connections()
+
+    # Reconnected after the backoff delay, with the 24h fields fetched again
+    assert wait_for(lambda: server.connections == 2 and server.subscribed('live_trades_xrpusd'))
+    assert wait_for(lambda: resync.calls == 2)
+    assert wait_for(lambda: ticks[-1].vwap == 0.47)
@@ -0,0 +1,173 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import tick_wal
+from records import Tick
+from tick_wal import MERGE_REPLAY_QUERY, TickWal
+
+START_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class StubDatabase:
+    """Records COPY batches and rollup rebuilds; copy_rows fails once `fail_after` batches went through."""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.batches = []
+        self.executed = []
+
+    def copy_rows(self, copy_query, rows, before=None, after=None):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            return False
+        assert after == MERGE_REPLAY_QUERY
+        self.batches.append(list(rows))
+        return True
+
+    def execute(self, query, params=None):
+        self.executed.append(params)
+        return True
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def make_tick(index, symbol='XRP'):
+    return Tick(START_TIME + timedelta(minutes=index), symbol, 0.5 + index / 1000, vwap=0.5, volume=1000.0 + index)
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.wal'))
+
+
+@pytest.fixture
+def wal_dir(tmp_path):
+    return str(tmp_path / 'wal')
+
+
+def test_queued_ticks_survive_reopening(wal_dir):
+    wal = TickWal(wal_dir)
+    for index in range(5):
+        assert wal.append(make_tick(index))
+    wal.close()
+
+    wal = TickWal(wal_dir)
+    assert wal.pending == 5
+    assert wal.last_price('XRP') == make_tick(4).last_price
+    db = StubDatabase()
+    assert wal.replay(db)
+    assert db.rows == [make_tick(index).as_row() for index in range(5)]
+    assert wal.pending == 0
+    assert segment_files(wal_dir) == []
+
+
+def test_torn_record_ends_the_log(wal_dir):
+    wal = TickWal(wal_dir)
+    for index in range(4):
+        wal.append(make_tick(index))
+    segment = wal.segments[-1]
+    # A crash mid-write: the last record's payload does not match its CRC
+    last_payload_end = segment.end
+    segment.map[last_payload_end - 2] ^= 0xFF
+    segment.map.flush()
+    wal.close()
+
+    wal = TickWal(wal_dir)
+    assert wal.pending == 3
+    assert wal.last_price('XRP') == make_tick(2).last_price
+    # New ticks are written over the torn record
+    assert wal.append(make_tick(10))
+    wal.close()
+
+    wal = TickWal(wal_dir)
+    assert wal.pending == 4
+    db = StubDatabase()
+    assert wal.replay(db)
+    assert db.rows == [make_tick(index).as_row() for index in (0, 1, 2, 10)]
+
+
+def test_failed_replay_resumes_after_the_last_copied_batch(wal_dir):
+    wal = TickWal(wal_dir)
+    for index in range(7):
+        wal.append(make_tick(index))
+    assert not wal.replay(StubDatabase(fail_after=1), batch_size=3)
+    assert wal.pending == 4
+    wal.close()
+
+    wal = TickWal(wal_dir)
+    assert wal.pending == 4
+    db = StubDatabase()
+    assert wal.replay(db, batch_size=3)
+    assert db.rows == [make_tick(index).as_row() for index in range(3, 7)]
+
+
+def test_crash_between_copy_and_mark_replays_the_batch_again(wal_dir, monkeypatch):
+    wal = TickWal(wal_dir)
+    for index in range(5):
+        wal.append(make_tick(index))
+
+    def crash(segment, offset):
+        raise RuntimeError("crashed before marking the batch replayed")
+
+    first = StubDatabase()
+    with monkeypatch.context() as patch:
+        patch.setattr(tick_wal._Segment, 'mark_replayed', crash)
+        with pytest.raises(RuntimeError):
+            wal.replay(first, batch_size=2)
+    assert first.rows == [make_tick(index).as_row() for index in range(2)]
+    wal.close()
+
+    # The copied batch is sent again; the staging merge (MERGE_REPLAY_QUERY) skips rows already stored
+    wal = TickWal(wal_dir)
+    assert wal.pending == 5
+    db = StubDatabase()
+    assert wal.replay(db, batch_size=2)
+    assert db.rows == [make_tick(index).as_row() for index in range(5)]
+
+
+def test_full_segments_roll_over(wal_dir):
+    wal = TickWal(wal_dir, segment_size=512)
+    for index in range(20):
+        assert wal.append(make_tick(index))
+    files = segment_files(wal_dir)
+    assert len(files) > 2
+    assert files[0] == '00000001.wal'
+    wal.close()
+
+    wal = TickWal(wal_dir, segment_size=512)
+    assert wal.pending == 20
+    # Replay stops partway: the fully replayed segments are deleted, the rest stay queued
+    assert not wal.replay(StubDatabase(fail_after=2), batch_size=3)
+    assert 0 < len(segment_files(wal_dir)) < len(files)
+    remaining = wal.pending
+    wal.close()
+
+    wal = TickWal(wal_dir, segment_size=512)
+    assert wal.pending == remaining
+    db = StubDatabase()
+    assert wal.replay(db)
+    assert db.rows == [make_tick(index).as_row() for index in range(20 - remaining, 20)]
+    assert segment_files(wal_dir) == []
+    assert wal.append(make_tick(20))
+    assert segment_files(wal_dir) == ['00000001.wal']
+
+
+def test_replay_rebuilds_rollups_of_the_replayed_days(wal_dir):
+    wal = TickWal(wal_dir)
+    wal.append(make_tick(0, 'XRP'))
+    wal.append(make_tick(1, 'BTC'))
+    db = StubDatabase()
+    assert wal.replay(db)
+    rebuilt = {(params['symbol'], params['start_time'], params['end_time']) for params in db.executed}
+    assert rebuilt == {
+        ('XRP', START_TIME, START_TIME + timedelta(days=1)),
+        ('BTC', START_TIME, START_TIME + timedelta(days=1)),
+    }
+
+
+def test_record_larger_than_a_segment_is_refused(wal_dir):
+    wal = TickWal(wal_dir, segment_size=64)
+    assert not wal.append(make_tick(0))
+    assert wal.pending == 0
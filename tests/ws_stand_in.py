@@ -0,0 +1,180 @@
+import base64
+import hashlib
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+# Appended to the client key to derive Sec-WebSocket-Accept (RFC 6455)
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class _StandInWebSocketHandler(socketserver.BaseRequestHandler):
+    """One client of StandInWebSocketServer: the handshake, then text frames both ways."""
+
+    def handle(self):
+        server = self.server.stand_in
+        request = b''
+        while b'\r\n\r\n' not in request:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return
+            request += chunk
+        headers = dict(
+            line.split(': ', 1) for line in request.decode('latin-1').split('\r\n')[1:] if ': ' in line
+        )
+        key = headers.get('Sec-WebSocket-Key', headers.get('sec-websocket-key', ''))
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode()).digest()).decode()
+        self.request.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+
+        client = server._add_client(self.request)
+        try:
+            while True:
+                opcode, payload = self._read_frame()
+                if opcode is None or opcode == 0x8:
+                    return
+                if opcode == 0x9:
+                    server._send(client, payload, opcode=0xA)
+                elif opcode == 0x1:
+                    server._on_message(client, json.loads(payload))
+        except OSError:
+            pass
+        finally:
+            server._remove_client(client)
+
+    def _read_exactly(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _read_frame(self):
+        header = self._read_exactly(2)
+        if header is None:
+            return None, None
+        opcode, length = header[0] & 0x0F, header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self._read_exactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._read_exactly(8))[0]
+        mask = self._read_exactly(4) if header[1] & 0x80 else b'\0\0\0\0'
+        payload = self._read_exactly(length) if length else b''
+        if payload is None:
+            return None, None
+        return opcode, bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+
+class StandInWebSocketServer:
+    """
+    A local stand-in for the Bitstamp WebSocket API, for exercising streaming.StreamingTickFeed.
+
+    Clients subscribe with bts:subscribe as on Bitstamp; publish_trade() and
+    publish_book() push events to the subscribers of a pair's channels.
+    request_reconnect() and drop_connections() exercise the feed's reconnect
+    logic. Standard library only; text frames up to 64 KiB.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self._server = socketserver.ThreadingTCPServer((host, port), _StandInWebSocketHandler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self._lock = threading.Lock()
+        self._clients = {}  # socket -> set of subscribed channels
+        self.subscriptions = []  # Every channel subscribed, in order, across connections
+        self.connections = 0
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"ws://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name='ws-stand-in', daemon=True).start()
+        return self
+
+    def close(self):
+        self.drop_connections()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _add_client(self, connection):
+        with self._lock:
+            self._clients[connection] = set()
+            self.connections += 1
+        return connection
+
+    def _remove_client(self, connection):
+        with self._lock:
+            self._clients.pop(connection, None)
+
+    def _on_message(self, connection, message):
+        if message.get('event') == 'bts:subscribe':
+            channel = message['data']['channel']
+            with self._lock:
+                self._clients[connection].add(channel)
+                self.subscriptions.append(channel)
+            self._send(connection, json.dumps({'event': 'bts:subscription_succeeded', 'channel': channel, 'data': {}}))
+
+    def _send(self, connection, text, opcode=0x1):
+        payload = text.encode() if isinstance(text, str) else text
+        header = bytes([0x80 | opcode, len(payload)]) if len(payload) < 126 else (
+            bytes([0x80 | opcode, 126]) + struct.pack('!H', len(payload))
+        )
+        try:
+            connection.sendall(header + payload)
+        except OSError:
+            pass
+
+    def subscribed(self, channel):
+        """Whether any connected client is subscribed to a channel."""
+        with self._lock:
+            return any(channel in channels for channels in self._clients.values())
+
+    def publish(self, channel, event, data):
+        """Send an event to every client subscribed to a channel."""
+        text = json.dumps({'event': event, 'channel': channel, 'data': data})
+        with self._lock:
+            clients = [connection for connection, channels in self._clients.items() if channel in channels]
+        for connection in clients:
+            self._send(connection, text)
+
+    def publish_trade(self, pair, price, amount, timestamp=None):
+        """Publish a live trade of a pair (e.g., 'xrpusd'); timestamp in epoch seconds, default now."""
+        timestamp = time.time() if timestamp is None else timestamp
+        self.publish(f"live_trades_{pair}", 'trade', {
+            'price': price, 'amount': amount, 'type': 0,
+            'timestamp': str(int(timestamp)), 'microtimestamp': str(int(timestamp * 1e6)),
+        })
+
+    def publish_book(self, pair, bid, ask, timestamp=None):
+        """Publish an order-book snapshot of a pair with the given top of book."""
+        timestamp = time.time() if timestamp is None else timestamp
+        self.publish(f"order_book_{pair}", 'data', {
+            'bids': [[str(bid), '1000']], 'asks': [[str(ask), '1000']],
+            'timestamp': str(int(timestamp)), 'microtimestamp': str(int(timestamp * 1e6)),
+        })
+
+    def request_reconnect(self):
+        """Ask every client to reconnect, as Bitstamp does before maintenance."""
+        with self._lock:
+            clients = list(self._clients)
+        for connection in clients:
+            self._send(connection, json.dumps({'event': 'bts:request_reconnect', 'channel': '', 'data': ''}))
+
+    def drop_connections(self):
+        """Close every client connection without a close frame, like a network failure."""
+        with self._lock:
+            clients = list(self._clients)
+        for connection in clients:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
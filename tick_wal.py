@@ -0,0 +1,254 @@
+# tick_wal.py
+
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+from metrics import METRIC_PREFIX, REGISTRY, Counter
+from records import TICK_FIELDS, Tick
+from rollups import RESOLUTIONS, align_to_resolution, rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Bytes per segment file; a tick record takes about 250, so one segment holds a few hours of outage
+WAL_SEGMENT_SIZE = 1024 * 1024
+
+# Rows sent per COPY when replaying
+REPLAY_BATCH_SIZE = 5000
+
+# Segment header: magic, then the offset up to which records have been replayed
+_MAGIC = b'TICKWAL1'
+_HEADER = struct.Struct('<8sQ')
+# Record header: payload length and CRC-32 of the payload; a zero length marks the end of the records
+_RECORD = struct.Struct('<II')
+
+_FIELD_LIST = ', '.join(TICK_FIELDS)
+
+# Replayed ticks go through a staging table, so ticks a crash left both in the database and
+# unmarked in the WAL are not inserted twice
+CREATE_REPLAY_TABLE = f"""
+    CREATE TEMP TABLE crypto_prices_replay ON COMMIT DROP AS
+    SELECT {_FIELD_LIST} FROM crypto_prices WITH NO DATA;
+"""
+COPY_REPLAY_QUERY = f"COPY crypto_prices_replay ({_FIELD_LIST}) FROM STDIN WITH (FORMAT csv)"
+MERGE_REPLAY_QUERY = f"""
+    INSERT INTO crypto_prices ({_FIELD_LIST})
+    SELECT {_FIELD_LIST} FROM crypto_prices_replay AS r
+    WHERE NOT EXISTS (
+        SELECT 1 FROM crypto_prices AS p WHERE p.symbol = r.symbol AND p.timestamp = r.timestamp
+    );
+"""
+
+WAL_RECORDS = REGISTRY.register(Counter(
+    f'{METRIC_PREFIX}_tick_wal_records_total',
+    'Ticks written to (queued) and replayed from the write-ahead log.',
+    ('event',),
+))
+
+
+def _encode(tick):
+    row = list(tick.as_row())
+    row[0] = tick.timestamp.isoformat()
+    return json.dumps(row, separators=(',', ':')).encode('utf-8')
+
+
+def _decode(payload):
+    row = json.loads(payload)
+    row[0] = datetime.fromisoformat(row[0])
+    return Tick(**dict(zip(TICK_FIELDS, row)))
+
+
+class _Segment:
+    """One memory-mapped segment file."""
+
+    def __init__(self, path, size):
+        self.path = path
+        self.number = int(os.path.basename(path).split('.')[0])
+        self.file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+        if os.fstat(self.file.fileno()).st_size < size:
+            self.file.truncate(size)  # Zero-filled: a zero record length ends the records
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        magic, replayed = _HEADER.unpack_from(self.map, 0)
+        if magic != _MAGIC:
+            replayed = _HEADER.size
+            _HEADER.pack_into(self.map, 0, _MAGIC, replayed)
+            self.map.flush()
+        self.replayed = replayed
+        self.end = _HEADER.size  # Offset after the last valid record, found by scan()
+
+    def scan(self):
+        """Return (offset after the record, payload) for every valid record; sets end to the first free offset."""
+        records = []
+        offset = _HEADER.size
+        size = len(self.map)
+        while offset + _RECORD.size <= size:
+            length, crc = _RECORD.unpack_from(self.map, offset)
+            start = offset + _RECORD.size
+            if length == 0 or start + length > size:
+                break
+            payload = bytes(self.map[start:start + length])
+            if zlib.crc32(payload) != crc:
+                logger.warning(f"Ignoring torn record at {self.path}:{offset} and everything after it.")
+                break
+            offset = start + length
+            records.append((offset, payload))
+        self.end = offset
+        return records
+
+    def append(self, payload):
+        """Write a record and flush it to disk; returns False if the segment is full."""
+        start = self.end + _RECORD.size
+        if start + len(payload) + _RECORD.size > len(self.map):
+            return False
+        # Payload first, then its header: a crash in between leaves a zero length, i.e. no record
+        self.map[start:start + len(payload)] = payload
+        _RECORD.pack_into(self.map, self.end, len(payload), zlib.crc32(payload))
+        self.map.flush()
+        self.end = start + len(payload)
+        return True
+
+    def mark_replayed(self, offset):
+        self.replayed = offset
+        _HEADER.pack_into(self.map, 0, _MAGIC, offset)
+        self.map.flush()
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+class TickWal:
+    """
+    Append-only write-ahead log of ticks that could not be written to the database.
+
+    Ticks are appended as length- and CRC-prefixed JSON records to memory-mapped
+    segment files of WAL_SEGMENT_SIZE bytes, each flushed to disk before
+    append() returns, so a queued tick survives a crash of the process. Each
+    segment's header records how far it has been replayed. On start-up the
+    segments are scanned, and a record torn by a crash ends the scan.
+
+    replay() loads the queued ticks with bulk COPY, oldest first, and rebuilds
+    the rollup bars they touch. Segments are deleted once replayed. A TickWal
+    belongs to one process; give every process its own directory.
+    """
+
+    def __init__(self, directory, segment_size=WAL_SEGMENT_SIZE):
+        """
+        Open the log, creating the directory if needed.
+
+        Args:
+            directory (str): Directory of the segment files.
+            segment_size (int): Bytes per segment file.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        os.makedirs(directory, exist_ok=True)
+        self.segments = []
+        self.last_ticks = {}  # Symbol -> newest queued Tick
+        self.pending = 0
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.wal'))
+        for name in names:
+            segment = _Segment(os.path.join(directory, name), segment_size)
+            for offset, payload in segment.scan():
+                if offset > segment.replayed:
+                    self.pending += 1
+                    tick = _decode(payload)
+                    self.last_ticks[tick.symbol] = tick
+            self.segments.append(segment)
+        if self.pending:
+            logger.warning(f"{self.pending} ticks in {directory} wait to be replayed.")
+
+    def append(self, tick):
+        """
+        Queue a tick durably.
+
+        Returns:
+            bool: True once the tick is on disk, False if it could not be written.
+        """
+        payload = _encode(tick)
+        try:
+            if not self.segments or not self.segments[-1].append(payload):
+                number = self.segments[-1].number + 1 if self.segments else 1
+                segment = _Segment(os.path.join(self.directory, f"{number:08d}.wal"), self.segment_size)
+                self.segments.append(segment)
+                if not segment.append(payload):
+                    logger.error(f"Tick record of {len(payload)} bytes does not fit a WAL segment.")
+                    return False
+        except (OSError, ValueError) as e:
+            logger.error(f"Error writing {tick.symbol} tick to the WAL: {type(e).__name__} - {e}")
+            return False
+        self.pending += 1
+        self.last_ticks[tick.symbol] = tick
+        WAL_RECORDS.inc(event='queued')
+        return True
+
+    def last_price(self, symbol):
+        """The price of the newest queued tick of a symbol, or None."""
+        tick = self.last_ticks.get(symbol)
+        return tick.last_price if tick is not None else None
+
+    def replay(self, db_handler, batch_size=REPLAY_BATCH_SIZE):
+        """
+        Write every queued tick to crypto_prices with bulk COPY, oldest first.
+
+        Ticks already in the table (same symbol and timestamp) are skipped, and
+        the rollup bars of the replayed days are rebuilt from the raw ticks.
+
+        Args:
+            db_handler (DatabaseHandler): The database handler instance.
+            batch_size (int): Maximum rows per COPY.
+
+        Returns:
+            bool: True if the log is empty afterwards, False if a batch failed (it stays queued).
+        """
+        replayed = []
+        try:
+            for segment in list(self.segments):
+                records = [(offset, payload) for offset, payload in segment.scan() if offset > segment.replayed]
+                for start in range(0, len(records), batch_size):
+                    batch = records[start:start + batch_size]
+                    ticks = [_decode(payload) for _, payload in batch]
+                    if not db_handler.copy_rows(
+                        COPY_REPLAY_QUERY, [tick.as_row() for tick in ticks],
+                        before=CREATE_REPLAY_TABLE, after=MERGE_REPLAY_QUERY,
+                    ):
+                        logger.warning(f"WAL replay stopped; {self.pending} ticks remain queued.")
+                        return False
+                    segment.mark_replayed(batch[-1][0])
+                    self.pending -= len(ticks)
+                    replayed.extend(ticks)
+                    WAL_RECORDS.inc(len(ticks), event='replayed')
+                if segment is not self.segments[-1] or not self.pending:
+                    segment.close()
+                    os.remove(segment.path)
+                    self.segments.remove(segment)
+        finally:
+            if replayed:
+                logger.info(f"Replayed {len(replayed)} ticks from {self.directory}.")
+                self._rebuild_rollups(db_handler, replayed)
+        self.last_ticks.clear()
+        return True
+
+    @staticmethod
+    def _rebuild_rollups(db_handler, ticks):
+        spans = {}
+        for tick in ticks:
+            first, last = spans.get(tick.symbol, (tick.timestamp, tick.timestamp))
+            spans[tick.symbol] = (min(first, tick.timestamp), max(last, tick.timestamp))
+        for symbol, (first, last) in spans.items():
+            # Day-aligned bounds hold whole bars of every resolution
+            start_time = align_to_resolution(first, '1d')
+            end_time = align_to_resolution(last, '1d') + timedelta(days=1)
+            for resolution in RESOLUTIONS:
+                if not rebuild_rollups(db_handler, symbol, resolution, start_time, end_time):
+                    logger.error(f"Failed to rebuild {resolution} bars for {symbol} after the WAL replay.")
+
+    def close(self):
+        """Unmap and close the segment files."""
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
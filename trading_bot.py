@@ -1,10 +1,15 @@
 #trading_bot.py
 
 import logging
-from datetime import datetime, timezone, timedelta
-from logging.handlers import RotatingFileHandler
+from datetime import datetime, timedelta, timezone
 from database_handler import DatabaseHandler
+from indicators import SESSION, VWAP_WINDOWS, RollingVolatility, TradedVolume, VwapEngine
+from market_data import FeeCache, LatestTickFeed
+from metrics import Timer
+from records import Tick
+from state_store import BotStateStore
 from telegram_bot import send_telegram_message
+from strategy import BUY, BUY_BLOCKED, SELL, TRAIL, VwapStrategy
 from decimal import Decimal
 import hashlib
 import hmac
@@ -13,16 +18,8 @@ import requests
 import uuid
 import os
 
-# Set up logging with rotating handler
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-# Remove any default handlers if already added to avoid duplicate logs
-if not logger.handlers:
-    handler = RotatingFileHandler('live_trading_signals.log', maxBytes=5*1024*1024, backupCount=5)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+# Handlers are configured once per process by the entry point (see logging_setup.py)
+logger = logging.getLogger(__name__)
 
 # Load API key and secret from environment variables
 BITSTAMP_MAIN_KEY = os.getenv("BITSTAMP_MAIN_KEY")
@@ -35,278 +32,511 @@ if not BITSTAMP_MAIN_KEY or not BITSTAMP_MAIN_SECRET:
     logger.error("API key or secret is missing. Please set BITSTAMP_MAIN_KEY and BITSTAMP_MAIN_SECRET.")
     raise ValueError("Missing Bitstamp API key or secret.")
 
+# Hashtags appended to buy signals per symbol
+SYMBOL_HASHTAGS = {
+    'XRP': '#Ripple #XRP',
+    'BTC': '#Bitcoin #BTC',
+    'ETH': '#Ethereum #ETH',
+}
+
+# Lets trade signals of several bots and symbols share the trade_signals table
+ADD_TRADE_SIGNAL_COLUMNS = """
+    ALTER TABLE trade_signals
+        ADD COLUMN IF NOT EXISTS symbol VARCHAR(16),
+        ADD COLUMN IF NOT EXISTS bot_id VARCHAR(64);
+"""
+
+# Seconds per price fed to the rolling volatility: the logger's tick interval, so a window of 1440
+# changes spans a day whether the ticks come from the database or a sub-second streaming feed
+VOLATILITY_INTERVAL = 60
+
+# Threshold names accepted by TradingBot, mapped to VwapStrategy arguments
+STRATEGY_THRESHOLDS = {
+    'overbought_threshold': 'overbought_threshold',
+    'oversold_threshold': 'oversold_threshold',
+    'stop_loss_threshold': 'stop_loss',
+    'take_profit_threshold': 'take_profit',
+    'trailing_stop_loss_percentage': 'trailing_stop_loss',
+    'loss_cooldown': 'loss_cooldown',
+}
+
+
+def _strategy_attribute(name):
+    """A TradingBot attribute stored on its VwapStrategy."""
+    return property(
+        lambda self: getattr(self.strategy, name),
+        lambda self, value: setattr(self.strategy, name, value),
+    )
+
+
+@Timer('bitstamp_trading_fees', failed=lambda result: 'error' in result)
+def fetch_trading_fees(market_symbol: str) -> dict:
+    """
+    Fetch trading fees for the specified market.
+    """
+    try:
+        timestamp = str(int(round(time.time() * 1000)))
+        nonce = str(uuid.uuid4())
+
+        message = 'BITSTAMP ' + BITSTAMP_MAIN_KEY + \
+                  'POST' + \
+                  'www.bitstamp.net' + \
+                  f'/api/v2/fees/trading/{market_symbol}/' + \
+                  '' + \
+                  '' + \
+                  nonce + \
+                  timestamp + \
+                  'v2' + \
+                  ''  # No payload in this case
+
+        message = message.encode('utf-8')
+        signature = hmac.new(BITSTAMP_MAIN_SECRET, msg=message, digestmod=hashlib.sha256).hexdigest()
+
+        # Set up headers
+        headers = {
+            'X-Auth': 'BITSTAMP ' + BITSTAMP_MAIN_KEY,
+            'X-Auth-Signature': signature,
+            'X-Auth-Nonce': nonce,
+            'X-Auth-Timestamp': timestamp,
+            'X-Auth-Version': 'v2'
+        }
+
+        # Make the POST request to the trading fees endpoint
+        url = f'https://www.bitstamp.net/api/v2/fees/trading/{market_symbol}/'
+        response = requests.post(url, headers=headers)
+
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {'error': response.text}
+
+    except Exception as e:
+        return {'error': str(e)}
+
+
 class TradingBot:
-    def __init__(self):
-        # Remove the initial_capital argument and assignment
-        self.capital = None
-        self.position = None
-        self.entry_price = None
-        self.trailing_stop_price = None
-        self.highest_price = None
-        self.last_timestamp = None
-        self.entry_time = None
-        self.last_loss_time = None  # Track the time of the last loss
+    capital = _strategy_attribute('capital')
+    position = _strategy_attribute('position')
+    entry_price = _strategy_attribute('entry_price')
+    trailing_stop_price = _strategy_attribute('trailing_stop_price')
+    highest_price = _strategy_attribute('highest_price')
+    overbought_threshold = _strategy_attribute('overbought_threshold')
+    oversold_threshold = _strategy_attribute('oversold_threshold')
+
+    def __init__(self, symbol='XRP', bot_id='default', market_symbol=None, thresholds=None,
+                 initial_capital=None, db_handler=None, fee_cache=None, tick_feed=None,
+                 clock=None, notifier=None):
+        """
+        Initialize a bot trading one symbol with one set of thresholds.
+
+        Args:
+            symbol (str): The symbol to trade, as stored in crypto_prices (e.g., 'XRP').
+            bot_id (str): Identifier of this strategy instance; state is keyed by (bot_id, symbol).
+            market_symbol (str, optional): The Bitstamp market (defaults to '<symbol>usd').
+            thresholds (dict, optional): Overrides for the keys of STRATEGY_THRESHOLDS,
+                adaptive_thresholds, volatility_window and vwap_window.
+            initial_capital (float, optional): Capital used when no state or signals exist yet.
+            db_handler (DatabaseHandler, optional): Shared database handler.
+            fee_cache (FeeCache, optional): Shared trading fee cache.
+            tick_feed (LatestTickFeed, optional): Shared feed of the latest ticks. When
+                given, the owner is responsible for refreshing it before each tick.
+            clock (callable, optional): Returns the current time (timezone-aware, UTC).
+                Defaults to the wall clock; the replay harness passes a simulated one.
+            notifier (callable, optional): Delivers signal messages. Defaults to Telegram.
+        """
+        self.symbol = symbol
+        self.bot_id = bot_id
+        self.market_symbol = market_symbol or f"{symbol.lower()}usd"
+        self.initial_capital = initial_capital
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.notifier = notifier or send_telegram_message
 
-        # Define thresholds
-        self.overbought_threshold = 0.01
-        self.oversold_threshold = -0.019
-        self.stop_loss_threshold = -0.02
-        self.take_profit_threshold = 0.015
-        self.trailing_stop_loss_percentage = 0.005
+        self.last_timestamp = None
+        self.last_trade = None  # The most recently closed Trade
+
+        # Thresholds default to VwapStrategy's; the volatility settings are the bot's own
+        self.adaptive_thresholds = True  # Widen thresholds by rolling volatility, as Backtest.adjust_thresholds does
+        self.volatility_window = 1440  # Per-minute price changes in the volatility window (one day)
+        self.vwap_window = None  # VWAP computed from the ticks ('5m', '1h', 'session', '24h'); None uses the ticker's
+        strategy_parameters = {}
+        for name, value in (thresholds or {}).items():
+            if name in STRATEGY_THRESHOLDS:
+                strategy_parameters[STRATEGY_THRESHOLDS[name]] = value
+            elif name in ('adaptive_thresholds', 'volatility_window', 'vwap_window'):
+                setattr(self, name, value)
+            else:
+                raise ValueError(f"Unknown threshold: {name}")
+        self.strategy = VwapStrategy(capital=None, symbol=symbol, **strategy_parameters)
+        self.volatility = RollingVolatility(self.volatility_window)
+        self.volatility_interval = None  # VOLATILITY_INTERVAL index of the newest price fed to the estimator
+        self.vwap = VwapEngine((self.vwap_window,)) if self.vwap_window else None
+        # Ticks from the database or the tick bus carry the 24h volume; the streaming feed's carry traded amounts
+        self.interval_volume = None if tick_feed is not None and tick_feed.traded_volume else TradedVolume()
 
         # Initialize DatabaseHandler
-        self.db_handler = DatabaseHandler()
+        self.owns_db_handler = db_handler is None
+        self.db_handler = db_handler or DatabaseHandler()
+        self.fee_cache = fee_cache or FeeCache(fetch_trading_fees)
+        self.tick_feed = tick_feed
+        self.db_handler.execute(ADD_TRADE_SIGNAL_COLUMNS)
+        self.state_store = BotStateStore(self.db_handler, bot_id=bot_id, symbol=symbol)
         self.load_state()
+        if self.adaptive_thresholds:
+            self.warm_up_volatility()
+        if self.vwap is not None:
+            self.warm_up_vwap()
 
     def load_state(self):
         """
         Loads the last processed state from the database.
         """
-        query = """
-            SELECT capital, position, entry_price, trailing_stop_price, highest_price, last_timestamp, entry_time
-            FROM bot_state
-            ORDER BY id DESC
-            LIMIT 1;
-        """
-        row = self.db_handler.fetch_one(query)
+        row = self.state_store.load()
         if row:
             self.capital = float(row['capital'])  # Ensure values are converted to float
-            self.position = row['position']
-            self.entry_price = float(row['entry_price']) if row['entry_price'] else None
-            self.trailing_stop_price = float(row['trailing_stop_price']) if row['trailing_stop_price'] else None
-            self.highest_price = float(row['highest_price']) if row['highest_price'] else None
+            if row['position']:
+                self.strategy.restore(
+                    row['position'],
+                    float(row['entry_price']),
+                    row['entry_time'].timestamp(),
+                    float(row['highest_price']) if row['highest_price'] else None,
+                    float(row['trailing_stop_price']) if row['trailing_stop_price'] else None,
+                )
             self.last_timestamp = row['last_timestamp']
-            self.entry_time = row['entry_time']
-            logger.info("Loaded state from the database.")
+            logger.info(f"Loaded {self.symbol} state for bot '{self.bot_id}' from the database.")
         else:
-            logger.info("No existing state found in the database. Initializing new state from trade_signals.")
+            logger.info(f"No existing {self.symbol} state found in the database. Initializing new state from trade_signals.")
             self.initialize_state_from_signals()
 
+    def initialize_state_from_signals(self):
+        """
+        Initializes capital from the latest trade signal of this bot, or from initial_capital.
+        """
+        query = """
+            SELECT updated_capital
+            FROM trade_signals
+            WHERE updated_capital IS NOT NULL
+              AND COALESCE(symbol, 'XRP') = %(symbol)s
+              AND COALESCE(bot_id, 'default') = %(bot_id)s
+            ORDER BY timestamp DESC
+            LIMIT 1;
+        """
+        row = self.db_handler.fetch_one(query, {'symbol': self.symbol, 'bot_id': self.bot_id})
+        if row:
+            self.capital = float(row['updated_capital'])
+        else:
+            self.capital = self.initial_capital
+        if self.capital is None:
+            logger.warning(f"No capital configured for {self.symbol} bot '{self.bot_id}'; buy signals will be skipped.")
+
+    def warm_up_volatility(self):
+        """
+        Seeds the rolling volatility with the most recent prices, once at startup.
+
+        After this, every tick updates the estimate in O(1) without querying history.
+        """
+        query = """
+            SELECT timestamp, last_price
+            FROM crypto_prices
+            WHERE symbol = %(symbol)s AND last_price IS NOT NULL
+            ORDER BY timestamp DESC
+            LIMIT %(limit)s;
+        """
+        rows = self.db_handler.fetch_all(query, {'symbol': self.symbol, 'limit': self.volatility_window + 1})
+        for row in reversed(rows):
+            self.update_thresholds(row['timestamp'], float(row['last_price']))
+        if rows:
+            logger.info(
+                f"Seeded {self.symbol} volatility from {len(rows)} prices; thresholds: "
+                f"oversold {self.oversold_threshold:.5f}, overbought {self.overbought_threshold:.5f}."
+            )
+
+    def warm_up_vwap(self):
+        """
+        Seeds the local VWAP with the ticks of its window, once at startup.
+
+        Ticks are weighted by the volume traded since the previous tick, derived
+        from their stored 24h volumes as the backtest's local_vwap() does.
+        """
+        now = self.clock()
+        if self.vwap_window == SESSION:
+            since = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            since = now - timedelta(seconds=VWAP_WINDOWS.get(self.vwap_window, self.vwap_window))
+        query = """
+            SELECT timestamp, last_price, volume
+            FROM crypto_prices
+            WHERE symbol = %(symbol)s AND timestamp > %(since)s
+            ORDER BY timestamp ASC;
+        """
+        rows = self.db_handler.fetch_all(query, {'symbol': self.symbol, 'since': since})
+        traded_volume = self.interval_volume or TradedVolume()
+        for row in rows:
+            tick = Tick.from_row(row, self.symbol)  # Converts Decimal columns to float
+            self.vwap.update(tick.timestamp.timestamp(), tick.last_price, traded_volume.update(tick.volume))
+        logger.info(f"Seeded {self.symbol} {self.vwap_window} VWAP from {len(rows)} ticks.")
+
+    def update_thresholds(self, timestamp, price):
+        """
+        Feeds a price to the rolling volatility and rescales the thresholds from their base values.
+
+        Uses the same scaling as Backtest.adjust_thresholds: overbought * (1 + volatility)
+        and oversold * (1 - volatility). Until enough prices were seen the base values apply.
+        Only the first price of each VOLATILITY_INTERVAL is fed, so streamed sub-minute ticks
+        are sampled at the same rate as the stored minute ticks the estimator is seeded from.
+        """
+        interval = int(timestamp.timestamp() // VOLATILITY_INTERVAL)
+        if self.volatility_interval is not None and interval <= self.volatility_interval:
+            return
+        self.volatility_interval = interval
+        self.strategy.set_volatility(self.volatility.update(price))
+
     def get_latest_price_data(self):
         """
-        Fetches the latest price data for XRP from the PostgreSQL database.
+        Fetches the latest price data for this bot's symbol, from the shared feed if one is set.
         """
+        if self.tick_feed is not None:
+            row = self.tick_feed.latest(self.symbol)
+            if row is None:
+                logger.warning(f"No {self.symbol} data found in the database.")
+            return row
+
         query = """
-            SELECT timestamp, last_price, vwap
+            SELECT timestamp, last_price, vwap, volume
             FROM crypto_prices
-            WHERE symbol = 'XRP'
+            WHERE symbol = %(symbol)s
             ORDER BY timestamp DESC
             LIMIT 1;
         """
-        row = self.db_handler.fetch_one(query)
+        row = self.db_handler.fetch_one(query, {'symbol': self.symbol})
         if row:
-            return {
-                'timestamp': row['timestamp'],
-                'last_price': float(row['last_price']),  # Convert Decimal to float
-                'vwap': float(row['vwap'])  # Convert Decimal to float
-            }
+            return Tick.from_row(row, self.symbol)  # Converts Decimal columns to float
         else:
-            logger.warning("No XRP data found in the database.")
+            logger.warning(f"No {self.symbol} data found in the database.")
             return None
 
+    @Timer('trading_fees_lookup')
     def get_trading_fees(self, market_symbol: str) -> dict:
         """
-        Fetch trading fees for the specified market.
+        Fetch trading fees for the specified market, through the shared fee cache.
         """
-        try:
-            timestamp = str(int(round(time.time() * 1000)))
-            nonce = str(uuid.uuid4())
-
-            message = 'BITSTAMP ' + BITSTAMP_MAIN_KEY + \
-                      'POST' + \
-                      'www.bitstamp.net' + \
-                      f'/api/v2/fees/trading/{market_symbol}/' + \
-                      '' + \
-                      '' + \
-                      nonce + \
-                      timestamp + \
-                      'v2' + \
-                      ''  # No payload in this case
-
-            message = message.encode('utf-8')
-            signature = hmac.new(BITSTAMP_MAIN_SECRET, msg=message, digestmod=hashlib.sha256).hexdigest()
-
-            # Set up headers
-            headers = {
-                'X-Auth': 'BITSTAMP ' + BITSTAMP_MAIN_KEY,
-                'X-Auth-Signature': signature,
-                'X-Auth-Nonce': nonce,
-                'X-Auth-Timestamp': timestamp,
-                'X-Auth-Version': 'v2'
-            }
-
-            # Make the POST request to the trading fees endpoint
-            url = f'https://www.bitstamp.net/api/v2/fees/trading/{market_symbol}/'
-            response = requests.post(url, headers=headers)
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {'error': response.text}
-
-        except Exception as e:
-            return {'error': str(e)}
+        return self.fee_cache.get(market_symbol)
 
-    def calculate_trade_fees(self, price: float, amount: float, fee_percentage: float) -> float:
-        """
-        Calculate the fee for a trade based on price, amount, and fee percentage.
-        """
-        trade_value = price * amount  # Total trade value in USD
-        fee = trade_value * (fee_percentage / 100)  # Fee as a percentage of trade value
-        return fee
+    @property
+    def entry_time(self):
+        """Entry time of the open position (timezone-aware, UTC), or None."""
+        entry_time = self.strategy.entry_time
+        return datetime.fromtimestamp(entry_time, tz=timezone.utc) if entry_time is not None else None
 
     def process_new_data(self):
         """
         Processes the latest price data and manages buy/sell signals based on trading logic.
         """
-        price_data = self.get_latest_price_data()
-        if not price_data:
+        tick = self.get_latest_price_data()
+        if not tick:
             return
 
         try:
-            price = price_data['last_price']
-            vwap = price_data['vwap']
-            timestamp = price_data['timestamp']
+            price = tick.last_price
+            vwap = tick.vwap
+            timestamp = tick.timestamp
 
             if self.last_timestamp and timestamp <= self.last_timestamp:
                 return
 
             self.last_timestamp = timestamp
-
-            now = datetime.now(timezone.utc)
+            if self.adaptive_thresholds:
+                self.update_thresholds(timestamp, price)
+            if self.vwap is not None:
+                volume = tick.volume if self.interval_volume is None else self.interval_volume.update(tick.volume)
+                local_vwap = self.vwap.update(timestamp.timestamp(), price, volume).value(self.vwap_window)
+                vwap = local_vwap if local_vwap is not None else vwap
 
             # Fetch trading fees
-            fees = self.get_trading_fees("xrpusd")
+            fees = self.get_trading_fees(self.market_symbol)
             if 'error' in fees:
                 logger.error(f"Error fetching fees: {fees['error']}")
                 return
             fee_percentage = float(fees['fees'].get('maker', '0').strip('%'))
             if fee_percentage == 0:
                 logger.warning("Defaulting to 0% trading fee as no valid fee was returned.")
+            self.strategy.fee_percentage = fee_percentage
 
+            events = self.strategy.on_tick(timestamp.timestamp(), price, vwap)
 
-            # Buy signal logic with delay if previous trade resulted in a loss
-            if (price - vwap) / vwap <= self.oversold_threshold and self.position is None:
-                if self.last_loss_time is None or (now - self.last_loss_time) >= timedelta(minutes=30):
-                    self.position = 'long'
-                    self.entry_price = price
-                    self.highest_price = price
-                    self.trailing_stop_price = self.entry_price * (1 - self.trailing_stop_loss_percentage)
-                    self.entry_time = timestamp
-
-                    # Calculate trading fee for buy
-                    amount_traded = self.capital / price
-                    buy_fee = self.calculate_trade_fees(price, amount_traded, fee_percentage)
-                    self.capital -= buy_fee  # Deduct buy fee from capital
-
-                    formatted_entry_time = self.entry_time.strftime('%Y-%m-%d %H:%M:%S')
-
-                    message = (
-                        f"⚠️ *Buy Signal Triggered*\n\n"
-                        f"📅 *Date/Time:* {formatted_entry_time}\n"
-                        f"💰 *Bought at:* ${price:.5f}\n"
-                        f"💸 *Trading Fee Applied:* ${buy_fee:.2f}\n"
-                        f"💡 Stay tuned for the next update!\n"
-                        f"#Ripple #XRP"
-                    )
-                    logger.info(message)
-
-                    # Save the BUY signal to the database
-                    self.save_trade_signal('BUY', price, profit_loss=None, percent_change=None, time_held=None)
-
-                    send_telegram_message(message)
-                    self.save_state()
+            if events & BUY_BLOCKED:
+                if self.capital is None:
+                    logger.warning(f"Buy signal for {self.symbol} skipped: no capital configured.")
                 else:
                     logger.info("Buy signal delayed due to recent trade loss.")
-            # Sell signal logic
-            if self.position == 'long':
-                if price > self.highest_price:
-                    self.highest_price = price
-                    self.trailing_stop_price = self.highest_price * (1 - self.trailing_stop_loss_percentage)
-                    logger.info(f"🔄 Trailing Stop Updated: New Stop Price is ${self.trailing_stop_price:.5f} (Highest Price: ${self.highest_price:.5f})")
-                    self.save_state()
-
-                if price <= self.trailing_stop_price or price >= self.entry_price * (1 + self.take_profit_threshold) or price <= self.entry_price * (1 + self.stop_loss_threshold):
-                    price_change = (price - self.entry_price) / self.entry_price
-                    profit_loss = self.capital * price_change
-                    
-                    # Calculate trading fee for sell
-                    amount_traded = self.capital / self.entry_price
-                    sell_fee = self.calculate_trade_fees(price, amount_traded, fee_percentage)
-                    profit_loss -= sell_fee  # Deduct sell fee from profit/loss
-                    self.capital += (profit_loss - sell_fee)
-
-                    time_held = now - self.entry_time
-
-                    # Format time held as hours, minutes, and seconds
-                    hours, remainder = divmod(time_held.total_seconds(), 3600)
-                    minutes, seconds = divmod(remainder, 60)
-                    time_held_formatted = f"{int(hours)}h {int(minutes)}m {int(seconds)}s"
-
-                    # Format the sell execution time to YYYY-MM-DD HH:MM:SS
-                    formatted_sell_time = now.strftime('%Y-%m-%d %H:%M:%S')
-
-                    # Determine if it is a profit or loss and adjust the message accordingly
-                    if profit_loss >= 0:
-                        result_message = f"💰 Profit: ${profit_loss:.2f}"
-                        self.last_loss_time = None  # Reset the loss time if profit
-                    else:
-                        result_message = f"🔻 Loss: ${abs(profit_loss):.2f}"
-                        self.last_loss_time = now  # Set the last loss time if loss
-
-                    message = (
-                        f"🚨 *Sell Signal Triggered*\n\n"
-                        f"📅 *Date/Time:* {formatted_sell_time}\n"
-                        f"💸 *Sold at:* ${price:.5f}\n"
-                        f"💸 *Trading Fee Applied:* ${sell_fee:.2f}\n"
-                        f"{result_message}\n"
-                        f"⏳ *Time Held:* {time_held_formatted}\n"
-                        f"💼 *Updated Capital:* ${self.capital:.2f}\n"
-                    )
-
-                    logger.info(message)
-                    send_telegram_message(message)
-
-                    # Save the SELL signal to the database
-                    self.save_trade_signal('SELL', price, profit_loss, price_change, time_held_formatted)
-
-                    self.position = None
-                    self.entry_price = None
-                    self.trailing_stop_price = None
-                    self.highest_price = None
-                    self.entry_time = None
-
-                    self.save_state()
+
+            if events & BUY:
+                formatted_entry_time = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+                buy_fee = self.strategy.entry_fee
+
+                message = (
+                    f"⚠️ *Buy Signal Triggered*\n\n"
+                    f"🪙 *Pair:* {self.symbol}/USD\n"
+                    f"📅 *Date/Time:* {formatted_entry_time}\n"
+                    f"💰 *Bought at:* ${price:.5f}\n"
+                    f"💸 *Trading Fee Applied:* ${buy_fee:.2f}\n"
+                    f"💡 Stay tuned for the next update!\n"
+                    f"{SYMBOL_HASHTAGS.get(self.symbol, '#' + self.symbol)}"
+                )
+                logger.info(message)
+
+                # Save the BUY signal to the database
+                self.save_trade_signal('BUY', price, profit_loss=None, percent_change=None, time_held=None)
+
+                self.notifier(message)
+                self.save_state()
+
+            if events & TRAIL and not events & SELL:
+                logger.info(f"🔄 {self.symbol} Trailing Stop Updated: New Stop Price is ${self.trailing_stop_price:.5f} (Highest Price: ${self.highest_price:.5f})")
+                self.save_state()
+
+            if events & SELL:
+                trade = self.last_trade = self.strategy.last_trade
+                profit_loss = trade.profit_loss
+                sell_fee = self.strategy.last_fee
+
+                # Format time held as hours, minutes, and seconds
+                hours, remainder = divmod(trade.time_held.total_seconds(), 3600)
+                minutes, seconds = divmod(remainder, 60)
+                time_held_formatted = f"{int(hours)}h {int(minutes)}m {int(seconds)}s"
+
+                # Format the sell execution time to YYYY-MM-DD HH:MM:SS
+                formatted_sell_time = trade.exit_time.strftime('%Y-%m-%d %H:%M:%S')
+
+                # Determine if it is a profit or loss and adjust the message accordingly
+                if profit_loss >= 0:
+                    result_message = f"💰 Profit: ${profit_loss:.2f}"
+                else:
+                    result_message = f"🔻 Loss: ${abs(profit_loss):.2f}"
+
+                message = (
+                    f"🚨 *Sell Signal Triggered*\n\n"
+                    f"🪙 *Pair:* {self.symbol}/USD\n"
+                    f"📅 *Date/Time:* {formatted_sell_time}\n"
+                    f"💸 *Sold at:* ${price:.5f}\n"
+                    f"💸 *Trading Fee Applied:* ${sell_fee:.2f}\n"
+                    f"{result_message}\n"
+                    f"⏳ *Time Held:* {time_held_formatted}\n"
+                    f"💼 *Updated Capital:* ${self.capital:.2f}\n"
+                )
+
+                logger.info(message)
+                self.notifier(message)
+
+                # Save the SELL signal to the database
+                self.save_trade_signal('SELL', price, trade.profit_loss, trade.percent_change, time_held_formatted)
+                self.save_state()
 
         except Exception as e:
-            logger.error(f"An error occurred while processing data: {e}")
+            logger.error(f"An error occurred while processing {self.symbol} data: {e}")
 
     def save_state(self):
         """
         Saves the current state to the database.
         """
-        query = """
-            INSERT INTO bot_state (capital, position, entry_price, trailing_stop_price, highest_price, last_timestamp, entry_time)
-            VALUES (%s, %s, %s, %s, %s, %s, %s);
+        state = {
+            'capital': self.capital,
+            'position': self.position,
+            'entry_price': self.entry_price,
+            'trailing_stop_price': self.trailing_stop_price,
+            'highest_price': self.highest_price,
+            'last_timestamp': self.last_timestamp,
+            'entry_time': self.entry_time,
+        }
+        if self.state_store.save(state):
+            logger.info("State saved to the database.")
+        else:
+            logger.error("Failed to save state to the database.")
+
+    def close(self):
         """
-        params = (
-            self.capital, self.position, self.entry_price,
-            self.trailing_stop_price, self.highest_price,
-            self.last_timestamp, self.entry_time
-        )
-        self.db_handler.execute(query, params)
-        logger.info("State saved to the database.")
+        Flushes pending state journal entries and closes the database connection if this bot owns it.
+        """
+        self.state_store.close()
+        if self.owns_db_handler:
+            self.db_handler.close()
 
     def save_trade_signal(self, signal_type, price, profit_loss, percent_change, time_held):
         """
         Inserts a trade signal into the trade_signals table in the database.
         """
         query = """
-            INSERT INTO trade_signals (timestamp, signal_type, price, profit_loss, percent_change, time_held, updated_capital)
-            VALUES (%s, %s, %s, %s, %s, %s, %s);
+            INSERT INTO trade_signals (timestamp, signal_type, price, profit_loss, percent_change, time_held, updated_capital, symbol, bot_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);
         """
         params = (
-            datetime.now(), signal_type, price, profit_loss, percent_change, time_held, self.capital
+            self.clock(), signal_type, price, profit_loss, percent_change, time_held, self.capital,
+            self.symbol, self.bot_id
         )
         self.db_handler.execute(query, params)
-        logger.info(f"Trade signal ({signal_type}) saved to DB.")
+        logger.info(f"{self.symbol} trade signal ({signal_type}) saved to DB.")
+
+
+class TradingBotGroup:
+    """Runs many symbol/strategy bots in one process on shared resources."""
+
+    def __init__(self, bot_configs, db_handler=None, notifier=None, tick_feed=None):
+        """
+        Initialize the bots sharing one database handler, fee cache and tick feed.
+
+        Args:
+            bot_configs (list of dict): Keyword arguments for each TradingBot
+                (symbol, bot_id, market_symbol, thresholds, initial_capital).
+            db_handler (DatabaseHandler, optional): Shared database handler.
+            notifier (callable, optional): Delivers every bot's signal messages. Defaults to Telegram.
+            tick_feed (optional): Source of the latest ticks, such as a streaming.StreamingTickFeed.
+                Defaults to a LatestTickFeed over crypto_prices.
+
+        Raises:
+            ValueError: If two configs share a bot_id and symbol, as they would share one stored state.
+        """
+        keys = set()
+        for config in bot_configs:
+            key = (config.get('bot_id', 'default'), config.get('symbol', 'XRP'))
+            if key in keys:
+                raise ValueError(f"Duplicate trading bot: bot_id '{key[0]}' for symbol {key[1]}")
+            keys.add(key)
+
+        self.db_handler = db_handler or DatabaseHandler()
+        self.fee_cache = FeeCache(fetch_trading_fees)
+        self.tick_feed = tick_feed or LatestTickFeed(
+            self.db_handler, [config.get('symbol', 'XRP') for config in bot_configs]
+        )
+        self.bots = [
+            TradingBot(
+                db_handler=self.db_handler,
+                fee_cache=self.fee_cache,
+                tick_feed=self.tick_feed,
+                notifier=notifier,
+                **config
+            )
+            for config in bot_configs
+        ]
+        logger.info(f"Started {len(self.bots)} trading bots: {', '.join(f'{bot.bot_id}/{bot.symbol}' for bot in self.bots)}")
+
+    def process_new_data(self):
+        """
+        Refreshes the shared tick feed once and lets every bot process its latest tick.
+
+        Journal entries that have waited long enough are written here as well, as
+        bots only save their state on buys, sells and trailing-stop moves.
+        """
+        self.tick_feed.refresh()
+        for bot in self.bots:
+            try:
+                bot.process_new_data()
+                bot.state_store.flush_journal_if_due()
+            except Exception as e:
+                logger.error(f"An error occurred in {bot.symbol} bot '{bot.bot_id}': {e}")
+
+    def close(self):
+        """
+        Closes every bot and the shared database connection.
+        """
+        for bot in self.bots:
+            bot.close()
+        self.db_handler.close()
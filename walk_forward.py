@@ -0,0 +1,315 @@
+# walk_forward.py
+
+import argparse
+import itertools
+import logging
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import Backtest, fetch_data_from_db, local_vwap, price_volatility
+from records import TickBatch
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Candidate values re-fitted on every training window
+DEFAULT_PARAM_GRID = {
+    'oversold_threshold': (-0.01, -0.015, -0.019, -0.025),
+    'take_profit': (0.01, 0.015, 0.02),
+    'trailing_stop_loss': (0.003, 0.005, 0.01),
+}
+
+# Parameters that are not searched
+FIXED_PARAMETERS = {
+    'overbought_threshold': 0.01,
+    'stop_loss': -0.02,
+}
+
+# Columns placed in shared memory, one row each
+SHARED_COLUMNS = ('timestamps', 'last_price', 'vwap', 'bid', 'ask')
+
+# Worker-side handle on the shared price array: (SharedMemory, ndarray view, symbol)
+_shared = None
+
+
+class SharedPriceArray:
+    """Copies a TickBatch's timestamps, prices and VWAP into one shared memory block for worker processes."""
+
+    def __init__(self, batch):
+        self.length = len(batch)
+        self.symbol = batch.symbol
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, len(SHARED_COLUMNS) * self.length * 8))
+        view = np.ndarray((len(SHARED_COLUMNS), self.length), dtype=np.float64, buffer=self.shm.buf)
+        columns = batch.to_numpy()
+        for row, column in enumerate(SHARED_COLUMNS):
+            view[row] = columns[column]
+        del view, columns
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        """Release and remove the shared block."""
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _attach(name, length, symbol):
+    """Worker initializer: map the shared price array without copying it."""
+    global _shared
+    shm = shared_memory.SharedMemory(name=name)
+    _shared = (shm, np.ndarray((len(SHARED_COLUMNS), length), dtype=np.float64, buffer=shm.buf), symbol)
+
+
+def _detach():
+    global _shared
+    if _shared is not None:
+        shm, view, _ = _shared
+        _shared = None
+        del view
+        shm.close()
+
+
+def _window_batch(start, end):
+    _, view, symbol = _shared
+    return TickBatch.from_numpy(
+        {column: view[row, start:end] for row, column in enumerate(SHARED_COLUMNS)}, symbol
+    )
+
+
+def _score(summary, objective):
+    value = summary[objective]
+    return -math.inf if value is None or math.isnan(value) else value
+
+
+def _run_backtest(batch, parameters, initial_capital, volatility, costs):
+    backtest = Backtest(
+        initial_capital=initial_capital,
+        overbought_threshold=parameters['overbought_threshold'],
+        oversold_threshold=parameters['oversold_threshold'],
+        stop_loss=parameters['stop_loss'],
+        take_profit=parameters['take_profit'],
+        trailing_stop_loss=parameters['trailing_stop_loss'],
+        symbol=batch.symbol,
+        verbose=False,
+        **costs,
+    )
+    return backtest.run(batch, volatility=volatility).summary()
+
+
+def evaluate_window(task):
+    """
+    Fit the parameters on one training window and trade them on the following test window.
+
+    Runs in a worker process attached to the shared price array.
+
+    Args:
+        task (tuple): (window index, train start, train end, test end) tick indices,
+            the parameter candidates, the initial capital, the objective and the
+            trading cost arguments for Backtest.
+
+    Returns:
+        dict: The chosen parameters, their in-sample score and the out-of-sample statistics.
+    """
+    index, train_start, train_end, test_end, candidates, initial_capital, objective, costs = task
+    train = _window_batch(train_start, train_end)
+    test = _window_batch(train_end, test_end)
+
+    # Thresholds are scaled by the training window's volatility only, so the test window is never seen
+    volatility = price_volatility(np.frombuffer(train.last_price, dtype=np.float64))
+
+    best_parameters, best_score = None, -math.inf
+    for candidate in candidates:
+        parameters = dict(FIXED_PARAMETERS, **candidate)
+        score = _score(_run_backtest(train, parameters, initial_capital, volatility, costs), objective)
+        if best_parameters is None or score > best_score:
+            best_parameters, best_score = parameters, score
+
+    out_of_sample = _run_backtest(test, best_parameters, initial_capital, volatility, costs)
+    row = {
+        'window': index,
+        'train_start': pd.Timestamp(train.timestamps[0], unit='s', tz='UTC'),
+        'test_start': pd.Timestamp(test.timestamps[0], unit='s', tz='UTC'),
+        'test_end': pd.Timestamp(test.timestamps[-1], unit='s', tz='UTC'),
+        'train_volatility': float(volatility),
+        f'in_sample_{objective}': best_score,
+    }
+    row.update(best_parameters)
+    row.update({
+        'oos_trades': out_of_sample['total_trades'],
+        'oos_profit_loss': out_of_sample['total_profit_loss'],
+        'oos_return': out_of_sample['total_return'],
+        'oos_max_drawdown': out_of_sample['max_drawdown'],
+        'oos_sharpe_ratio': out_of_sample['sharpe_ratio'],
+        'oos_win_rate': out_of_sample['win_rate'],
+        'oos_exposure_time': out_of_sample['exposure_time'],
+    })
+    return row
+
+
+def walk_forward_windows(timestamps, train_days, test_days, anchored=False):
+    """
+    Split a tick series into consecutive training/test windows.
+
+    Test windows follow each other without overlap; each training window is the
+    train_days before its test window, or everything before it when anchored.
+
+    Args:
+        timestamps (ndarray): Tick times as float epoch seconds, ascending.
+        train_days (float): Length of each training window.
+        test_days (float): Length of each test window (and the step between windows).
+        anchored (bool): Grow the training window from the first tick instead of rolling it.
+
+    Returns:
+        list of tuple: (train start, train end, test end) tick indices; end indices are exclusive.
+    """
+    windows = []
+    if len(timestamps) == 0:
+        return windows
+    first = timestamps[0]
+    test_start_time = first + train_days * SECONDS_PER_DAY
+    while test_start_time <= timestamps[-1]:
+        train_start_time = first if anchored else test_start_time - train_days * SECONDS_PER_DAY
+        train_start, train_end, test_end = np.searchsorted(
+            timestamps, [train_start_time, test_start_time, test_start_time + test_days * SECONDS_PER_DAY]
+        )
+        if train_end - train_start > 2 and test_end - train_end > 1:
+            windows.append((int(train_start), int(train_end), int(test_end)))
+        test_start_time += test_days * SECONDS_PER_DAY
+    return windows
+
+
+def walk_forward(batch, train_days=30, test_days=7, param_grid=None, initial_capital=12800,
+                 objective='sharpe_ratio', workers=None, anchored=False, costs=None):
+    """
+    Run a walk-forward optimization of the VWAP strategy.
+
+    Windows are evaluated in parallel; worker processes map one shared copy of the
+    price array instead of each receiving their own.
+
+    Args:
+        batch (TickBatch): The full tick history.
+        train_days (float): Length of each training window in days.
+        test_days (float): Length of each out-of-sample window in days.
+        param_grid (dict, optional): Parameter name to candidate values. Defaults to DEFAULT_PARAM_GRID.
+        initial_capital (float): Capital each window starts with.
+        objective (str): BacktestResult.summary() key maximized on the training windows.
+        workers (int, optional): Worker processes. Defaults to the number of CPUs; 1 runs in-process.
+        anchored (bool): Use expanding instead of rolling training windows.
+        costs (dict, optional): Trading cost arguments passed to every Backtest
+            (fee_percentage, fee_tiers, fill_at_quotes, slippage_bps, latency).
+
+    Returns:
+        DataFrame: One row per window with the fitted parameters and out-of-sample statistics.
+    """
+    windows = walk_forward_windows(batch.to_numpy()['timestamps'], train_days, test_days, anchored)
+    if not windows:
+        logger.warning(f"Not enough {batch.symbol} history for a {train_days}+{test_days} day walk-forward window.")
+        return pd.DataFrame()
+
+    grid = param_grid or DEFAULT_PARAM_GRID
+    candidates = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    tasks = [
+        (index, train_start, train_end, test_end, candidates, initial_capital, objective, costs or {})
+        for index, (train_start, train_end, test_end) in enumerate(windows)
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    logger.info(f"Walk-forward: {len(tasks)} windows x {len(candidates)} candidates on {workers} worker(s).")
+
+    with SharedPriceArray(batch) as shared:
+        if workers == 1:
+            _attach(shared.name, shared.length, shared.symbol)
+            try:
+                rows = [evaluate_window(task) for task in tasks]
+            finally:
+                _detach()
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_attach, initargs=(shared.name, shared.length, shared.symbol)
+            ) as pool:
+                rows = list(pool.map(evaluate_window, tasks))
+
+    return pd.DataFrame(rows)
+
+
+def summarize_walk_forward(windows):
+    """
+    Aggregate the out-of-sample results of a walk-forward run.
+
+    Args:
+        windows (DataFrame): The result of walk_forward().
+
+    Returns:
+        dict: Window count, compounded out-of-sample return, total trades, mean Sharpe and worst drawdown.
+    """
+    if windows.empty:
+        return {'windows': 0}
+    return {
+        'windows': len(windows),
+        'compounded_return': float(np.prod(1 + windows['oos_return']) - 1),
+        'total_trades': int(windows['oos_trades'].sum()),
+        'mean_sharpe_ratio': float(windows['oos_sharpe_ratio'].mean()),
+        'worst_drawdown': float(windows['oos_max_drawdown'].min()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward optimization of the VWAP strategy.")
+    parser.add_argument('--symbol', default='XRP', help="Symbol to optimize.")
+    parser.add_argument('--train-days', type=float, default=30, help="Training window length in days.")
+    parser.add_argument('--test-days', type=float, default=7, help="Out-of-sample window length in days.")
+    parser.add_argument('--anchored', action='store_true', help="Use expanding training windows.")
+    parser.add_argument('--objective', default='sharpe_ratio', help="Summary statistic maximized in training.")
+    parser.add_argument('--capital', type=float, default=12800, help="Initial capital of each window.")
+    parser.add_argument('--workers', type=int, help="Worker processes (defaults to the CPU count).")
+    parser.add_argument('--fee', type=float, default=0.0, help="Trading fee per side in percent.")
+    parser.add_argument('--quotes', action='store_true', help="Fill buys at the ask and sells at the bid.")
+    parser.add_argument('--slippage-bps', type=float, default=0.0, help="Adverse slippage per fill in basis points.")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds from signal to fill.")
+    parser.add_argument('--vwap-window', help="Trade against a locally computed VWAP (5m, 1h, 24h or session).")
+    parser.add_argument('--output', help="Write the per-window results to this CSV file.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    batch = fetch_data_from_db(args.symbol)
+    if args.vwap_window:
+        # Computed over the whole history, so every window starts with a warm VWAP
+        batch.vwap = array('d', local_vwap(batch.to_numpy(), args.vwap_window))
+    windows = walk_forward(
+        batch, args.train_days, args.test_days, initial_capital=args.capital,
+        objective=args.objective, workers=args.workers, anchored=args.anchored,
+        costs={
+            'fee_percentage': args.fee, 'fill_at_quotes': args.quotes,
+            'slippage_bps': args.slippage_bps, 'latency': args.latency,
+        },
+    )
+    if windows.empty:
+        return
+
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(windows.drop(columns=['train_start']).to_string(index=False))
+    summary = summarize_walk_forward(windows)
+    print(f"\nWindows: {summary['windows']}, out-of-sample trades: {summary['total_trades']}")
+    print(f"Compounded out-of-sample return: {summary['compounded_return']:.2%}")
+    print(f"Mean Sharpe Ratio: {summary['mean_sharpe_ratio']:.2f}, worst drawdown: {summary['worst_drawdown']:.2%}")
+    if args.output:
+        windows.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,25 @@
 import logging
 import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from io import BytesIO
 from typing import Union
 from telegram import Update
 from telegram.ext import Updater, CommandHandler, CallbackContext
 from telegram.error import NetworkError
 from config import TELEGRAM_BOT_TOKEN
+from app.templates import TELEGRAM, TEMPLATES
+from broadcast import ensure_subscribers_table, set_subscription
+from chart_service import CHART_SERVICE, CHART_WINDOWS, ChartPrerenderer
+from crypto_price_logger import CRYPTO_SYMBOLS
 from database_handler import DatabaseHandler
+from price_alerts import (
+    CROSS,
+    MOVE,
+    add_price_alert,
+    cancel_price_alert,
+    ensure_price_alert_table,
+    list_price_alerts,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +32,37 @@ logging.basicConfig(
 # Initialize the DatabaseHandler
 db_handler = DatabaseHandler()
 
+# Window charted when /chart is sent without one
+DEFAULT_CHART_WINDOW = '3h'
+
+# Seconds a /chart reply waits for a chart that is not prerendered yet
+CHART_WAIT_SECONDS = 15
+
+# Renders charts off the handler threads; started in main()
+chart_prerenderer = None
+
+# Latest tickers published by the price logger when run by the supervisor; set in main()
+tick_bus = None
+
+# Symbols whose ticks are matched against price alerts: XRP by xrppricealerts, the rest by crypto_price_logger
+ALERT_SYMBOLS = ('XRP', *CRYPTO_SYMBOLS)
+
+TEMPLATES.register('signal_buy', (
+    "⚠️ *Buy Signal Triggered*\n"
+    "Bought at: ${price:.5f}\n"
+    "Time: {now}\n"
+    "#Ripple #XRP #XRPPriceAlerts"
+))
+TEMPLATES.register('signal_sell', (
+    "🚨 *Sell Signal Triggered:*\n"
+    "Sold at: ${price:.5f}\n"
+    "{result}: ${amount:.2f}\n"
+    "Updated Capital: ${capital:.2f}\n"
+    "Time Held: {time_held}\n"
+    "Time: {now}\n"
+    "#Ripple #XRP #XRPPriceAlerts"
+))
+
 # Function to retry fetching updates with exponential backoff
 def get_updates_with_retry(updater, retries=5, delay=5):
     """Function to handle retries when fetching updates from Telegram."""
@@ -34,6 +79,9 @@ def get_updates_with_retry(updater, retries=5, delay=5):
 
 # Function to retrieve XRP price
 def get_xrp_price() -> Union[float, str]:
+    price = get_bus_price('XRP')
+    if price is not None:
+        return price
     try:
         query = """
             SELECT last_price FROM crypto_prices
@@ -61,6 +109,7 @@ def get_last_signal() -> str:
             SELECT signal_type, price, profit_loss, percent_change, time_held, updated_capital, timestamp
             FROM trade_signals
             WHERE UPPER(signal_type) IN ('BUY', 'SELL', 'SELL_LOSS')
+              AND COALESCE(symbol, 'XRP') = 'XRP'
             ORDER BY timestamp DESC
             LIMIT 1;
         """
@@ -78,23 +127,16 @@ def get_last_signal() -> str:
             normalized_signal = signal_type.upper()
             
             if normalized_signal == 'BUY':
-                message = (
-                    f"⚠️ *Buy Signal Triggered*\n"
-                    f"Bought at: ${price:.5f}\n"
-                    f"Time: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                    f"#Ripple #XRP #XRPPriceAlerts"
-                )
+                message = TEMPLATES.render('signal_buy', {'price': price, 'now': timestamp}, TELEGRAM)
             elif normalized_signal in ['SELL', 'SELL_LOSS']:
-                profit_loss_msg = f"💰 Profit: ${profit_loss:.2f}" if profit_loss > 0 else f"🔻 Loss: ${-profit_loss:.2f}"
-                message = (
-                    f"🚨 *Sell Signal Triggered:*\n"
-                    f"Sold at: ${price:.5f}\n"
-                    f"{profit_loss_msg}\n"
-                    f"Updated Capital: ${updated_capital:.2f}\n"
-                    f"Time Held: {time_held}\n"
-                    f"Time: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                    f"#Ripple #XRP #XRPPriceAlerts"
-                )
+                message = TEMPLATES.render('signal_sell', {
+                    'price': price,
+                    'result': "💰 Profit" if profit_loss > 0 else "🔻 Loss",
+                    'amount': abs(profit_loss),
+                    'capital': updated_capital,
+                    'time_held': time_held,
+                    'now': timestamp,
+                }, TELEGRAM)
             else:
                 message = "Unknown trading signal."
             
@@ -113,6 +155,7 @@ def get_current_capital() -> Union[float, str]:
         query = """
             SELECT updated_capital
             FROM trade_signals
+            WHERE COALESCE(symbol, 'XRP') = 'XRP'
             ORDER BY timestamp DESC
             LIMIT 1;
         """
@@ -145,7 +188,7 @@ def set_current_capital(new_capital: float) -> str:
 
 # Telegram command handlers
 def start(update: Update, context: CallbackContext) -> None:
-    update.message.reply_text('Welcome to the XRP Price Alerts Bot! Use /price to get the latest XRP price or /lastsignal to get the last trading signal.')
+    update.message.reply_text('Welcome to the XRP Price Alerts Bot! Use /price to get the latest XRP price, /chart [1h|3h|24h|7d] for a chart, /lastsignal to get the last trading signal or /subscribe to receive signals here.')
 
 def price(update: Update, context: CallbackContext) -> None:
     price = get_xrp_price()
@@ -158,6 +201,117 @@ def lastsignal(update: Update, context: CallbackContext) -> None:
     last_signal = get_last_signal()
     update.message.reply_text(f"Last Trading Signal:\n{last_signal}", parse_mode='Markdown')
 
+# Command to send a candlestick chart
+def chart(update: Update, context: CallbackContext) -> None:
+    window = context.args[0].lower() if context.args else DEFAULT_CHART_WINDOW
+    if window not in CHART_WINDOWS:
+        update.message.reply_text(f"Unknown chart window. Usage: /chart [{'|'.join(CHART_WINDOWS)}]")
+        return
+
+    # Prerendered charts are answered straight from the cache; anything else is queued on the render thread
+    png = CHART_SERVICE.cached('XRP', window)
+    if png is None:
+        try:
+            png = chart_prerenderer.request(window).result(timeout=CHART_WAIT_SECONDS)
+        except FutureTimeoutError:
+            logging.warning(f"Timed out waiting for the {window} chart.")
+            png = None
+
+    if png is None:
+        update.message.reply_text("Chart not available right now, please try again shortly.")
+        return
+    update.message.reply_photo(photo=BytesIO(png), caption=f"XRP/USD {window} chart")
+
+# Function to read a fresh price from the supervisor's tick bus, without a query
+def get_bus_price(symbol: str):
+    if tick_bus is None:
+        return None
+    ticker = tick_bus.ticker(symbol)
+    try:
+        return float(ticker['last']) if ticker else None
+    except (KeyError, TypeError, ValueError):
+        return None
+
+# Function to retrieve the latest price of any symbol
+def get_latest_price(symbol: str):
+    price = get_bus_price(symbol)
+    if price is not None:
+        return price
+    query = """
+        SELECT last_price FROM crypto_prices
+        WHERE symbol = %(symbol)s
+        ORDER BY timestamp DESC
+        LIMIT 1;
+    """
+    result = db_handler.fetch_one(query, {'symbol': symbol})
+    if result and result.get('last_price') is not None:
+        return float(result['last_price'])
+    return None
+
+def _register_alert(update: Update, context: CallbackContext, kind: str, usage: str) -> None:
+    try:
+        value = float(context.args[0])
+        symbol = context.args[1].upper() if len(context.args) > 1 else 'XRP'
+    except (IndexError, ValueError):
+        update.message.reply_text(usage)
+        return
+    if symbol not in ALERT_SYMBOLS:
+        update.message.reply_text(f"Alerts are available for {', '.join(ALERT_SYMBOLS)} only.")
+        return
+
+    current_price = get_latest_price(symbol)
+    if current_price is None:
+        update.message.reply_text(f"No {symbol} price data available.")
+        return
+    alert = add_price_alert(db_handler, update.effective_chat.id, symbol, kind, value, reference_price=current_price)
+    if alert is None:
+        update.message.reply_text(f"Could not add the alert. {usage}")
+        return
+    logging.info(f"Registered price alert {alert.describe()} for chat {alert.chat_id}.")
+    update.message.reply_text(f"Alert {alert.describe()} added (now ${current_price:.5f}).")
+
+# Command to alert when a price level is crossed
+def alert(update: Update, context: CallbackContext) -> None:
+    _register_alert(update, context, CROSS, "Usage: /alert <price> [symbol], e.g. /alert 0.65 XRP")
+
+# Command to alert on a percent move from the current price
+def alertmove(update: Update, context: CallbackContext) -> None:
+    _register_alert(update, context, MOVE, "Usage: /alertmove <percent> [symbol], e.g. /alertmove 5")
+
+# Command to list this chat's alerts
+def alerts(update: Update, context: CallbackContext) -> None:
+    active = list_price_alerts(db_handler, update.effective_chat.id)
+    if not active:
+        update.message.reply_text("No active price alerts. Add one with /alert <price> or /alertmove <percent>.")
+        return
+    update.message.reply_text("Active price alerts:\n" + "\n".join(a.describe() for a in active))
+
+# Command to cancel one of this chat's alerts
+def delalert(update: Update, context: CallbackContext) -> None:
+    try:
+        alert_id = int(context.args[0].lstrip('#'))
+    except (IndexError, ValueError):
+        update.message.reply_text("Usage: /delalert <id> (see /alerts)")
+        return
+    if cancel_price_alert(db_handler, update.effective_chat.id, alert_id):
+        update.message.reply_text(f"Alert #{alert_id} cancelled.")
+    else:
+        update.message.reply_text(f"No active alert #{alert_id}.")
+
+# Command to receive the trading signals in this chat
+def subscribe(update: Update, context: CallbackContext) -> None:
+    if set_subscription(db_handler, update.effective_chat.id, True):
+        update.message.reply_text("Subscribed: trading signals will be sent to this chat. Use /unsubscribe to stop.")
+    else:
+        update.message.reply_text("Error saving the subscription.")
+
+# Command to stop receiving the trading signals
+def unsubscribe(update: Update, context: CallbackContext) -> None:
+    if set_subscription(db_handler, update.effective_chat.id, False):
+        update.message.reply_text("Unsubscribed from trading signals.")
+    else:
+        update.message.reply_text("Error saving the subscription.")
+
 # Command to show current capital
 def capital(update: Update, context: CallbackContext) -> None:
     capital = get_current_capital()
@@ -175,7 +329,15 @@ def setcapital(update: Update, context: CallbackContext) -> None:
     except (IndexError, ValueError):
         update.message.reply_text("Please provide a valid number for the capital. Usage: /setcapital <amount>")
 
-def main():
+def main(bus=None):
+    global chart_prerenderer, tick_bus
+    tick_bus = bus
+    ensure_price_alert_table(db_handler)
+    ensure_subscribers_table(db_handler)
+    # The render thread gets its own connection, so renders never share a cursor with the handlers
+    chart_prerenderer = ChartPrerenderer(DatabaseHandler())
+    chart_prerenderer.start()
+
     updater = Updater(TELEGRAM_BOT_TOKEN, use_context=True)
     dp = updater.dispatcher
 
@@ -185,6 +347,13 @@ def main():
     dp.add_handler(CommandHandler("lastsignal", lastsignal))
     dp.add_handler(CommandHandler("capital", capital))
     dp.add_handler(CommandHandler("setcapital", setcapital))
+    dp.add_handler(CommandHandler("chart", chart))
+    dp.add_handler(CommandHandler("alert", alert))
+    dp.add_handler(CommandHandler("alertmove", alertmove))
+    dp.add_handler(CommandHandler("alerts", alerts))
+    dp.add_handler(CommandHandler("delalert", delalert))
+    dp.add_handler(CommandHandler("subscribe", subscribe))
+    dp.add_handler(CommandHandler("unsubscribe", unsubscribe))
 
     try:
         logging.info("Starting XRP Telegram Bot...")
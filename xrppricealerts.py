@@ -1,7 +1,7 @@
 import logging
+import os
 import time
 from datetime import datetime, timezone, timedelta
-from logging.handlers import RotatingFileHandler
 
 from app.fetcher import fetch_xrp_price
 from app.twitter import (
@@ -19,10 +19,20 @@ from app.xrp_messaging import (
 from config import (
     ACCESS_TOKEN,
     ACCESS_TOKEN_SECRET,
+    ALERT_BOT_METRICS_PORT,
     CONSUMER_KEY,
     CONSUMER_SECRET,
+    METRICS_HOST,
+    TICK_WAL_DIR,
 )
 from database_handler import DatabaseHandler
+from logging_setup import setup_logging
+from metrics import start_metrics_server
+from price_alerts import PriceAlertBook
+from records import INSERT_TICK_QUERY, Tick
+from rollups import ensure_rollup_tables, update_rollups
+from scheduler import FixedRateScheduler
+from tick_wal import TickWal
 from app.xrp_messaging import cleanup_old_charts  # Import the cleanup function
 
 ENABLE_HOURLY_TWEET = False        # Set to False to disable hourly tweets
@@ -30,22 +40,45 @@ ENABLE_3_HOUR_SUMMARY = True      # Set to False to disable 3-hour summaries
 ENABLE_VOLATILITY_ALERT = True    # Set to False to disable volatility alerts
 ENABLE_DAILY_SUMMARY = True       # Set to False to disable daily summary
 
-# Configure logging with RotatingFileHandler
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+# Seconds between main loop iterations; iterations start on wall-clock boundaries
+LOOP_INTERVAL = 60
+
+# Under the supervisor: the XRP ticker is read from the tick bus if published within TICK_BUS_AGE
+# seconds, waiting up to TICK_BUS_WAIT for this minute's; otherwise it is fetched directly
+TICK_BUS_AGE = 30
+TICK_BUS_WAIT = 10
 
-# Avoid adding multiple handlers if the logger already has handlers
-if not logger.handlers:
-    handler = RotatingFileHandler('xrp_bot.log', maxBytes=5*1024*1024, backupCount=5)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+# Records go to xrp_bot.log once setup_logging() runs in __main__
+logger = logging.getLogger(__name__)
 
 
 class XRPPriceAlertBot:
     """Class to handle XRP price alerts and Twitter interactions."""
 
-    def __init__(self):
+    def __init__(self, client=None, api=None, db_handler=None, clock=None, sleep=None,
+                 price_source=None, render_charts=True, alert_book=None, wal=None):
+        """
+        Initialize the bot. Every dependency defaults to its live implementation;
+        the replay harness passes stand-ins to drive the bot offline.
+
+        Args:
+            client (tweepy.Client, optional): Twitter v2 client used to post tweets.
+            api (tweepy.API, optional): Twitter v1.1 API used for media uploads.
+            db_handler (DatabaseHandler, optional): The database handler instance.
+            clock (callable, optional): Returns the current time (timezone-aware, UTC).
+            sleep (callable, optional): Sleeps for a number of seconds.
+            price_source (callable, optional): Returns the latest Bitstamp ticker dict.
+            render_charts (bool): Whether 3-hour summaries render and attach a chart.
+            alert_book (PriceAlertBook, optional): User XRP price alerts matched against every tick.
+            wal (TickWal, optional): Queues ticks while the database is unreachable and replays them once it is back.
+        """
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.sleep = sleep or time.sleep
+        self.price_source = price_source or fetch_xrp_price
+        self.wal = wal
+        self.render_charts = render_charts
+        self.cleanup_charts = cleanup_old_charts if render_charts else (lambda: None)
+
         # Define the volatility threshold
         self.VOLATILITY_THRESHOLD = 0.02
         self.SUMMARY_TIMES = {
@@ -62,7 +95,7 @@ class XRPPriceAlertBot:
         # Initialize tracking variables
         self.daily_high = None
         self.daily_low = None
-        self.current_day = datetime.now(timezone.utc).date()
+        self.current_day = self.clock().date()
         self.last_volatility_check_time = None
         self.last_rounded_price = None
         self.last_summary_time = None
@@ -72,15 +105,17 @@ class XRPPriceAlertBot:
         self.last_checked_price = None
 
         # Initialize Twitter clients
-        self.client = get_twitter_client(
+        self.client = client or get_twitter_client(
             CONSUMER_KEY, CONSUMER_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET
         )
-        self.api = get_twitter_api(
+        self.api = api or get_twitter_api(
             CONSUMER_KEY, CONSUMER_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET
         )
 
         # Initialize the DatabaseHandler
-        self.db_handler = DatabaseHandler()
+        self.db_handler = db_handler or DatabaseHandler()
+        ensure_rollup_tables(self.db_handler)
+        self.alert_book = alert_book or PriceAlertBook(self.db_handler, ('XRP',), clock=self.clock)
 
         # Load state from the database
         self.load_state_from_db()
@@ -118,40 +153,34 @@ class XRPPriceAlertBot:
             logger.error(f"Error loading state from DB: {type(e).__name__} - {e}")
 
     def save_state_to_db(self, price_data):
-        """Save price data to the database."""
+        """Save price data to the database, or to the write-ahead log while the database is unreachable."""
         try:
-            insert_query = """
-                INSERT INTO crypto_prices (
-                    timestamp, symbol, last_price, open_price, high_price,
-                    low_price, volume, vwap, bid, ask, percent_change_24h, percent_change
-                ) VALUES (
-                    %(timestamp)s, %(symbol)s, %(last_price)s, %(open_price)s, %(high_price)s,
-                    %(low_price)s, %(volume)s, %(vwap)s, %(bid)s, %(ask)s, %(percent_change_24h)s, %(percent_change)s
-                );
-            """
-            params = {
-                'timestamp': datetime.now(timezone.utc),
-                'symbol': 'XRP',
-                'last_price': price_data.get('last'),
-                'open_price': price_data.get('open'),
-                'high_price': price_data.get('high'),
-                'low_price': price_data.get('low'),
-                'volume': price_data.get('volume'),
-                'vwap': price_data.get('vwap'),
-                'bid': price_data.get('bid'),
-                'ask': price_data.get('ask'),
-                'percent_change_24h': price_data.get('percent_change_24'),
-                'percent_change': price_data.get('percent_change'),
-            }
-            success = self.db_handler.execute(insert_query, params)
+            tick = Tick.from_ticker(
+                'XRP', price_data, timestamp=self.clock(), percent_change=price_data.get('percent_change')
+            )
+            if self.wal is not None and self.wal.pending and not self.wal.replay(self.db_handler):
+                self.queue_tick(tick)  # Still down: queue behind the earlier ticks
+                return
+            success = self.db_handler.execute(INSERT_TICK_QUERY, tick.as_row())
             if success:
                 logger.info("Saved price data to DB.")
+                if tick.last_price is not None:
+                    update_rollups(self.db_handler, 'XRP', tick.timestamp, tick.last_price, tick.volume)
             else:
                 logger.error("Failed to save price data to DB.")
+                if self.wal is not None and not self.db_handler.connected:
+                    self.queue_tick(tick)
 
         except Exception as e:
             logger.error(f"Error saving price data to DB: {type(e).__name__} - {e}")
 
+    def queue_tick(self, tick):
+        """Queue a tick in the write-ahead log until the database is back."""
+        if self.wal.append(tick):
+            logger.warning(f"Queued price data in the WAL ({self.wal.pending} ticks pending).")
+        else:
+            logger.error("Failed to queue price data; the tick is lost.")
+
     def save_bot_activity_to_db(self, activity_type, price, summary_text=None):
         """
         Save non-trading bot activities to the twitter_bot_activity table.
@@ -167,7 +196,7 @@ class XRPPriceAlertBot:
                 VALUES (%(timestamp)s, %(activity_type)s, %(price)s, %(summary_text)s);
             """
             params = {
-                'timestamp': datetime.now(timezone.utc),
+                'timestamp': self.clock(),
                 'activity_type': activity_type,
                 'price': price,
                 'summary_text': summary_text
@@ -194,7 +223,7 @@ class XRPPriceAlertBot:
                 );
             """
             params = {
-                'timestamp': datetime.now(timezone.utc),
+                'timestamp': self.clock(),
                 'signal_type': signal_type,
                 'price': price,
                 'profit_loss': profit_loss,
@@ -212,19 +241,20 @@ class XRPPriceAlertBot:
             logger.error(f"Error saving trade signal to DB: {type(e).__name__} - {e}")
 
     def run(self):
-        """Run the main loop of the bot."""
-        while True:
+        """Run the main loop of the bot once per wall-clock minute, without drift."""
+        def iteration(slot_time):
             try:
                 self.main_loop()
             except Exception as e:
                 logger.error(
                     f"An error occurred in the main loop: {type(e).__name__} - {e}"
                 )
-                time.sleep(60)
+
+        FixedRateScheduler(LOOP_INTERVAL, name='alert_bot', sleep=self.sleep).run(iteration)
 
     def main_loop(self):
-        """Main loop that checks price and posts tweets."""
-        current_time = datetime.now(timezone.utc)
+        """One iteration of the main loop: checks the price and posts tweets. Scheduled by run()."""
+        current_time = self.clock()
         current_hour = current_time.hour
         current_minute = current_time.minute
         self.current_day = current_time.date()
@@ -232,18 +262,16 @@ class XRPPriceAlertBot:
         logger.info(f"Checking time: Hour={current_hour}, Minute={current_minute}")
 
         # Fetch price data
-        price_data = fetch_xrp_price()
+        price_data = self.price_source()
 
         if not price_data or 'last' not in price_data:
             logger.warning("Failed to fetch price data.")
-            time.sleep(60)
             return
 
         try:
             full_price = float(price_data['last'])
         except (ValueError, TypeError) as e:
             logger.error(f"Error parsing price data: {type(e).__name__} - {e}")
-            time.sleep(60)
             return
 
         rounded_price = round(full_price, 2)
@@ -268,6 +296,10 @@ class XRPPriceAlertBot:
         price_data['percent_change'] = percent_change
         self.save_state_to_db(price_data)
 
+        # User-defined price alerts
+        self.alert_book.refresh()
+        self.alert_book.on_tick('XRP', full_price)
+
         # Update last_full_price
         self.last_full_price = full_price
 
@@ -284,7 +316,7 @@ class XRPPriceAlertBot:
                     logger.info(f"Calculated percent_change={percent_change:.2f}%")
 
                     tweet_text = generate_message(
-                        self.last_rounded_price, rounded_price
+                        self.last_rounded_price, rounded_price, now=current_time
                     )
                     try:
                         post_tweet(self.client, tweet_text)
@@ -312,10 +344,11 @@ class XRPPriceAlertBot:
                     logger.info("3-hour summary condition met. Attempting to generate and post.")
                     try:
                         summary_text, chart_filename = generate_3_hour_summary(
-                            self.db_handler, full_price, None  # No longer passing RAPIDAPI_KEY
+                            self.db_handler, full_price, None,  # No longer passing RAPIDAPI_KEY
+                            now=current_time, render_chart=self.render_charts
                         )
-                        if summary_text and chart_filename:
-                            media_id = upload_media(self.api, chart_filename)
+                        if summary_text and (chart_filename or not self.render_charts):
+                            media_id = upload_media(self.api, chart_filename) if chart_filename else None
                             post_tweet(self.client, summary_text, media_id)
                             logger.info(
                                 f"3-hour summary tweet with chart posted: {summary_text}"
@@ -351,6 +384,7 @@ class XRPPriceAlertBot:
                             self.last_checked_price,
                             rounded_price,
                             is_volatility_alert=True,
+                            now=current_time,
                         )
                         try:
                             post_tweet(self.client, tweet_text)
@@ -375,7 +409,7 @@ class XRPPriceAlertBot:
                     if self.daily_high is not None and self.daily_low is not None:
                         # Generate and post the daily summary
                         summary_text = generate_daily_summary_message(
-                            self.daily_high, self.daily_low
+                            self.daily_high, self.daily_low, now=current_time
                         )
                         try:
                             post_tweet(self.client, summary_text)
@@ -409,16 +443,33 @@ class XRPPriceAlertBot:
                 logger.info("Not time for daily summary yet.")
 
         # Cleanup old charts to conserve disk space
-        cleanup_old_charts()
-
-        # Sleep for 1 minute before next iteration
-        time.sleep(60)
+        self.cleanup_charts()
 
     def __del__(self):
         """Ensure the database connection is closed."""
         self.db_handler.close()
 
 
+def run_alert_bot(tick_bus=None):
+    """
+    Run the alert bot until interrupted.
+
+    Args:
+        tick_bus (SharedTickBus, optional): Source of the XRP ticker when run by the supervisor.
+    """
+    start_metrics_server(ALERT_BOT_METRICS_PORT, METRICS_HOST)
+    price_source = None
+    if tick_bus is not None:
+        def price_source():
+            return tick_bus.ticker('XRP', max_age=TICK_BUS_AGE, wait=TICK_BUS_WAIT) or fetch_xrp_price()
+    bot = XRPPriceAlertBot(price_source=price_source, wal=TickWal(os.path.join(TICK_WAL_DIR, 'xrppricealerts')))
+    try:
+        bot.run()
+    finally:
+        bot.alert_book.close()
+        bot.wal.close()
+
+
 if __name__ == "__main__":
-    bot = XRPPriceAlertBot()
-    bot.run()
+    setup_logging('xrp_bot.log')
+    run_alert_bot()